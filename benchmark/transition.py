@@ -0,0 +1,155 @@
+import argparse
+import logging
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+import core.schemas.definition as definition_schema
+from core.enums.definition import ColumnDefinition, Transition
+from core.functions.definition.util import get_defined_column_name
+from processor.dataset import get_timestamped_dataframe_by_transition
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+
+def get_definition() -> definition_schema.Definition:
+    # Get the definition of the synthetic event log
+    return definition_schema.Definition(
+        id=0,
+        created_at=datetime.now(),
+        columns_definition={
+            "case_id": ColumnDefinition.CASE_ID,
+            "activity": ColumnDefinition.ACTIVITY,
+            "transition": ColumnDefinition.TRANSITION,
+            "timestamp": ColumnDefinition.TIMESTAMP,
+            "resource": ColumnDefinition.RESOURCE
+        },
+        fast_mode=False
+    )
+
+
+def get_synthetic_dataframe(events_count: int, seed: int = 42) -> DataFrame:
+    # Get a synthetic event log, most activities have start and complete events, some only have complete events
+    rng = np.random.default_rng(seed)
+    activities_count = max(int(events_count / 1.8), 1)
+    case_ids = np.sort(rng.integers(0, max(activities_count // 8, 1), activities_count))
+    activities = rng.integers(0, 20, activities_count)
+    resources = rng.integers(0, 50, activities_count)
+    has_start = rng.random(activities_count) < 0.8
+    starts = pd.Timestamp("2023-01-01") + pd.to_timedelta(np.arange(activities_count) * 60, unit="s")
+    ends = starts + pd.to_timedelta(rng.integers(1, 3600, activities_count), unit="s")
+    start_df = DataFrame({
+        "case_id": case_ids[has_start],
+        "activity": activities[has_start],
+        "transition": Transition.START.value,
+        "timestamp": starts[has_start],
+        "resource": resources[has_start]
+    })
+    end_df = DataFrame({
+        "case_id": case_ids,
+        "activity": activities,
+        "transition": np.where(rng.random(activities_count) < 0.95,
+                               Transition.COMPLETE.value, Transition.ATE_ABORT.value),
+        "timestamp": ends,
+        "resource": resources
+    })
+    df = pd.concat([start_df, end_df], ignore_index=True).head(events_count)
+    df["case_id"] = "case-" + df["case_id"].astype(str)
+    df["activity"] = "activity-" + df["activity"].astype(str)
+    df["resource"] = "resource-" + df["resource"].astype(str)
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def get_timestamped_dataframe_by_transition_row_by_row(df: DataFrame,
+                                                       definition: definition_schema.Definition) -> DataFrame:
+    # The row by row implementation used before the columnar pairing, kept as the reference of the benchmark
+    columns_definition = definition.columns_definition
+    case_id_column = get_defined_column_name(columns_definition, ColumnDefinition.CASE_ID)
+    activity_column = get_defined_column_name(columns_definition, ColumnDefinition.ACTIVITY)
+    transition_column = get_defined_column_name(columns_definition, ColumnDefinition.TRANSITION)
+    timestamp_column = get_defined_column_name(columns_definition, ColumnDefinition.TIMESTAMP)
+    start_transition = definition.start_transition
+    complete_transition = definition.complete_transition
+    abort_transition = definition.abort_transition
+
+    df = df.sort_values([case_id_column, timestamp_column], kind="mergesort")
+    df = df.reset_index(drop=True)
+
+    event_df_list = []
+
+    for case_id in df[case_id_column].unique():
+        case_df = df[df[case_id_column] == case_id]
+        events = {}
+        pending_events = {}
+        for i, row in case_df.iterrows():
+            activity = row[activity_column]
+            if row[transition_column].upper() == start_transition.upper():
+                pending_events[activity] = row
+                pending_events[activity][ColumnDefinition.START_TIMESTAMP] = row[timestamp_column]
+                pending_events[activity][ColumnDefinition.END_TIMESTAMP] = row[timestamp_column]
+            elif row[transition_column].upper() in [complete_transition, abort_transition]:
+                if activity in pending_events:
+                    events[i] = pending_events.pop(activity)
+                    events[i][ColumnDefinition.END_TIMESTAMP] = row[timestamp_column]
+                else:
+                    events[i] = row
+                    events[i][ColumnDefinition.START_TIMESTAMP] = row[timestamp_column]
+                    events[i][ColumnDefinition.END_TIMESTAMP] = row[timestamp_column]
+
+        events_list = list(events.values())
+        events_list.extend(pending_events.values())
+        events_df = pd.DataFrame(events_list)
+        events_df = events_df.sort_values([ColumnDefinition.START_TIMESTAMP, ColumnDefinition.END_TIMESTAMP])
+        events_df = events_df.reset_index(drop=True)
+        event_df_list.append(events_df)
+
+    df = pd.concat(event_df_list, ignore_index=True)
+    df = df.drop(columns=[transition_column, timestamp_column])
+    df = df.sort_values([case_id_column, ColumnDefinition.START_TIMESTAMP, ColumnDefinition.END_TIMESTAMP])
+
+    return df
+
+
+def get_comparable_dataframe(df: DataFrame) -> DataFrame:
+    # Get a dataframe whose row order does not depend on the sorting algorithm
+    df = df.sort_values(df.columns.tolist(), kind="mergesort").reset_index(drop=True)
+    df[ColumnDefinition.START_TIMESTAMP] = pd.to_datetime(df[ColumnDefinition.START_TIMESTAMP])
+    df[ColumnDefinition.END_TIMESTAMP] = pd.to_datetime(df[ColumnDefinition.END_TIMESTAMP])
+    return df
+
+
+def measure(target: callable, df: DataFrame, definition: definition_schema.Definition) -> tuple[DataFrame, float]:
+    # Measure the used time of a pairing implementation
+    start_time = perf_counter()
+    result_df = target(df, definition)
+    return result_df, perf_counter() - start_time
+
+
+def run_benchmark(events_count: int, row_by_row_events_count: int) -> None:
+    # Compare both implementations on a small log, then time the columnar one on the full log
+    definition = get_definition()
+
+    small_df = get_synthetic_dataframe(row_by_row_events_count)
+    row_by_row_df, row_by_row_time = measure(get_timestamped_dataframe_by_transition_row_by_row, small_df, definition)
+    columnar_df, columnar_time = measure(get_timestamped_dataframe_by_transition, small_df, definition)
+    pd.testing.assert_frame_equal(get_comparable_dataframe(row_by_row_df), get_comparable_dataframe(columnar_df),
+                                  check_dtype=False)
+    print(f"{len(small_df)} events: row by row {row_by_row_time:.2f}s, columnar {columnar_time:.2f}s, "
+          f"speedup {row_by_row_time / columnar_time:.0f}x, same output")
+
+    df = get_synthetic_dataframe(events_count)
+    result_df, columnar_time = measure(get_timestamped_dataframe_by_transition, df, definition)
+    print(f"{len(df)} events: columnar {columnar_time:.2f}s, {len(result_df)} paired events")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the start/complete transition pairing")
+    parser.add_argument("--events", type=int, default=1000000, help="Events count of the synthetic log")
+    parser.add_argument("--row-by-row-events", type=int, default=20000,
+                        help="Events count used to compare with the row by row implementation")
+    arguments = parser.parse_args()
+    run_benchmark(arguments.events, arguments.row_by_row_events)
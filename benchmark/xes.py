@@ -0,0 +1,92 @@
+import argparse
+import logging
+import tempfile
+from time import perf_counter
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from core.functions.event_log.file import get_dataframe_from_xes_stream, get_dataframe_from_xes_with_pm4py
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+
+def write_synthetic_xes(file_path: str, traces_count: int, events_per_trace: int, seed: int = 42) -> int:
+    # Write a synthetic xes log shaped like BPI Challenge 2012, return the events count
+    rng = np.random.default_rng(seed)
+    events_count = 0
+    start = pd.Timestamp("2011-10-01 00:38:44.546", tz="Europe/Amsterdam")
+
+    with open(file_path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" ?>\n'
+                '<log xes.version="1.0" xes.features="nested-attributes" openxes.version="1.0RC7" '
+                'xmlns="http://www.xes-standard.org/">\n'
+                '\t<global scope="trace">\n\t\t<string key="concept:name" value="__INVALID__"/>\n\t</global>\n')
+        for trace in range(traces_count):
+            lengths = max(int(rng.normal(events_per_trace, events_per_trace / 4)), 1)
+            offsets = np.cumsum(rng.integers(1, 7200, lengths))
+            f.write(f'\t<trace>\n'
+                    f'\t\t<string key="concept:name" value="{173688 + trace}"/>\n'
+                    f'\t\t<string key="AMOUNT_REQ" value=" {int(rng.integers(500, 50000))} "/>\n'
+                    f'\t\t<date key="REG_DATE" value="{start.isoformat(timespec="milliseconds")}"/>\n')
+            for i in range(lengths):
+                timestamp = start + pd.Timedelta(seconds=int(offsets[i]))
+                f.write(f'\t\t<event>\n'
+                        f'\t\t\t<string key="org:resource" value="{int(rng.integers(10000, 10100))}"/>\n'
+                        f'\t\t\t<string key="lifecycle:transition" value="COMPLETE"/>\n'
+                        f'\t\t\t<string key="concept:name" '
+                        f'value={quoteattr(f"A_ACTIVITY_{int(rng.integers(0, 24))} ")}/>\n'
+                        f'\t\t\t<date key="time:timestamp" value="{timestamp.isoformat(timespec="milliseconds")}"/>\n'
+                        f'\t\t</event>\n')
+            events_count += lengths
+            start += pd.Timedelta(minutes=int(rng.integers(1, 60)))
+            f.write('\t</trace>\n')
+        f.write('</log>\n')
+
+    return events_count
+
+
+def measure(target: callable, file_path: str) -> tuple[DataFrame, float]:
+    # Measure the used time of a xes reader
+    start_time = perf_counter()
+    result_df = target(file_path)
+    return result_df, perf_counter() - start_time
+
+
+def check_same_values(stream_df: DataFrame, pm4py_df: DataFrame) -> None:
+    # Check both readers get the same values, timestamps are compared after parsing as pm4py formats them
+    assert sorted(stream_df.columns) == sorted(pm4py_df.columns)
+    for column in stream_df.columns:
+        if column in {"time:timestamp", "case:REG_DATE"}:
+            expected = pd.to_datetime(pm4py_df[column], utc=True)
+            actual = pd.to_datetime(stream_df[column], utc=True)
+        else:
+            expected = pm4py_df[column]
+            actual = stream_df[column].astype(object)
+        assert (expected.to_numpy() == actual.to_numpy()).all(), column
+
+
+def run_benchmark(traces_count: int, events_per_trace: int) -> None:
+    # Compare the streaming reader with the pm4py reader on a synthetic log
+    with tempfile.NamedTemporaryFile(suffix=".xes") as file:
+        events_count = write_synthetic_xes(file.name, traces_count, events_per_trace)
+        stream_df, stream_time = measure(get_dataframe_from_xes_stream, file.name)
+        pm4py_df, pm4py_time = measure(get_dataframe_from_xes_with_pm4py, file.name)
+
+    check_same_values(stream_df, pm4py_df)
+    stream_memory = stream_df.memory_usage(deep=True).sum() / 1024 / 1024
+    pm4py_memory = pm4py_df.memory_usage(deep=True).sum() / 1024 / 1024
+    print(f"{traces_count} traces, {events_count} events: pm4py {pm4py_time:.2f}s ({pm4py_memory:.0f} MiB), "
+          f"streaming {stream_time:.2f}s ({stream_memory:.0f} MiB), speedup {pm4py_time / stream_time:.1f}x, "
+          f"same values")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark of the streaming xes reader")
+    parser.add_argument("--traces", type=int, default=13087, help="Traces count of the synthetic log")
+    parser.add_argument("--events-per-trace", type=int, default=20, help="Average events count of a trace")
+    arguments = parser.parse_args()
+    run_benchmark(arguments.traces, arguments.events_per_trace)
@@ -1,5 +1,7 @@
 import os
 
+from core.enums.definition import ColumnDefinition
+
 # Load the environment variables
 APP_ID = os.environ.get("APP_ID")
 API_TOKEN = os.environ.get("API_TOKEN")
@@ -11,11 +13,20 @@ POSTGRES_PORT = os.environ.get("POSTGRES_PORT")
 POSTGRES_DB = os.environ.get("POSTGRES_DB")
 POSTGRES_USER = os.environ.get("POSTGRES_USER")
 POSTGRES_PASSWORD = os.environ.get("POSTGRES_PASSWORD")
+POSTGRES_POOL_SIZE = os.environ.get("POSTGRES_POOL_SIZE", "10")
+POSTGRES_MAX_OVERFLOW = os.environ.get("POSTGRES_MAX_OVERFLOW", "20")
 RABBITMQ_HOST = os.environ.get("RABBITMQ_HOST")
 RABBITMQ_PORT = os.environ.get("RABBITMQ_PORT")
 RABBITMQ_USER = os.environ.get("RABBITMQ_USER")
 RABBITMQ_PASS = os.environ.get("RABBITMQ_PASS")
 SIMULATION_INTERVAL = os.environ.get("SIMULATION_INTERVAL")
+DATAFRAME_CACHE_SIZE = os.environ.get("DATAFRAME_CACHE_SIZE", "2048")
+STREAMING_BATCH_WINDOW = os.environ.get("STREAMING_BATCH_WINDOW", "5")
+STREAMING_BATCH_SIZE = os.environ.get("STREAMING_BATCH_SIZE", "256")
+CONSUMER_PREFETCH_COUNT = os.environ.get("CONSUMER_PREFETCH_COUNT", "32")
+CONSUMER_WORKERS = os.environ.get("CONSUMER_WORKERS", "8")
+PUBLISHER_CONFIRMS = os.environ.get("PUBLISHER_CONFIRMS", "false").lower() in {"1", "true", "yes"}
+MESSAGE_CODECS = [c.strip() for c in os.environ.get("MESSAGE_CODECS", "msgpack,zstd").split(",") if c.strip()]
 
 # Check if all environment variables are set
 if APP_ID is None:
@@ -41,3 +52,58 @@ if APP_ID == "core":
         SIMULATION_INTERVAL = int(SIMULATION_INTERVAL)
     except ValueError:
         raise ValueError("SIMULATION_INTERVAL must be an integer")
+
+try:
+    DATAFRAME_CACHE_SIZE = int(DATAFRAME_CACHE_SIZE) * 1024 * 1024
+except ValueError:
+    raise ValueError("DATAFRAME_CACHE_SIZE must be an integer, the unit is MiB")
+
+try:
+    STREAMING_BATCH_WINDOW = int(STREAMING_BATCH_WINDOW) / 1000
+    STREAMING_BATCH_SIZE = int(STREAMING_BATCH_SIZE)
+except ValueError:
+    raise ValueError("STREAMING_BATCH_WINDOW and STREAMING_BATCH_SIZE must be integers, the unit of the window is ms")
+
+try:
+    CONSUMER_PREFETCH_COUNT = int(CONSUMER_PREFETCH_COUNT)
+    CONSUMER_WORKERS = int(CONSUMER_WORKERS)
+except ValueError:
+    raise ValueError("CONSUMER_PREFETCH_COUNT and CONSUMER_WORKERS must be integers")
+
+try:
+    POSTGRES_POOL_SIZE = int(POSTGRES_POOL_SIZE)
+    POSTGRES_MAX_OVERFLOW = int(POSTGRES_MAX_OVERFLOW)
+except ValueError:
+    raise ValueError("POSTGRES_POOL_SIZE and POSTGRES_MAX_OVERFLOW must be integers")
+
+# Event log ingestion
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+CSV_CHUNK_ROWS = 100000
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.01
+CATEGORICAL_COLUMN_DEFINITIONS = [ColumnDefinition.ACTIVITY, ColumnDefinition.RESOURCE, ColumnDefinition.TRANSITION]
+XES_ATTRIBUTE_TYPES = {"string", "date", "int", "float", "boolean", "id"}
+
+# Streaming
+PREFIX_CACHE_SIZE = 1000000
+PREFIX_LOCK_STRIPES = 256
+ENCODER_STATES_SIZE = 10000
+STREAMING_BACKLOG_SIZE = 1000000
+EVENT_INSERT_CHUNK_SIZE = 5000
+
+# Plugin encoding
+ENCODING_INLINE_MAX_WORK = 20000
+
+# Message deduplication
+PROCESSED_MESSAGES_TTL = 15 * 60
+PROCESSED_MESSAGES_SIZE = 1000000
+
+# Message publishing
+PUBLISHER_POOL_SIZE = 4
+RPC_REPLY_QUEUE = f"{APP_ID}-replies"
+PROCESS_REQUEST_TIMEOUT = 60 * 60
+RABBITMQ_RETRY_DELAY_MIN = 0.5
+RABBITMQ_RETRY_DELAY_MAX = 5
+
+# Message codecs
+MESSAGE_COMPRESSION_THRESHOLD = 1024
+MESSAGE_COMPRESSION_LEVEL = 3
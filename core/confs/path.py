@@ -11,6 +11,9 @@ PLUGIN_MODEL_PATH = "data/plugins/models"
 PROCESSOR_LOG_PATH = "data/processor/logs"
 TEMP_PATH = "data/tmp"
 
+# Database migrations
+ALEMBIC_CONFIG_PATH = "core/alembic.ini"
+
 # Allowed extensions
 ALLOWED_EXTENSIONS = ["xes", "csv", "zip"]
 ALLOWED_EXTRACTED_EXTENSIONS = ["xes", "csv"]
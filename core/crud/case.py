@@ -1,5 +1,7 @@
 import logging
 
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 import core.models.case as model
@@ -33,6 +35,22 @@ def create_case(db: Session, case: schema.CaseCreate) -> model.Case:
     return db_case
 
 
+def upsert_cases(db: Session, project_id: int, case_ids: list[str]) -> dict[str, int]:
+    # Create the missing cases of a project in one statement, and get the ids of all the cases, not committed
+    statement = insert(model.Case).values([{"project_id": project_id, "case_id": case_id, "completed": False}
+                                           for case_id in case_ids])
+    statement = statement.on_conflict_do_update(
+        constraint="uq_case_project_id_case_id",
+        set_={"case_id": statement.excluded.case_id}
+    ).returning(model.Case.id, model.Case.case_id)
+    return {case_id: id_ for id_, case_id in db.execute(statement)}
+
+
+def mark_as_completed_by_ids(db: Session, ids: list[int]) -> None:
+    # Mark cases as completed by ids, not committed
+    db.execute(update(model.Case).where(model.Case.id.in_(ids)).values(completed=True))
+
+
 def mark_as_completed(db: Session, db_case: model.Case) -> model.Case | None:
     # Mark a case as completed
     db_case.completed = True
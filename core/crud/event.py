@@ -1,9 +1,13 @@
 import logging
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Text, and_, cast, func, insert, literal, not_, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 import core.models.event as model
 import core.schemas.event as schema
+from core.confs import config
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -24,13 +28,34 @@ def get_events_by_case_id_and_project_id(db: Session, case_id: int, project_id:
     return db.query(model.Event).filter_by(case_id=case_id, project_id=project_id).all()  # type: ignore
 
 
-def get_events_prescribed_but_not_sent_by_project_id(db: Session, project_id: int) -> list[model.Event]:
-    # Get all events prescribed but not sent by project id
-    return db.query(model.Event).filter_by(  # type: ignore
-        project_id=project_id,
-        prescribed=True,
-        sent=False
-    ).order_by(model.Event.created_at).all()
+def get_events_by_ids(db: Session, event_ids: list[int]) -> list[model.Event]:
+    # Get events by ids, in the order of the ids
+    db_events = {event.id: event for event in db.query(model.Event).filter(model.Event.id.in_(event_ids))}
+    return [db_events[event_id] for event_id in event_ids if event_id in db_events]
+
+
+async def get_events_by_ids_async(db: AsyncSession, event_ids: list[int]) -> list[model.Event]:
+    # Get events by ids with their cases, in the order of the ids, without blocking the event loop
+    db_events = {event.id: event for event in await db.scalars(
+        select(model.Event).options(selectinload(model.Event.case)).filter(model.Event.id.in_(event_ids))
+    )}
+    return [db_events[event_id] for event_id in event_ids if event_id in db_events]
+
+
+async def get_unsent_prescribed_event_ids_async(db: AsyncSession, project_id: int, limit: int) -> list[int]:
+    # Get the ids of the prescribed events of the project which were never delivered to a reader, oldest first
+    return (await db.scalars(
+        select(model.Event.id)
+        .filter_by(project_id=project_id, prescribed=True, sent=False)
+        .order_by(model.Event.id)
+        .limit(limit)
+    )).all()
+
+
+async def mark_as_sent_by_event_ids_async(db: AsyncSession, event_ids: list[int]) -> None:
+    # Mark events as delivered to the reader by event ids
+    await db.execute(update(model.Event).where(model.Event.id.in_(event_ids)).values(sent=True))
+    await db.commit()
 
 
 def create_event(db: Session, event: schema.EventCreate, case_id: int) -> model.Event:
@@ -42,13 +67,41 @@ def create_event(db: Session, event: schema.EventCreate, case_id: int) -> model.
     return db_event
 
 
-def add_prescription(db: Session, db_event: model.Event, plugin_key: str, prescription: dict) -> model.Event:
-    # Add a prescription to an event
-    db_event.prescriptions = {**db_event.prescriptions, plugin_key: prescription}
-    db.add(db_event)
+def create_events(db: Session, events: list[schema.EventCreate], case_ids: list[int]) -> list[int]:
+    # Create events by multi-row inserts, and get their ids in the order of the events, not committed.
+    # The ids are taken from the sequence first, so they do not depend on the order of the returned rows
+    ids = db.scalars(
+        select(func.nextval(func.pg_get_serial_sequence("event", "id")))
+        .select_from(func.generate_series(1, len(events)))
+    ).all()
+    rows = [{**event.dict(), "id": id_, "case_id": case_id} for event, id_, case_id in zip(events, ids, case_ids)]
+    for i in range(0, len(rows), config.EVENT_INSERT_CHUNK_SIZE):
+        db.execute(insert(model.Event).values(rows[i:i + config.EVENT_INSERT_CHUNK_SIZE]))
+    return ids
+
+
+def add_prescription(db: Session, event_id: int, plugin_key: str, prescription: dict,
+                     plugin_keys: list[str]) -> bool | None:
+    # Merge a prescription into an event in one statement, the event is marked as prescribed once the prescriptions
+    # of all the plugins are there. Return if this prescription made the event prescribed, so later results of an
+    # already prescribed event return False, or None if the event is not found.
+    # The row is locked before its previous state is read, so concurrent results see each other's prescriptions
+    previous = (select(model.Event.id, model.Event.prescribed)
+                .where(model.Event.id == event_id)
+                .with_for_update()
+                .cte("previous_event"))
+    prescriptions = model.Event.prescriptions.op("||", return_type=JSONB)(literal({plugin_key: prescription}, JSONB))
+    prescribed = db.scalar(
+        update(model.Event)
+        .where(model.Event.id == previous.c.id)
+        .values(
+            prescriptions=prescriptions,
+            prescribed=or_(model.Event.prescribed, prescriptions.has_all(cast(plugin_keys, ARRAY(Text))))
+        )
+        .returning(and_(model.Event.prescribed, not_(previous.c.prescribed)))
+    )
     db.commit()
-    db.refresh(db_event)
-    return db_event
+    return prescribed
 
 
 def mark_as_prescribed(db: Session, db_event: model.Event) -> model.Event:
@@ -60,13 +113,6 @@ def mark_as_prescribed(db: Session, db_event: model.Event) -> model.Event:
     return db_event
 
 
-def mark_as_sent_by_event_ids(db: Session, event_ids: list[int]) -> None:
-    # Mark events as sent by event ids
-    db.query(model.Event).filter(model.Event.id.in_(event_ids)).update(  # type: ignore
-        {model.Event.sent: True}, synchronize_session="fetch")  # type: ignore
-    db.commit()
-
-
 def delete_all_events_by_project_id(db: Session, project_id: int) -> None:
     # Delete events by project id
     db.query(model.Event).filter_by(project_id=project_id).delete(synchronize_session="fetch")
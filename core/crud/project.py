@@ -1,7 +1,10 @@
 import logging
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
+import core.models.event_log as event_log_model
 import core.models.project as model
 import core.schemas.project as schema
 from core.enums.status import ProjectStatus
@@ -15,6 +18,17 @@ def get_project_by_id(db: Session, project_id: int) -> model.Project | None:
     return db.query(model.Project).filter_by(id=project_id).first()
 
 
+async def get_project_by_id_async(db: AsyncSession, project_id: int) -> model.Project | None:
+    # Get a project by id with its event log, definition and plugins, relationships can not be lazy loaded by an
+    # async session
+    return await db.scalar(
+        select(model.Project)
+        .options(selectinload(model.Project.event_log).selectinload(event_log_model.EventLog.definition),
+                 selectinload(model.Project.plugins))
+        .filter_by(id=project_id)
+    )
+
+
 def get_project_by_event_log_id(db: Session, event_log_id: int) -> model.Project | None:
     # Get a project by event log id
     return db.query(model.Project).filter_by(event_log_id=event_log_id).first()
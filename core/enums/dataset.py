@@ -12,3 +12,9 @@ class OutcomeType(str, Enum):
     """Enum for outcome type."""
     LABELLED = "LABELLED"
     LAST_ACTIVITY = "LAST_ACTIVITY"
+
+
+class ExecutionPlan(str, Enum):
+    """Enum for execution plan of the encoding."""
+    INLINE = "INLINE"
+    POOL = "POOL"
@@ -7,6 +7,7 @@ class ErrorType(str, Enum):
     EVENT_LOG_NOT_FOUND = "Event log not found"
     EVENT_LOG_DEFINITION_NOT_FOUND = "Event log definition not found"
     EVENT_LOG_COLUMNS_MISMATCH = "Event log columns mismatch with previous definition"
+    EVENTS_INVALID = "No valid events provided, a JSON array or NDJSON of events is expected"
 
     FAST_MODE_ENFORCED = "Fast mode enforced"
 
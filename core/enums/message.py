@@ -17,6 +17,7 @@ class MessageType(str, Enum):
     STREAMING_READY = "STREAMING_READY"
     STREAMING_PRESCRIPTION_REQUEST = "STREAMING_PRESCRIPTION_REQUEST"
     STREAMING_PRESCRIPTION_RESULT = "STREAMING_PRESCRIPTION_RESULT"
+    STREAMING_GAP = "STREAMING_GAP"
     STREAMING_STOP = "STREAMING_STOP"
     # Between core and processor
     PROCESS_REQUEST = "PROCESS_REQUEST"
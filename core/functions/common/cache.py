@@ -0,0 +1,165 @@
+import logging
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pandas import DataFrame
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    # Cache evicting the least recently used entries once the sizes of the entries exceed the budget
+    def __init__(self, max_size: int, size_of: Callable[[Any], int], name: str = "cache"):
+        self.max_size = max_size
+        self.size_of = size_of
+        self.name = name
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def keys(self) -> List[Hashable]:
+        # Get a snapshot of the keys, from the least recently used one
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        # Get the value and mark it as the most recently used one
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> bool:
+        # Put the value, return False if the value alone exceeds the budget
+        size = self.size_of(value)
+
+        with self._lock:
+            self._pop(key)
+
+            if size > self.max_size:
+                logger.warning(f"Skip caching {key} in {self.name}: {size} bytes exceed the budget {self.max_size}")
+                return False
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_size:
+                evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+                logger.info(f"Evict {evicted_key} from {self.name}")
+
+        return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        # Remove the value
+        with self._lock:
+            entry = self._pop(key)
+        return default if entry is None else entry[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        # Get the counters of the cache
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def _pop(self, key: Hashable) -> Optional[Tuple[Any, int]]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+        return entry
+
+
+class DedupStore:
+    # Store of the ids seen in the last ttl seconds, the ids are kept in insertion order, so the expired ones are
+    # popped from the head, and the oldest ones are evicted once the capacity is reached
+    def __init__(self, ttl: float, max_size: int, name: str = "dedup store"):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.name = name
+        self.duplicates = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def add(self, key: Hashable) -> bool:
+        # Add the id, return False if it has been seen already
+        now = monotonic()
+
+        with self._lock:
+            self._expire(now)
+
+            if key in self._entries:
+                self.duplicates += 1
+                return False
+
+            self._entries[key] = now
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return True
+
+    def expire(self) -> int:
+        # Remove the expired ids, return the number of removed ones
+        with self._lock:
+            return self._expire(monotonic())
+
+    def get_stats(self) -> Dict[str, int]:
+        # Get the counters of the store
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "duplicates": self.duplicates,
+                "expirations": self.expirations,
+                "evictions": self.evictions
+            }
+
+    def _expire(self, now: float) -> int:
+        count = 0
+        deadline = now - self.ttl
+        while self._entries and next(iter(self._entries.values())) < deadline:
+            self._entries.popitem(last=False)
+            count += 1
+        self.expirations += count
+        return count
+
+
+def get_dataframe_size(df: DataFrame) -> int:
+    # Get the memory used by the dataframe, including the strings of object columns
+    return int(df.memory_usage(index=True, deep=True).sum())
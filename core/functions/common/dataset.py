@@ -21,6 +21,14 @@ def get_timestamped_dataframe(df: DataFrame, columns_definition: dict[str, Colum
     return df
 
 
+def get_decategorized_dataframe(df: DataFrame) -> DataFrame:
+    # Get dataframe with the categorical columns converted back to plain object columns
+    categorical_columns = df.select_dtypes(["category"]).columns
+    if categorical_columns.empty:
+        return df
+    return df.astype({column: object for column in categorical_columns})
+
+
 def get_transition_recognized_dataframe(df: DataFrame, definition: definition_schema.Definition) -> Optional[DataFrame]:
     # Get transition recognized dataframe
     columns_definition = definition.columns_definition
@@ -4,10 +4,16 @@ from os.path import exists
 from shutil import copy, move, rmtree
 from typing import Optional
 
-from pandas import DataFrame, read_pickle
+from pandas import DataFrame, read_csv, read_pickle
 
 from core.functions.common.etc import random_str
 
+try:
+    from pyarrow import ArrowException, Table, feather, parquet
+except ImportError:
+    # Plugins running on old Python versions may not have pyarrow, they use pickle files instead
+    ArrowException = Table = feather = parquet = None
+
 # Enable logging
 logger = logging.getLogger(__name__)
 
@@ -104,3 +110,102 @@ def get_dataframe_from_pickle(df_path: str) -> Optional[DataFrame]:
 def save_dataframe_to_pickle(df_path: str, df: DataFrame) -> None:
     # Save dataframe to pickle file
     df.to_pickle(df_path)
+
+
+def is_arrow_available() -> bool:
+    # Check if feather and parquet files can be read and written
+    return feather is not None
+
+
+def get_dataframe_from_feather(df_path: str) -> Optional[DataFrame]:
+    # Get dataframe from feather file, the file is memory-mapped instead of being read into a buffer
+    table = feather.read_table(df_path, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def save_dataframe_to_feather(df_path: str, df: DataFrame) -> bool:
+    # Save dataframe to uncompressed feather file, so that the columns can be memory-mapped by readers
+    result = False
+
+    try:
+        if not is_arrow_available():
+            return False
+
+        feather.write_feather(df, df_path, compression="uncompressed")
+        result = True
+    except ArrowException as e:
+        # Columns with mixed types can not be stored as arrow arrays
+        logger.warning(f"Save dataframe to feather error: {e}")
+        delete_file(df_path)
+
+    return result
+
+
+def get_dataframe_from_shared_file(df_path: str) -> Optional[DataFrame]:
+    # Get dataframe from a file shared between core, processor and plugins
+    if df_path.endswith(".feather"):
+        return get_dataframe_from_feather(df_path)
+    return get_dataframe_from_pickle(df_path)
+
+
+def save_dataframe_to_shared_file(base_path: str, df: DataFrame) -> str:
+    # Save dataframe to a file shared between core, processor and plugins, fall back to pickle if needed
+    df_path = get_new_path(base_path, suffix=".feather")
+    if save_dataframe_to_feather(df_path, df):
+        return df_path
+
+    df_path = get_new_path(base_path, suffix=".pkl")
+    save_dataframe_to_pickle(df_path, df)
+    return df_path
+
+
+def get_dataframe_from_parquet(df_path: str) -> Optional[DataFrame]:
+    # Get dataframe from parquet file
+    table = parquet.read_table(df_path, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def save_dataframe_to_parquet(df_path: str, df: DataFrame) -> bool:
+    # Save dataframe to zstd compressed parquet file, string columns are dictionary-encoded by parquet
+    result = False
+
+    try:
+        if not is_arrow_available():
+            return False
+
+        table = Table.from_pandas(df, preserve_index=False)
+        parquet.write_table(table, df_path, compression="zstd", version="2.6")
+        result = True
+    except ArrowException as e:
+        # Columns with mixed types can not be stored as arrow arrays
+        logger.warning(f"Save dataframe to parquet error: {e}")
+        delete_file(df_path)
+
+    return result
+
+
+def get_dataframe_by_name(directory: str, df_name: str) -> Optional[DataFrame]:
+    # Get dataframe saved by name, files written by older versions as feather, pickle or csv are still supported
+    if is_arrow_available() and exists(f"{directory}/{df_name}.parquet"):
+        return get_dataframe_from_parquet(f"{directory}/{df_name}.parquet")
+    elif is_arrow_available() and exists(f"{directory}/{df_name}.feather"):
+        return get_dataframe_from_feather(f"{directory}/{df_name}.feather")
+
+    try:
+        return get_dataframe_from_pickle(f"{directory}/{df_name}.pkl")
+    except (FileNotFoundError, ValueError):
+        # The pickle file may not exist, or its protocol is not supported by the Python version of the plugin
+        return read_csv(f"{directory}/{df_name}.csv")
+
+
+def save_dataframe_by_name(directory: str, df_name: str, df: DataFrame) -> str:
+    # Save dataframe by name as a single parquet file, fall back to pickle and csv if needed, return the path
+    df_path = f"{directory}/{df_name}.parquet"
+    if save_dataframe_to_parquet(df_path, df):
+        return df_path
+
+    # Plugins running on old Python versions can not read the pickle file, so the csv file is kept for them
+    df_path = f"{directory}/{df_name}.pkl"
+    save_dataframe_to_pickle(df_path, df)
+    df.to_csv(f"{directory}/{df_name}.csv", index=False)
+    return df_path
@@ -1,6 +1,11 @@
 import logging
 
+from typing import AsyncIterator
+
 from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.starters.database import AsyncSessionLocal
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -28,3 +33,8 @@ def get_real_ip(request: Request) -> str:
 
 def get_db(request: Request):
     return request.state.db
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
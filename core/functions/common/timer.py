@@ -1,9 +1,8 @@
 import logging
-from datetime import datetime
 from subprocess import run
-from typing import Dict
 
 from core import confs
+from core.functions.common.cache import DedupStore
 from core.functions.common.etc import get_readable_time
 from core.functions.common.file import move_file
 
@@ -11,16 +10,12 @@ from core.functions.common.file import move_file
 logger = logging.getLogger(__name__)
 
 
-def processed_messages_clean(processed_messages: Dict[str, datetime]) -> bool:
-    # Clean processed messages
+def processed_messages_clean(processed_messages: DedupStore) -> bool:
+    # Clean processed messages, the store expires them when ids are added as well, so this only matters when idle
     result = False
 
     try:
-        datetime_now = datetime.now()
-        for message_id in list(processed_messages.keys()):
-            message_datetime = processed_messages.get(message_id)
-            if not message_datetime or (datetime_now - message_datetime).total_seconds() > 15 * 60:
-                processed_messages.pop(message_id)
+        processed_messages.expire()
         result = True
     except Exception as e:
         logger.warning(f"Processed messages clean error: {e}", exc_info=True)
@@ -28,6 +23,22 @@ def processed_messages_clean(processed_messages: Dict[str, datetime]) -> bool:
     return result
 
 
+def log_dedup_stats(store: DedupStore) -> bool:
+    # Log the counters of the dedup store
+    result = False
+
+    try:
+        stats = store.get_stats()
+        logger.warning(f"Stats of {store.name}: {stats['entries']}/{stats['max_size']} entries, "
+                       f"{stats['duplicates']} duplicates, {stats['expirations']} expirations, "
+                       f"{stats['evictions']} evictions")
+        result = True
+    except Exception as e:
+        logger.warning(f"Log dedup stats error: {e}", exc_info=True)
+
+    return result
+
+
 def log_rotation() -> bool:
     # Log rotation
     result = False
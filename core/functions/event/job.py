@@ -1,58 +1,162 @@
 import logging
-from typing import Any
+from bisect import bisect_right
+from threading import Lock
+from typing import Any, Callable
 
-from pandas import to_datetime
+from pandas import Timestamp, to_datetime
 
 from core.enums.definition import ColumnDefinition, DefinitionType
 from core.functions.definition.util import get_start_timestamp, get_column_definition
-from core.functions.message.sender import send_streaming_prescription_request_to_all_plugins
+from core.functions.message.sender import (send_streaming_prescription_request,
+                                           send_streaming_prescription_request_to_all_plugins)
+from core.starters import memory
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
 
-def prepare_prefix_and_send(project_id: int, model_names: dict[str, str], event_id: int,
+def prepare_prefix_and_send(project_id: int, model_names: dict[str, str], event_id: int, case_id: int,
                             columns_definition: dict[str, ColumnDefinition], case_attributes: list[str],
-                            data: list[dict], additional_infos: dict[str, dict[str, Any]]) -> bool:
+                            event: dict, load_events: Callable[[], list[tuple[int, dict]]],
+                            additional_infos: dict[str, dict[str, Any]]) -> bool:
     # Prepare prefix and send to all plugins
     result = False
 
     try:
-        # Rename columns
-        data = rename_elements(data, columns_definition, case_attributes)
+        # The events of a case are handled one at a time, so the cached prefix is not updated concurrently, and the
+        # plugins get the sequences of the case in order
+        with get_prefix_lock(project_id, case_id):
+            prefix, appended = get_prefix(project_id, event_id, case_id, columns_definition, case_attributes,
+                                          event, load_events)
+            send_streaming_prescription_request_to_all_plugins(
+                plugins=list(model_names.keys()),
+                project_id=project_id,
+                model_names=model_names,
+                event_id=event_id,
+                case_id=case_id,
+                prefix=prefix,
+                appended=appended,
+                columns=get_renamed_columns(columns_definition, case_attributes),
+                additional_infos=additional_infos
+            )
+        result = True
+    except Exception as e:
+        logger.error(f"Error while preparing prefix and sending to plugins: {e}", exc_info=True)
 
-        # Get timestamp column
-        timestamp_column = columns_definition[get_start_timestamp(columns_definition)]
+    return result
+
+
+def resend_prefix(project_id: int, plugin_key: str, model_name: str, event_id: int, case_id: int,
+                  columns_definition: dict[str, ColumnDefinition], case_attributes: list[str],
+                  events: list[dict], additional_info: dict[str, Any]) -> bool:
+    # Send the full prefix of the event to a plugin which reported a gap in the appended events,
+    # the events are the ones of the case which arrived until the event, in arrival order
+    result = False
 
-        # Sort data's element by timestamp
-        data.sort(key=lambda x: to_datetime(x[timestamp_column]))
-        send_streaming_prescription_request_to_all_plugins(
-            plugins=list(model_names.keys()),
+    try:
+        timestamped_prefix = get_timestamped_prefix(events, columns_definition, case_attributes)
+        result = send_streaming_prescription_request(
+            plugin_key=plugin_key,
             project_id=project_id,
-            model_names=model_names,
+            model_name=model_name,
             event_id=event_id,
-            prefix=data,
-            additional_infos=additional_infos
+            case_id=case_id,
+            prefix=[element for _, element in timestamped_prefix],
+            appended=False,
+            columns=get_renamed_columns(columns_definition, case_attributes),
+            additional_info=additional_info
         )
-        result = True
     except Exception as e:
-        logger.error(f"Error while preparing prefix and sending to plugins: {e}", exc_info=True)
+        logger.error(f"Error while resending prefix to plugin {plugin_key}: {e}", exc_info=True)
 
     return result
 
 
+def get_prefix(project_id: int, event_id: int, case_id: int, columns_definition: dict[str, ColumnDefinition],
+               case_attributes: list[str], event: dict,
+               load_events: Callable[[], list[tuple[int, dict]]]) -> tuple[list[dict], bool]:
+    # Get the renamed prefix sorted by timestamp, and whether the new event is appended to the end of the prefix
+    # the plugins got before. The cached prefix is extended in place by the new event, and the events of the case
+    # are only loaded from the database if the prefix is not cached. The caller holds the lock of the case, and the
+    # returned prefix is the cached list, so it is only read under the lock
+    cached_prefix: tuple[list[Timestamp], list[dict], list[int]] | None = memory.prefixes.get((project_id, case_id))
+
+    if cached_prefix is None:
+        # The loaded events are the ones which arrived until the event, the event itself is included
+        events = load_events()
+        timestamp_column = columns_definition[get_start_timestamp(columns_definition)]
+        elements = rename_elements([attributes for _, attributes in events], columns_definition, case_attributes)
+        entries = sorted(((to_datetime(element[timestamp_column]), id_, element)
+                          for (id_, _), element in zip(events, elements)), key=lambda x: x[0])
+        timestamps = [timestamp for timestamp, _, _ in entries]
+        event_ids = [id_ for _, id_, _ in entries]
+        prefix = [element for _, _, element in entries]
+        appended = False
+    else:
+        timestamps, prefix, event_ids = cached_prefix
+        if event_id in event_ids:
+            # The event was loaded with a later event of the case, its prefix is made of the events until it
+            return [element for id_, element in zip(event_ids, prefix) if id_ <= event_id], False
+        element = rename_elements([event], columns_definition, case_attributes)[0]
+        timestamp = to_datetime(element[columns_definition[get_start_timestamp(columns_definition)]])
+        position = bisect_right(timestamps, timestamp)
+        timestamps.insert(position, timestamp)
+        prefix.insert(position, element)
+        event_ids.insert(position, event_id)
+        appended = position == len(prefix) - 1
+
+    # The cache is updated even if the prefix is extended in place, so its size and recency are counted
+    memory.prefixes.put((project_id, case_id), (timestamps, prefix, event_ids))
+    return prefix, appended
+
+
+def get_prefix_lock(project_id: int, case_id: int) -> Lock:
+    # Get the lock of the case, the cases share a fixed number of locks
+    return memory.prefix_locks[hash((project_id, case_id)) % len(memory.prefix_locks)]
+
+
+def get_timestamped_prefix(events: list[dict], columns_definition: dict[str, ColumnDefinition],
+                           case_attributes: list[str]) -> list[tuple[Timestamp, dict]]:
+    # Get the renamed events with their timestamps, sorted by timestamp and then by arrival order
+    timestamp_column = columns_definition[get_start_timestamp(columns_definition)]
+    elements = rename_elements(events, columns_definition, case_attributes)
+    timestamped_prefix = [(to_datetime(element[timestamp_column]), element) for element in elements]
+    timestamped_prefix.sort(key=lambda x: x[0])
+    return timestamped_prefix
+
+
+def get_renamed_columns(columns_definition: dict[str, ColumnDefinition], case_attributes: list[str]) -> list[str]:
+    # Get the renamed columns of the project, their order is the column dictionary of the streaming messages
+    return list(rename_elements([dict.fromkeys(columns_definition)], columns_definition, case_attributes)[0])
+
+
+def remove_prefix(project_id: int, case_id: int) -> None:
+    # Remove the cached prefix of a completed case
+    memory.prefixes.pop((project_id, case_id))
+
+
+def remove_prefixes_of_project(project_id: int) -> None:
+    # Remove the cached prefixes of all cases of the project
+    for key in memory.prefixes.keys():
+        if key[0] == project_id:
+            memory.prefixes.pop(key)
+
+
 def rename_elements(data: list[dict], columns_definition: dict[str, ColumnDefinition],
                     case_attributes: list[str]) -> list[dict]:
-    # Rename columns of elements in data list based on definition
+    # Rename columns of elements in data list based on definition, the original elements are not modified
+    result = []
     for element in data:
-        for column in list(element):
+        renamed_element = {}
+        for column, value in element.items():
             definition = get_column_definition(column, columns_definition)
             if definition in DefinitionType.SPECIAL:
-                element[definition] = element.pop(column)
+                renamed_element[definition] = value
             elif definition == ColumnDefinition.CATEGORICAL:
-                element[f"CATEGORICAL_{column}"] = element.pop(column)
+                renamed_element[f"CATEGORICAL_{column}"] = value
             elif case_attributes and column in case_attributes:
-                element[f"CASE_ATTRIBUTE_{definition}_{column}"] = element.pop(column)
+                renamed_element[f"CASE_ATTRIBUTE_{definition}_{column}"] = value
             else:
-                element[f"EVENT_ATTRIBUTE_{definition}_{column}"] = element.pop(column)
-    return data
+                renamed_element[f"EVENT_ATTRIBUTE_{definition}_{column}"] = value
+        result.append(renamed_element)
+    return result
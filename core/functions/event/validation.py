@@ -1,9 +1,11 @@
+import json
 import logging
 from typing import Any
 
 from fastapi import HTTPException
 
 from core.enums.definition import ColumnDefinition
+from core.enums.error import ErrorType
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -18,3 +20,17 @@ def validate_columns(request_body: Any, columns_definition: dict[str, ColumnDefi
         for column in case_attributes:
             if column not in request_body:
                 raise HTTPException(status_code=400, detail=f"Missing case attribute {column}")
+
+
+def validate_events_body(body: bytes, content_type: str) -> list[dict]:
+    # Get the events of a JSON array body, or of a NDJSON body with one event per line
+    try:
+        if "ndjson" in content_type:
+            events = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            events = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=ErrorType.EVENTS_INVALID)
+    if not isinstance(events, list) or not events or not all(isinstance(event, dict) for event in events):
+        raise HTTPException(status_code=400, detail=ErrorType.EVENTS_INVALID)
+    return events
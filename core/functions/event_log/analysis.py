@@ -138,7 +138,9 @@ def get_activities_count(df: DataFrame, definition: dict[str, ColumnDefinition])
         if transition_column_name != "":
             df = df[df[transition_column_name].str.lower() == "complete"]
 
-        result = df[activity_column_name].value_counts().to_dict()
+        # Categories without any completed event are not counted
+        counts = df[activity_column_name].value_counts()
+        result = counts[counts > 0].to_dict()
     except Exception as e:
         logger.warning(f"Get activities count error: {e}", exc_info=True)
 
@@ -160,7 +162,9 @@ def get_resources_count(df: DataFrame, definition: dict[str, ColumnDefinition])
         if transition_column_name != "":
             df = df[df[transition_column_name].str.lower() == "complete"]
 
-        result = df[resource_column_name].value_counts().to_dict()
+        # Categories without any completed event are not counted
+        counts = df[resource_column_name].value_counts()
+        result = counts[counts > 0].to_dict()
     except Exception as e:
         logger.warning(f"Get resources count error: {e}", exc_info=True)
 
@@ -9,7 +9,7 @@ import core.models.event_log as event_log_model
 from core.confs import path
 from core.enums.definition import ColumnDefinition, Transition
 from core.functions.common.dataset import get_timestamped_dataframe, get_transition_recognized_dataframe
-from core.functions.common.file import copy_file, get_new_path
+from core.functions.common.file import copy_file, get_dataframe_by_name, get_new_path
 from core.functions.definition.util import get_defined_column_name, get_start_timestamp
 from core.schemas import definition as definition_schema
 
@@ -51,9 +51,7 @@ def get_processed_dataset_path(db_event_log: event_log_model.EventLog) -> str:
 
     try:
         temp_path = get_new_path(path.TEMP_PATH, suffix=".csv")
-        training_df = pd.read_pickle(
-            filepath_or_buffer=f"{path.EVENT_LOG_TRAINING_DF_PATH}/{db_event_log.training_df_name}.pkl"
-        )  # nosec B301
+        training_df = get_dataframe_by_name(path.EVENT_LOG_TRAINING_DF_PATH, db_event_log.training_df_name)
         training_df.to_csv(temp_path, index=False)
         result = temp_path
     except Exception as e:
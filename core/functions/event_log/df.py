@@ -1,12 +1,13 @@
 import logging
 from gzip import BadGzipFile
+from shutil import copyfileobj
 from zipfile import BadZipFile
 
 from fastapi import HTTPException, UploadFile
 from pandas import DataFrame
 from sqlalchemy.orm import Session
 
-from core.confs import path
+from core.confs import config, path
 from core.crud.event_log import set_df_name
 from core.enums.error import ErrorType
 from core.functions.common.etc import get_current_time_label
@@ -25,7 +26,7 @@ def get_dataframe(db_event_log: EventLog) -> DataFrame | None:
 
 
 def get_dataframe_by_id_or_name(event_log_id: int, df_name: str) -> DataFrame | None:
-    # Get dataframe from memory or pickle file
+    # Get dataframe from memory or pickle file, the pickle file is read again if the dataframe was evicted
     df = get_dataframe_from_memory(event_log_id=event_log_id)
     if df is None and df_name:
         df = get_dataframe_from_pickle(f"{path.EVENT_LOG_DATAFRAME_PATH}/{df_name}")
@@ -47,7 +48,7 @@ def get_df_from_uploaded_file(file: UploadFile, extension: str, separator: str)
     )
 
     with open(raw_path, "wb") as f:
-        f.write(file.file.read())
+        copyfileobj(file.file, f, config.UPLOAD_CHUNK_SIZE)
 
     # Get dataframe from file
     try:
@@ -78,4 +79,4 @@ def save_dataframe(db: Session, db_event_log: EventLog, df: DataFrame) -> None:
 
 def save_dataframe_to_memory(event_log_id: int, df: DataFrame) -> None:
     # Save dataframe to memory
-    memory.dataframes[event_log_id] = df
+    memory.dataframes.put(event_log_id, df)
@@ -1,14 +1,21 @@
 import logging
+from contextlib import nullcontext
 from gzip import GzipFile
+from shutil import copyfileobj
+from typing import BinaryIO, ContextManager
 from zipfile import ZipFile
 
 from fastapi import HTTPException
+from lxml.etree import XMLSyntaxError, _Element, iterparse
 from pandas import DataFrame, read_csv
 from pm4py import read_xes
+from pyarrow import Schema, Table, dictionary, field, int32, schema, string
+from pyarrow.parquet import ParquetWriter
 
-from core.confs import path
+from core.confs import config, path
 from core.enums.error import ErrorType
-from core.functions.common.file import get_extension, get_new_path, delete_file
+from core.functions.common.file import get_extension, get_new_path, delete_file, get_dataframe_from_parquet
+from core.functions.event_log.analysis import get_inferred_definition_by_name
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -25,21 +32,135 @@ def get_dataframe_from_file(file_path: str, extension: str, separator: str) -> D
 
 
 def get_dataframe_from_xes(file_path: str) -> DataFrame:
-    # Get dataframe from xes file
+    # Get dataframe from xes file, use pm4py if the streaming reader can not parse the file
+    try:
+        return get_dataframe_from_xes_stream(file_path)
+    except XMLSyntaxError as e:
+        logger.warning(f"Stream xes file error, use pm4py instead: {e}")
+
+    return get_dataframe_from_xes_with_pm4py(file_path)
+
+
+def get_dataframe_from_xes_with_pm4py(file_path: str) -> DataFrame:
+    # Get dataframe from xes file with pm4py
     df = read_xes(file_path)
     df = df.astype(str)
     df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
     return df
 
 
-def get_dataframe_from_csv(file_path: str, separator: str) -> DataFrame:
-    # Get dataframe from csv file
-    df = read_csv(file_path, sep=separator, dtype=str)
-    df_obj = df.select_dtypes(["object"])
-    df[df_obj.columns] = df_obj.apply(lambda x: x.str.strip())
+def get_dataframe_from_xes_stream(file: str | BinaryIO) -> DataFrame:
+    # Get dataframe from xes file or stream by streaming its traces, the parsed traces are cleared to bound the memory
+    columns: dict[str, list[str | None]] = {}
+    rows_count = 0
+
+    for _, trace in iterparse(file, events=("end",), tag="{*}trace", remove_blank_text=True, huge_tree=True):
+        trace_attributes = {}
+        trace_events = []
+        for element in trace:
+            tag = get_local_tag(element)
+            if tag == "event":
+                trace_events.append(get_xes_attributes(element))
+            elif tag in config.XES_ATTRIBUTE_TYPES:
+                trace_attributes[f"case:{element.get('key')}"] = get_xes_attribute_value(element, tag)
+
+        for event in trace_events:
+            event.update(trace_attributes)
+            append_row_to_columns(columns, rows_count, event)
+            rows_count += 1
+
+        trace.clear()
+        while trace.getprevious() is not None:
+            del trace.getparent()[0]
+
+    df = DataFrame(columns)
+    categorical_columns = get_low_cardinality_columns(df)
+    df[categorical_columns] = df[categorical_columns].astype("category")
     return df
 
 
+def get_xes_attributes(element: _Element) -> dict[str, str | None]:
+    # Get the attributes of the xes event
+    result = {}
+    for child in element:
+        tag = get_local_tag(child)
+        if tag in config.XES_ATTRIBUTE_TYPES:
+            result[child.get("key")] = get_xes_attribute_value(child, tag)
+    return result
+
+
+def get_local_tag(element: _Element) -> str:
+    # Get the tag of the element without the namespace
+    tag = element.tag
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def get_xes_attribute_value(element: _Element, tag: str) -> str | None:
+    # Get the value of the xes attribute, only string values may contain surrounding whitespaces
+    value = element.get("value")
+    if value is not None and tag == "string":
+        return value.strip()
+    return value
+
+
+def append_row_to_columns(columns: dict[str, list[str | None]], rows_count: int, row: dict[str, str | None]) -> None:
+    # Append a row to the columns, missing values of the row or of the previous rows are filled with None
+    for key, value in row.items():
+        if key not in columns:
+            columns[key] = [None] * rows_count
+        columns[key].append(value)
+    for key, values in columns.items():
+        if len(values) == rows_count:
+            values.append(None)
+
+
+def get_dataframe_from_csv(file: str | BinaryIO, separator: str) -> DataFrame:
+    # Get dataframe from csv file or stream, parse it chunk by chunk. Each parsed chunk is written to a temporary
+    # parquet file and dropped, so only one chunk of strings is held while parsing. The dataframe is read back from
+    # the file at the end, the categories of the row groups are unified by arrow
+    temp_path = get_new_path(base_path=f"{path.TEMP_PATH}/", suffix=".parquet")
+    writer = None
+
+    try:
+        with read_csv(file, sep=separator, dtype=str, chunksize=config.CSV_CHUNK_ROWS) as reader:
+            for chunk in reader:
+                chunk = get_stripped_dataframe(chunk)
+                if writer is None:
+                    categorical_columns = get_low_cardinality_columns(chunk)
+                    writer = ParquetWriter(temp_path, get_chunk_schema(chunk.columns, categorical_columns))
+                writer.write_table(Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+        writer.close()
+        writer = None
+        return get_dataframe_from_parquet(temp_path)
+    finally:
+        writer is not None and writer.close()
+        delete_file(temp_path)
+
+
+def get_stripped_dataframe(df: DataFrame) -> DataFrame:
+    # Strip the whitespaces of all string columns
+    for column in df.columns:
+        df[column] = df[column].str.strip()
+    return df
+
+
+def get_low_cardinality_columns(df: DataFrame) -> list[str]:
+    # Get the columns with few unique values, only the columns inferred by name as activity, resource or transition
+    # are candidates. Case ids and timestamps may repeat a lot in the first rows, but they must stay strings
+    max_unique = int(df.shape[0] * config.CATEGORICAL_MAX_UNIQUE_RATIO)
+    return [column for column in df.columns
+            if get_inferred_definition_by_name(str(column)) in config.CATEGORICAL_COLUMN_DEFINITIONS
+            and df[column].nunique() <= max_unique]
+
+
+def get_chunk_schema(columns: list[str], categorical_columns: list[str]) -> Schema:
+    # Get the arrow schema of the csv chunks, the categorical columns are stored as dictionaries
+    return schema([
+        field(str(column), dictionary(int32(), string()) if column in categorical_columns else string())
+        for column in columns
+    ])
+
+
 def get_dataframe_from_compressed_file(file_path: str, separator: str) -> DataFrame | None:
     # Get dataframe from compressed file
     try:
@@ -62,46 +183,66 @@ def get_dataframe_from_compressed_file(file_path: str, separator: str) -> DataFr
 
 
 def get_result_dataframe_from_compressed_file(file: ZipFile | GzipFile, separator: str) -> DataFrame | None:
+    # Get dataframe by parsing the decompression stream directly, nothing is extracted to the disk
     result = None
-    temp_path = ""
 
-    try:
-        if isinstance(file, ZipFile):
-            name_list = file.namelist()
-        elif isinstance(file, GzipFile):
-            if file.read(10).startswith(b"<?xml"):
-                name_list = ["file.xes"]
-            else:
-                name_list = ["file.csv"]
-            file.seek(0)
+    if isinstance(file, ZipFile):
+        name_list = file.namelist()
+    elif isinstance(file, GzipFile):
+        if file.read(10).startswith(b"<?xml"):
+            name_list = ["file.xes"]
         else:
-            raise ValueError(ErrorType.EVENT_LOG_BAD_ZIP)
+            name_list = ["file.csv"]
+        file.seek(0)
+    else:
+        raise ValueError(ErrorType.EVENT_LOG_BAD_ZIP)
 
-        filtered_name_list = [name for name in name_list if name not in path.EXCLUDED_EXTRACTED_FILE_NAMES]
+    filtered_name_list = [name for name in name_list if name not in path.EXCLUDED_EXTRACTED_FILE_NAMES]
 
-        if len(filtered_name_list) != 1:
-            raise HTTPException(status_code=400, detail="Zip file should contain only one file")
+    if len(filtered_name_list) != 1:
+        raise HTTPException(status_code=400, detail="Zip file should contain only one file")
 
-        filename = filtered_name_list[0]
-        extension = get_extension(filename)
+    filename = filtered_name_list[0]
+    extension = get_extension(filename)
 
-        if extension not in path.ALLOWED_EXTRACTED_EXTENSIONS:
-            raise HTTPException(status_code=400, detail="Zip file should contain only xes or csv file")
+    if extension not in path.ALLOWED_EXTRACTED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Zip file should contain only xes or csv file")
 
-        temp_path = get_new_path(base_path=f"{path.TEMP_PATH}/", suffix=f".{extension}")
+    if extension == "xes":
+        try:
+            with get_decompressed_stream(file, filename) as stream:
+                result = get_dataframe_from_xes_stream(stream)
+        except XMLSyntaxError as e:
+            logger.warning(f"Stream compressed xes file error, use pm4py instead: {e}")
+            result = get_dataframe_from_compressed_xes_with_pm4py(file, filename)
+    elif extension == "csv":
+        with get_decompressed_stream(file, filename) as stream:
+            result = get_dataframe_from_csv(stream, separator)
+
+    return result
+
+
+def get_decompressed_stream(file: ZipFile | GzipFile, filename: str) -> ContextManager[BinaryIO]:
+    # Get the decompression stream of the only file in the compressed file
+    if isinstance(file, ZipFile):
+        return file.open(filename)
+
+    # The gzip file is rewound, the stream is closed together with the gzip file
+    file.seek(0)
+    return nullcontext(file)
 
-        with open(temp_path, "wb") as f:
-            f.write(file.read(filename) if isinstance(file, ZipFile) else file.read())
 
-        if extension == "xes":
-            result = get_dataframe_from_xes(temp_path)
-        elif extension == "csv":
-            result = get_dataframe_from_csv(temp_path, separator)
+def get_dataframe_from_compressed_xes_with_pm4py(file: ZipFile | GzipFile, filename: str) -> DataFrame:
+    # Get dataframe from compressed xes file with pm4py, which can only read files from the disk
+    temp_path = get_new_path(base_path=f"{path.TEMP_PATH}/", suffix=".xes")
+
+    try:
+        with get_decompressed_stream(file, filename) as stream, open(temp_path, "wb") as f:
+            copyfileobj(stream, f, config.UPLOAD_CHUNK_SIZE)
+        return get_dataframe_from_xes_with_pm4py(temp_path)
     finally:
         delete_file(temp_path)
 
-    return result
-
 
 def detect_file_type(file_path: str) -> str:
     with open(file_path, "rb") as file:
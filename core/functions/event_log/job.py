@@ -1,5 +1,4 @@
 import logging
-from time import sleep
 
 from sklearn.model_selection import GroupShuffleSplit
 from sqlalchemy.orm import Session
@@ -12,18 +11,20 @@ import core.models.event_log as event_log_model
 import core.schemas.definition as definition_schema
 import core.schemas.plugin as plugin_schema
 import core.schemas.request.event_log as event_log_request
-from core.confs import path
+from core.confs import config, path
 from core.enums.definition import ColumnDefinition
 from core.enums.status import PluginStatus
+from core.functions.common.dataset import get_decategorized_dataframe
 from core.functions.common.decorator import threaded
-from core.functions.common.file import delete_file, get_new_path, get_dataframe_from_pickle
+from core.functions.common.file import (delete_file, get_dataframe_from_shared_file, get_new_path,
+                                       save_dataframe_by_name, save_dataframe_to_shared_file)
 from core.functions.definition.util import get_defined_column_name
 from core.functions.event_log.df import get_dataframe, get_dataframe_by_id_or_name
 from core.functions.event_log.validation import validate_columns_definition, validate_case_attributes
+from core.functions.message.rpc import wait_for_reply
 from core.functions.message.sender import send_training_data_to_all_plugins, send_process_request
 from core.functions.plugin.util import get_parameters_for_plugin, enhance_additional_infos
 from core.functions.project.streaming import disable_streaming
-from core.starters import memory
 from core.starters.database import SessionLocal
 
 # Enable logging
@@ -130,7 +131,7 @@ def pre_process_data(event_log_id: int, df_name: str, definition: definition_sch
 
     try:
         # Split dataframe
-        df = get_dataframe_by_id_or_name(event_log_id, df_name)
+        df = get_decategorized_dataframe(get_dataframe_by_id_or_name(event_log_id, df_name))
         case_id_column_name = get_defined_column_name(definition.columns_definition, ColumnDefinition.CASE_ID)
         splitter = GroupShuffleSplit(test_size=0.2, n_splits=1, random_state=42)
         split = splitter.split(df, groups=df[case_id_column_name])
@@ -139,28 +140,23 @@ def pre_process_data(event_log_id: int, df_name: str, definition: definition_sch
         simulation_df = df.iloc[simulation_indices]
 
         # Get processed dataframe for training
-        temp_path = get_new_path(base_path=f"{path.TEMP_PATH}/", suffix=".pkl")
-        training_df.to_pickle(temp_path)
-        request_key = send_process_request(temp_path.split("/")[-1], definition)
-        while not memory.pending_dfs[request_key]["finished"]:
-            sleep(1)
-        processed_df_path = f"{path.TEMP_PATH}/{memory.pending_dfs[request_key].get('processed_df')}"
-        processed_df = get_dataframe_from_pickle(processed_df_path)
+        temp_path = save_dataframe_to_shared_file(f"{path.TEMP_PATH}/", training_df)
+        correlation_id, reply = send_process_request(temp_path.split("/")[-1], definition)
+        process_result = wait_for_reply(correlation_id, reply, config.PROCESS_REQUEST_TIMEOUT)
+        processed_df_path = f"{path.TEMP_PATH}/{process_result.get('processed_df')}"
+        processed_df = get_dataframe_from_shared_file(processed_df_path)
         delete_file(processed_df_path)
-        memory.pending_dfs.pop(request_key)
         if processed_df is None:
             raise FileNotFoundError("Processed dataframe not found")
 
         # Save the data
-        training_df_path = get_new_path(base_path=f"{path.EVENT_LOG_TRAINING_DF_PATH}/", suffix=".pkl")
-        processed_df.to_pickle(training_df_path)
-        training_csv_path = training_df_path.replace(".pkl", ".csv")
-        processed_df.to_csv(training_csv_path, index=False)
+        training_df_path = get_new_path(base_path=f"{path.EVENT_LOG_TRAINING_DF_PATH}/", suffix=".parquet")
+        training_df_name = training_df_path.split("/")[-1].split(".")[0]
+        save_dataframe_by_name(path.EVENT_LOG_TRAINING_DF_PATH, training_df_name, processed_df)
         simulation_df_path = get_new_path(base_path=f"{path.EVENT_LOG_SIMULATION_DF_PATH}/", suffix=".pkl")
         simulation_df.to_pickle(simulation_df_path)
 
         # Update the database
-        training_df_name = training_df_path.split("/")[-1].split(".")[0]
         simulation_df_name = simulation_df_path.split("/")[-1]
         with SessionLocal() as db:
             event_log_crud.set_datasets_name(db, event_log_id, training_df_name, simulation_df_name)
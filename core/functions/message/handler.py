@@ -1,92 +1,147 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
-from threading import Event
-from time import sleep
+from typing import Any, AsyncContextManager, Hashable
 
-from pika import URLParameters
-from pika.adapters.blocking_connection import BlockingChannel
-from pika.exceptions import ConnectionClosedByBroker
-from pika.spec import Basic, BasicProperties
+from aio_pika import connect_robust
+from aio_pika.abc import AbstractIncomingMessage
+from aio_pika.exceptions import AMQPConnectionError
 from sqlalchemy.orm import Session
 
 import core.crud.event as event_crud
 import core.crud.plugin as plugin_crud
 import core.crud.project as project_crud
+import core.schemas.definition as definition_schema
+from core.confs import config, path
 from core.starters.database import SessionLocal
 from core.enums.message import MessageType
 from core.enums.status import PluginStatus, ProjectStatus
+from core.functions.common.file import delete_file
+from core.functions.event.job import resend_prefix
+from core.functions.message import rpc
 from core.functions.message.sender import send_online_inquires
-from core.functions.message.util import get_connection, get_data_from_body
-from core.functions.plugin.util import is_plugin_active
-from core.functions.project.streaming import enable_streaming, check_simulation
+from core.functions.message.util import get_data_from_body
+from core.functions.plugin.util import enhance_additional_info, is_plugin_active
+from core.functions.project.streaming import (enable_streaming, check_simulation, get_streaming_plugins,
+                                             publish_prescribed_event)
 from core.functions.project.util import get_project_status
 from core.starters import memory
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
-# Set events for consuming
-stop_consuming = Event()
-consuming_stopped = Event()
+# Executor running the handlers, its size bounds the database sessions used by messages
+executor = ThreadPoolExecutor(max_workers=config.CONSUMER_WORKERS, thread_name_prefix="message-handler")
 
 
-def start_consuming(parameters: URLParameters, queue: str, callback_function: callable,
-                    prefetch_count: int = 0) -> None:
-    connection = get_connection(parameters)
+async def start_consuming(url: str, queue: str, prefetch_count: int) -> None:
+    # Consume the messages in the event loop, up to prefetch_count messages are handled concurrently
+    delay = config.RABBITMQ_RETRY_DELAY_MIN
+    while True:
+        try:
+            memory.consumer_connection = await connect_robust(url)
+            break
+        except AMQPConnectionError:
+            logger.warning(f"Connection to RabbitMQ failed. Trying again in {delay} seconds...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, config.RABBITMQ_RETRY_DELAY_MAX)
     logger.warning("Connection to RabbitMQ established")
-    channel = connection.channel()
-    channel.queue_declare(queue=queue)
-    prefetch_count and channel.basic_qos(prefetch_count=prefetch_count)
-    channel.basic_consume(queue=queue, on_message_callback=callback_function)
-    send_online_inquires()
+    channel = await memory.consumer_connection.channel()
+    await channel.set_qos(prefetch_count=prefetch_count)
+    declared_queue = await channel.declare_queue(queue)
+    await declared_queue.consume(on_message)
+    reply_queue = await channel.declare_queue(config.RPC_REPLY_QUEUE)
+    await reply_queue.consume(on_reply)
+    await asyncio.get_running_loop().run_in_executor(executor, send_online_inquires)
 
-    while not stop_consuming.is_set():
-        try:
-            connection.process_data_events()
-        except ConnectionClosedByBroker:
-            logger.warning("Connection to RabbitMQ closed by broker. Trying again in 5 seconds...")
-            sleep(5)
-            return start_consuming(parameters, queue, callback_function, prefetch_count)
-        sleep(0.1)
 
-    channel.stop_consuming()
-    connection.close()
-    consuming_stopped.set()
+async def stop_consuming() -> None:
+    # Close the connection, then wait for the running handlers without blocking the event loop
+    if memory.consumer_connection is not None:
+        await memory.consumer_connection.close()
+        memory.consumer_connection = None
+    await asyncio.get_running_loop().run_in_executor(None, executor.shutdown, True)
 
 
-def callback(ch: BlockingChannel, method: Basic.Deliver, properties: BasicProperties, body: bytes) -> None:
-    message_type, data = get_data_from_body(body)
-    print(message_type, properties.message_id, data)
+async def on_message(message: AbstractIncomingMessage) -> None:
+    # Handle the message in the executor, messages with the same ordering key are handled one by one
+    message_type, data = get_data_from_body(message.body, message)
+    print(message_type, message.message_id, data)
     print("-" * 24)
 
     try:
-        message_id = properties.message_id
-        if memory.processed_messages.get(message_id):
+        message_id = message.message_id
+        if not memory.processed_messages.add(message_id):
             return
-        else:
-            memory.processed_messages[message_id] = datetime.now()
-        if message_type == MessageType.ONLINE_REPORT:
-            handle_online_report(data)
-        elif message_type == MessageType.DATA_REPORT:
-            handle_data_report(data)
-        elif message_type == MessageType.ERROR_REPORT:
-            handle_error_report(data)
-        elif message_type == MessageType.TRAINING_START:
-            handle_training_start(data)
-        elif message_type == MessageType.MODEL_NAME:
-            handle_model_name(data)
-        elif message_type == MessageType.DATASET_PRESCRIPTION_RESULT:
-            handle_dataset_prescription_result(data)
-        elif message_type == MessageType.STREAMING_READY:
-            handle_streaming_ready(data)
-        elif message_type == MessageType.STREAMING_PRESCRIPTION_RESULT:
-            handle_streaming_prescription_result(data)
-        elif message_type == MessageType.PROCESS_RESULT:
-            handle_process_result(data)
+        async with get_message_lock(get_ordering_key(message_type, data)):
+            await asyncio.get_running_loop().run_in_executor(executor, callback, message_type, data)
     except Exception as e:
         logger.error(f"Error while handling message {message_type}: {e}", exc_info=True)
     finally:
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        await message.ack()
+
+
+async def on_reply(message: AbstractIncomingMessage) -> None:
+    # Resolve the request waiting for the reply
+    message_type, data = get_data_from_body(message.body, message)
+    logger.debug(f"Received reply {message_type} of request {message.correlation_id}")
+
+    try:
+        if message_type == MessageType.PROCESS_RESULT:
+            handle_process_result(message.correlation_id, data)
+    except Exception as e:
+        logger.error(f"Error while handling reply {message_type}: {e}", exc_info=True)
+    finally:
+        await message.ack()
+
+
+def get_ordering_key(message_type: str, data: Any) -> Hashable:
+    # Get the key of the messages that must keep their order, None if the message can be handled at any time
+    if message_type == MessageType.STREAMING_PRESCRIPTION_RESULT:
+        # Results of the same event update the same prescriptions
+        return "event", data["event_id"]
+    elif message_type == MessageType.DATASET_PRESCRIPTION_RESULT:
+        # Results of the same ongoing dataset update the same results in memory
+        return "result", data["result_key"]
+    elif message_type in {MessageType.DATA_REPORT, MessageType.ERROR_REPORT, MessageType.TRAINING_START,
+                          MessageType.MODEL_NAME, MessageType.STREAMING_READY}:
+        # Status changes of the plugins decide the status of their project
+        return "project", data["project_id"]
+    return None
+
+
+def get_message_lock(key: Hashable) -> AsyncContextManager:
+    # Get the lock of the ordering key, the lock is dropped once no message holds it
+    if key is None:
+        return nullcontext()
+    lock = memory.message_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        memory.message_locks[key] = lock
+    return lock
+
+
+def callback(message_type: str, data: Any) -> None:
+    if message_type == MessageType.ONLINE_REPORT:
+        handle_online_report(data)
+    elif message_type == MessageType.DATA_REPORT:
+        handle_data_report(data)
+    elif message_type == MessageType.ERROR_REPORT:
+        handle_error_report(data)
+    elif message_type == MessageType.TRAINING_START:
+        handle_training_start(data)
+    elif message_type == MessageType.MODEL_NAME:
+        handle_model_name(data)
+    elif message_type == MessageType.DATASET_PRESCRIPTION_RESULT:
+        handle_dataset_prescription_result(data)
+    elif message_type == MessageType.STREAMING_READY:
+        handle_streaming_ready(data)
+    elif message_type == MessageType.STREAMING_PRESCRIPTION_RESULT:
+        handle_streaming_prescription_result(data)
+    elif message_type == MessageType.STREAMING_GAP:
+        handle_streaming_gap(data)
 
 
 def handle_online_report(data: dict) -> None:
@@ -132,6 +187,7 @@ def handle_error_report(data: dict) -> None:
         if not plugin:
             return
         plugin_crud.set_plugin_error(db, plugin, detail)
+        memory.streaming_plugins.get(project_id, set()).discard(plugin.key)
         update_project_status(db, project_id)
 
 
@@ -189,32 +245,70 @@ def handle_streaming_prescription_result(data: dict) -> None:
     plugin_key = data["plugin_key"]
     event_id = data["event_id"]
     result = data["data"]
+    with SessionLocal() as db:
+        plugin_keys = get_streaming_plugins(db, project_id)
+        if plugin_keys is None:
+            logger.warning(f"Drop the result of plugin {plugin_key} for event {event_id}, "
+                           f"project {project_id} is not streaming")
+            return
+        # The event is prescribed once all the active plugins have finished
+        prescribed = event_crud.add_prescription(
+            db=db,
+            event_id=event_id,
+            plugin_key=plugin_key,
+            prescription=result,
+            plugin_keys=[key for key in list(plugin_keys) if is_plugin_active(key)]
+        )
+        if prescribed:
+            publish_prescribed_event(project_id, event_id)
+        # Check if the simulation is finished
+        streaming_project = memory.streaming_projects.get(project_id)
+        if not streaming_project or streaming_project["finished"].is_set():
+            db_project = project_crud.get_project_by_id(db, project_id)
+            db_project and check_simulation(db, db_project)
+
+
+def handle_streaming_gap(data: dict) -> None:
+    project_id = data["project_id"]
+    plugin_key = data["plugin_key"]
+    event_id = data["event_id"]
     with SessionLocal() as db:
         db_project = project_crud.get_project_by_id(db, project_id)
         if not db_project or db_project.status not in {ProjectStatus.STREAMING, ProjectStatus.SIMULATING}:
             return
+        plugin = next((plugin for plugin in db_project.plugins if plugin.key == plugin_key), None)
         event = event_crud.get_event_by_id(db, event_id)
-        if not event:
+        if not plugin or not event:
             return
-        event = event_crud.add_prescription(db, event, plugin_key, result)
-        # Check if all plugins have finished
-        if all([event.prescriptions.get(plugin.key) for plugin in db_project.plugins
-                if is_plugin_active(plugin.key) and plugin.status == PluginStatus.STREAMING]):
-            event_crud.mark_as_prescribed(db, event)
-        # Check if the simulation is finished
-        check_simulation(db, db_project)
+        # The plugin may have lost the column dictionary as well
+        memory.streaming_columns.pop((plugin_key, project_id), None)
+        db_definition = db_project.event_log.definition
+        additional_info = enhance_additional_info(
+            additional_info=dict(plugin.additional_info or {}),
+            plugin_info=memory.available_plugins.get(plugin_key, {}),
+            definition=definition_schema.Definition.from_orm(db_definition).dict()
+        )
+        # The prefix of the event is made of the events of the case which arrived until the event
+        resend_prefix(
+            project_id=project_id,
+            plugin_key=plugin_key,
+            model_name=plugin.model_name,
+            event_id=event_id,
+            case_id=event.case_id,
+            columns_definition=db_definition.columns_definition,
+            case_attributes=db_definition.case_attributes,
+            events=[case_event.attributes for case_event in sorted(event.case.events, key=lambda e: e.id)
+                    if case_event.id <= event_id],
+            additional_info=additional_info
+        )
 
 
-def handle_process_result(data: dict) -> None:
-    request_key = data["request_key"]
-    df_name = data["df_name"]
-    processed_df = data.get("processed_df")
-    if request_key not in memory.pending_dfs:
-        return
-    if df_name != memory.pending_dfs[request_key]["df_name"]:
+def handle_process_result(correlation_id: str, data: dict) -> None:
+    if rpc.resolve(correlation_id, data):
         return
-    memory.pending_dfs[request_key]["processed_df"] = processed_df
-    memory.pending_dfs[request_key]["finished"] = True
+    # Nobody waits for the result anymore, so the processed dataframe is removed
+    processed_df = data.get("processed_df")
+    processed_df and delete_file(f"{path.TEMP_PATH}/{processed_df}")
 
 
 def update_project_status(db: Session, project_id: int) -> None:
@@ -0,0 +1,57 @@
+import logging
+from concurrent.futures import Future, TimeoutError
+from typing import Any
+
+from core.confs import config
+from core.enums.message import MessageType
+from core.functions.common.etc import get_message_id
+from core.functions.message.util import send_message
+from core.starters import memory
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+
+def call(receiver_id: str, message_type: MessageType, data: dict) -> tuple[str, Future]:
+    # Send a request with a correlation id, the future is resolved by the reply sent to the reply queue
+    correlation_id = get_message_id()
+    future = Future()
+    memory.rpc_requests[correlation_id] = future
+    sent = send_message(
+        receiver_id=receiver_id,
+        message_type=message_type,
+        data=data,
+        reply_to=config.RPC_REPLY_QUEUE,
+        correlation_id=correlation_id
+    )
+    if not sent:
+        memory.rpc_requests.pop(correlation_id, None)
+        future.set_exception(ConnectionError(f"Sending {message_type} to {receiver_id} failed"))
+    return correlation_id, future
+
+
+def wait_for_reply(correlation_id: str, future: Future, timeout: float) -> Any:
+    # Wait for the reply of the request, the request is cancelled if the reply does not arrive in time
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        logger.warning(f"Request {correlation_id} timed out after {timeout} seconds")
+        cancel(correlation_id)
+        raise
+    finally:
+        memory.rpc_requests.pop(correlation_id, None)
+
+
+def cancel(correlation_id: str) -> bool:
+    # Cancel the request, its late reply is dropped
+    future = memory.rpc_requests.pop(correlation_id, None)
+    return future is not None and future.cancel()
+
+
+def resolve(correlation_id: str, data: Any) -> bool:
+    # Resolve the request by its reply, return False if nobody waits for the reply anymore
+    future = memory.rpc_requests.pop(correlation_id, None)
+    if future is None or not future.set_running_or_notify_cancel():
+        return False
+    future.set_result(data)
+    return True
@@ -1,12 +1,13 @@
 import logging
+from concurrent.futures import Future
 from datetime import datetime
 from typing import Any
 
 import core.schemas.definition as definition_schema
 from core.confs import config
 from core.enums.message import MessageType
-from core.functions.common.etc import random_str
-from core.functions.message.util import send_message
+from core.functions.message import rpc
+from core.functions.message.util import get_peer_session, send_message
 from core.starters import memory
 
 # Enable logging
@@ -73,41 +74,75 @@ def send_dataset_prescription_request(plugin_key: str, project_id: int, model_na
 
 
 def send_streaming_prepare_to_all_plugins(plugins: dict[str, int], project_id: int, model_names: dict[int, str],
-                                          additional_infos: dict[str, dict[str, Any]]) -> bool:
+                                          additional_infos: dict[str, dict[str, Any]], columns: list[str]) -> bool:
     # Send streaming prepare to all plugins
     return all(send_streaming_prepare(plugin_key, project_id, model_names[plugins[plugin_key]],
-                                      additional_infos.get(plugin_key, {}))
+                                      additional_infos.get(plugin_key, {}), columns)
                for plugin_key in plugins)
 
 
-def send_streaming_prepare(plugin_key: str, project_id: int, model_name: str, additional_info: dict[str, Any]) -> bool:
-    # Send streaming prepare to a specific plugin
-    return send_message(plugin_key, MessageType.STREAMING_PREPARE, {
+def send_streaming_prepare(plugin_key: str, project_id: int, model_name: str, additional_info: dict[str, Any],
+                           columns: list[str]) -> bool:
+    # Send streaming prepare to a specific plugin, with the column dictionary of the following prefixes
+    session = get_peer_session(plugin_key)
+    result = send_message(plugin_key, MessageType.STREAMING_PREPARE, {
         "project_id": project_id,
         "model_name": model_name,
-        "additional_info": additional_info
+        "additional_info": additional_info,
+        "columns": columns
     })
+    if result and session:
+        memory.streaming_columns[(plugin_key, project_id)] = session
+    return result
 
 
 def send_streaming_prescription_request_to_all_plugins(plugins: list[str], project_id: int, model_names: dict[str, str],
-                                                       event_id: int, prefix: list[dict],
+                                                       event_id: int, case_id: int, prefix: list[dict], appended: bool,
+                                                       columns: list[str],
                                                        additional_infos: dict[str, dict[str, Any]]) -> bool:
     # Send prescription request to all plugins
-    return all(send_streaming_prescription_request(plugin_key, project_id, model_names[plugin_key], event_id, prefix,
-                                                   additional_infos.get(plugin_key, {}))
+    return all(send_streaming_prescription_request(plugin_key, project_id, model_names[plugin_key], event_id, case_id,
+                                                   prefix, appended, columns, additional_infos.get(plugin_key, {}))
                for plugin_key in plugins)
 
 
 def send_streaming_prescription_request(plugin_key: str, project_id: int, model_name: str, event_id: int,
-                                        prefix: list[dict], additional_info: dict[str, Any]) -> bool:
-    # Send prescription request to a specific plugin
-    return send_message(plugin_key, MessageType.STREAMING_PRESCRIPTION_REQUEST, {
+                                        case_id: int, prefix: list[dict], appended: bool, columns: list[str],
+                                        additional_info: dict[str, Any]) -> bool:
+    # Send prescription request to a specific plugin, the sequence is the length of the prefix
+    data = {
         "project_id": project_id,
         "model_name": model_name,
         "event_id": event_id,
-        "data": prefix,
+        "case_id": case_id,
+        "sequence": len(prefix),
         "additional_info": additional_info
-    })
+    }
+    data.update(get_prefix_data(plugin_key, project_id, prefix, appended, columns))
+    result = send_message(plugin_key, MessageType.STREAMING_PRESCRIPTION_REQUEST, data)
+    if result and "columns" in data:
+        memory.streaming_columns[(plugin_key, project_id)] = get_peer_session(plugin_key)
+    return result
+
+
+def get_prefix_data(plugin_key: str, project_id: int, prefix: list[dict], appended: bool,
+                    columns: list[str]) -> dict[str, Any]:
+    # Get the prefix part of the request. Plugins which announced a session keep the prefixes of the cases, so they
+    # only get the appended event, and they get the values by the column dictionary, which is sent again if the plugin
+    # has restarted since it got it. Plugins which did not announce a session get the whole named prefix
+    session = get_peer_session(plugin_key)
+    if session is None:
+        return {"data": prefix}
+
+    elements = prefix[-1:] if appended else prefix
+    if any(element.keys() != set(columns) for element in elements):
+        return {"event": elements[0]} if appended else {"data": prefix}
+
+    rows = [[element[column] for column in columns] for element in elements]
+    result = {"row": rows[0]} if appended else {"rows": rows}
+    if memory.streaming_columns.get((plugin_key, project_id)) != session:
+        result["columns"] = columns
+    return result
 
 
 def send_streaming_stop_to_all_plugins(plugins: list[str], project_id: int) -> bool:
@@ -116,33 +151,24 @@ def send_streaming_stop_to_all_plugins(plugins: list[str], project_id: int) -> b
 
 
 def send_streaming_stop(plugin_key: str, project_id: int) -> bool:
-    # Send streaming stop to a specific plugin
+    # Send streaming stop to a specific plugin, the plugin forgets the column dictionary of the project
+    memory.streaming_columns.pop((plugin_key, project_id), None)
     return send_message(plugin_key, MessageType.STREAMING_STOP, {
         "project_id": project_id
     })
 
 
-def send_process_request(df_name: str, definition: definition_schema.Definition) -> str:
-    # Send process request to the data processor
-    request_key = random_str(8)
-    while request_key in list(memory.pending_dfs):
-        request_key = random_str(8)
-    memory.pending_dfs[request_key] = {
-        "date": datetime.now(),
-        "df_name": df_name,
-        "finished": False
-    }
+def send_process_request(df_name: str, definition: definition_schema.Definition) -> tuple[str, Future]:
+    # Send process request to the data processor, the future is resolved by the process result
     definition = definition.dict()
     for key, value in definition.items():
         if isinstance(value, datetime):
             definition[key] = value.isoformat()
-    send_message(
+    return rpc.call(
         receiver_id="processor",
         message_type=MessageType.PROCESS_REQUEST,
         data={
-            "request_key": request_key,
             "df_name": df_name,
             "definition": definition
         }
     )
-    return request_key
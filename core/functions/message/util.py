@@ -1,50 +1,161 @@
 import logging
 import json
+import os
 from datetime import datetime
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore, Lock
 from time import sleep
-from typing import Any, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from pika import BasicProperties, BlockingConnection, URLParameters
 from pika.adapters.blocking_connection import BlockingChannel
-from pika.exceptions import AMQPConnectionError
+from pika.exceptions import AMQPConnectionError, ChannelClosed, ChannelWrongStateError
 
+from core.confs import config
 from core.enums.message import MessageType
-from core.functions.common.etc import get_message_id
+from core.functions.common.etc import get_message_id, random_str
 from core.starters.rabbitmq import parameters
 
+try:
+    import msgpack
+except ImportError:
+    # Services without msgpack keep sending and receiving JSON
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Enable logging
 logger = logging.getLogger(__name__)
 
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+ZSTD_CONTENT_ENCODING = "zstd"
+
+# Codecs this process decodes, announced in the headers of every message
+codecs = [c for c in config.MESSAGE_CODECS if {"msgpack": msgpack, "zstd": zstandard}.get(c) is not None]
+
+# Id of this process, a new one tells the peers that the state they sent before is lost
+session_id = random_str(16)
+
+# Codecs and sessions announced by the peers, peers which never announced them are sent JSON
+peers: Dict[str, Dict[str, Any]] = {}
+
 
 def get_connection(url_parameters: URLParameters) -> BlockingConnection:
+    delay = config.RABBITMQ_RETRY_DELAY_MIN
     while True:
         try:
             return BlockingConnection(url_parameters)
         except AMQPConnectionError:
-            logger.warning("Connection to RabbitMQ failed. Trying again in 5 seconds...")
-            sleep(5)
+            logger.warning(f"Connection to RabbitMQ failed. Trying again in {delay} seconds...")
+            sleep(delay)
+            delay = min(delay * 2, config.RABBITMQ_RETRY_DELAY_MAX)
+
+
+class Publisher:
+    # Thread-safe publisher keeping a pool of persistent channels, so a message does not pay for a new connection
+    def __init__(self, url_parameters: URLParameters, pool_size: int, confirms: bool):
+        self.url_parameters = url_parameters
+        self.confirms = confirms
+        self._pool_size = pool_size
+        self._idle: "LifoQueue[Tuple[BlockingConnection, BlockingChannel]]" = LifoQueue()
+        self._slots = BoundedSemaphore(pool_size)
+        self._declared_queues: Set[str] = set()
+        self._lock = Lock()
+        self._pid = os.getpid()
+
+    def publish(self, routing_key: str, body: bytes, properties: BasicProperties) -> None:
+        # Publish the message by a pooled channel, a broken channel is replaced once before giving up
+        self.check_process()
+        with self._slots:
+            connection, channel = self.get_channel()
+            try:
+                self.publish_by_channel(connection, channel, routing_key, body, properties)
+            except (AMQPConnectionError, ChannelClosed, ChannelWrongStateError) as e:
+                logger.warning(f"Pooled channel to RabbitMQ is broken, publishing by a new one: {e}")
+                self.close(connection)
+                with self._lock:
+                    self._declared_queues.clear()
+                connection, channel = self.get_new_channel()
+                self.publish_by_channel(connection, channel, routing_key, body, properties)
+            finally:
+                if channel.is_open:
+                    self._idle.put((connection, channel))
+                else:
+                    self.close(connection)
+
+    def publish_by_channel(self, connection: BlockingConnection, channel: BlockingChannel, routing_key: str,
+                           body: bytes, properties: BasicProperties) -> None:
+        # Publish the message, the pending frames are read first so a connection closed by the broker is detected
+        connection.process_data_events(time_limit=0)
+        if routing_key not in self._declared_queues:
+            channel.queue_declare(queue=routing_key)
+            with self._lock:
+                self._declared_queues.add(routing_key)
+        channel.basic_publish(exchange="", routing_key=routing_key, body=body, properties=properties)
+
+    def get_channel(self) -> Tuple[BlockingConnection, BlockingChannel]:
+        # Get an idle channel of the pool, or open a new one
+        while True:
+            try:
+                connection, channel = self._idle.get_nowait()
+            except Empty:
+                return self.get_new_channel()
+            if channel.is_open:
+                return connection, channel
+            self.close(connection)
+
+    def get_new_channel(self) -> Tuple[BlockingConnection, BlockingChannel]:
+        # Open a new connection with its channel
+        connection = get_connection(self.url_parameters)
+        channel = connection.channel()
+        self.confirms and channel.confirm_delivery()
+        return connection, channel
+
+    def check_process(self) -> None:
+        # Forget the channels inherited by a forked process, the sockets belong to the parent process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle = LifoQueue()
+                self._slots = BoundedSemaphore(self._pool_size)
+                self._declared_queues = set()
+                self._pid = os.getpid()
+
+    @staticmethod
+    def close(connection: BlockingConnection) -> None:
+        # Close the connection, errors of a connection already lost are ignored
+        try:
+            connection.is_open and connection.close()
+        except Exception as e:
+            logger.debug(f"Closing connection to RabbitMQ failed: {e}")
+
+
+# Publisher shared by the threads of the process
+publisher = Publisher(parameters, config.PUBLISHER_POOL_SIZE, config.PUBLISHER_CONFIRMS)
 
 
-def send_message(receiver_id: str, message_type: MessageType, data: dict) -> bool:
+def send_message(receiver_id: str, message_type: MessageType, data: dict, reply_to: Optional[str] = None,
+                 correlation_id: Optional[str] = None) -> bool:
     # Send message to a specific receiver
     result = False
-    connection = None
 
     try:
-        connection = get_connection(parameters)
-        channel = connection.channel()
-        channel.queue_declare(queue=receiver_id)
-        channel.basic_publish(
-            exchange="",
+        body, codec_properties = get_message(receiver_id, message_type, data)
+        publisher.publish(
             routing_key=receiver_id,
-            body=get_body(message_type, data),
-            properties=BasicProperties(message_id=get_message_id())
+            body=body,
+            properties=BasicProperties(message_id=get_message_id(), reply_to=reply_to, correlation_id=correlation_id,
+                                       **codec_properties)
         )
         result = True
     except Exception as e:
         logger.warning(f"Error while sending message: {e}", exc_info=True)
-    finally:
-        connection and connection.close()
+
     return result
 
 
@@ -53,12 +164,13 @@ def send_message_by_channel(channel: BlockingChannel, receiver_id: str, message_
     result = False
 
     try:
+        body, codec_properties = get_message(receiver_id, message_type, data)
         channel.queue_declare(queue=receiver_id)
         channel.basic_publish(
             exchange="",
             routing_key=receiver_id,
-            body=get_body(message_type, data),
-            properties=BasicProperties(message_id=get_message_id())
+            body=body,
+            properties=BasicProperties(message_id=get_message_id(), **codec_properties)
         )
         result = True
     except Exception as e:
@@ -67,30 +179,88 @@ def send_message_by_channel(channel: BlockingChannel, receiver_id: str, message_
     return result
 
 
-def get_body(message_type: MessageType, data: dict) -> bytes:
+def get_message(receiver_id: str, message_type: MessageType, data: dict) -> Tuple[bytes, Dict[str, Any]]:
+    # Get the body encoded by the codecs the receiver announced, with the properties describing them
+    accepted = peers.get(receiver_id, {}).get("codecs", set())
+    content_type = MSGPACK_CONTENT_TYPE if "msgpack" in accepted and "msgpack" in codecs else JSON_CONTENT_TYPE
+    content_encoding = None
+    body = get_body(message_type, data, content_type)
+
+    if "zstd" in accepted and "zstd" in codecs and len(body) >= config.MESSAGE_COMPRESSION_THRESHOLD:
+        body = zstandard.ZstdCompressor(level=config.MESSAGE_COMPRESSION_LEVEL).compress(body)
+        content_encoding = ZSTD_CONTENT_ENCODING
+
+    return body, {
+        "content_type": content_type,
+        "content_encoding": content_encoding,
+        "app_id": config.APP_ID,
+        "headers": {"x-codecs": ",".join(codecs), "x-session": session_id}
+    }
+
+
+def get_body(message_type: MessageType, data: dict, content_type: str = JSON_CONTENT_TYPE) -> bytes:
     result = b""
 
     try:
         for key, value in data.items():
             if isinstance(value, datetime):
                 data[key] = value.isoformat()
-        result = json.dumps({
+        message = {
             "type": message_type,
             "data": data
-        }).encode("utf-8")
+        }
+        if content_type == MSGPACK_CONTENT_TYPE:
+            result = msgpack.packb(message)
+        else:
+            result = json.dumps(message).encode("utf-8")
     except Exception as e:
         logger.warning(f"Error while getting body: {e}", exc_info=True)
 
     return result
 
 
-def get_data_from_body(body: bytes) -> Tuple[str, Any]:
+def get_data_from_body(body: bytes, properties: Any = None) -> Tuple[str, Any]:
+    # Get the data decoded by the codecs in the properties, messages of old peers have no properties and are JSON
     result = ("", None)
 
     try:
-        decoded = json.loads(body.decode("utf-8"))
+        properties is not None and remember_peer(properties)
+        if getattr(properties, "content_encoding", None) == ZSTD_CONTENT_ENCODING:
+            body = zstandard.ZstdDecompressor().decompress(body)
+        if getattr(properties, "content_type", None) == MSGPACK_CONTENT_TYPE:
+            decoded = msgpack.unpackb(body, strict_map_key=False, object_pairs_hook=get_json_dict)
+        else:
+            decoded = json.loads(body.decode("utf-8"))
         result = (decoded["type"], decoded["data"])
     except Exception as e:
         logger.warning(f"Error while getting data from body: {e}", exc_info=True)
 
     return result
+
+
+def get_json_dict(pairs: List[Tuple[Any, Any]]) -> dict:
+    # Get the dict with the keys JSON would get, so the receivers do not depend on the codec
+    return {key if isinstance(key, str) else json.dumps(key): value for key, value in pairs}
+
+
+def remember_peer(properties: Any) -> None:
+    # Remember the codecs and the session announced by the sender, pika and aio-pika properties are both accepted
+    headers = getattr(properties, "headers", None) or {}
+    app_id = getattr(properties, "app_id", None)
+    session = get_header(headers, "x-session")
+    if not app_id or not session:
+        return
+    peers[app_id] = {
+        "codecs": set(c for c in get_header(headers, "x-codecs").split(",") if c),
+        "session": session
+    }
+
+
+def get_peer_session(peer_id: str) -> Optional[str]:
+    # Get the session of the peer, None if the peer never announced one
+    return peers.get(peer_id, {}).get("session")
+
+
+def get_header(headers: Dict[str, Any], key: str) -> str:
+    value = headers.get(key) or ""
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
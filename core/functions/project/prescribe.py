@@ -12,7 +12,7 @@ from core.enums.status import ProjectStatus, PluginStatus
 from core.functions.common.dataset import get_renamed_dataframe
 from core.functions.common.decorator import threaded
 from core.functions.common.etc import random_str
-from core.functions.common.file import delete_file, get_new_path
+from core.functions.common.file import delete_file, get_new_path, save_dataframe_by_name
 from core.functions.definition.util import get_defined_column_name
 from core.functions.plugin.util import enhance_additional_infos, get_active_plugins
 from core.functions.event_log.dataset import get_cases_result_skeleton, get_processed_dataframe_for_new_dataset
@@ -115,12 +115,10 @@ def process_ongoing_dataset(result_key: str) -> bool:
 
         # Get renamed df and save it to the temp path
         df = get_renamed_dataframe(df, columns_definition, case_attributes)
-        temp_path = get_new_path(f"{path.TEMP_PATH}/", suffix=".pkl")
-        df.to_pickle(temp_path)
-        temp_csv_path = temp_path.replace(".pkl", ".csv")
-        df.to_csv(temp_csv_path, index=False)
+        temp_path = get_new_path(f"{path.TEMP_PATH}/", suffix=".parquet")
         ongoing_df_name = temp_path.split("/")[-1].split(".")[0]
-        memory.ongoing_results[result_key]["ongoing_df_name"] = temp_path.split("/")[-1].split(".")[0]
+        save_dataframe_by_name(path.TEMP_PATH, ongoing_df_name, df)
+        memory.ongoing_results[result_key]["ongoing_df_name"] = ongoing_df_name
 
         # Send the dataset to the plugins
         send_dataset_prescription_request_to_all_plugins(plugins, project_id, model_names, result_key, ongoing_df_name,
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import json
+from collections import deque
 from datetime import datetime
 from multiprocessing import Event as ProcessEvent
 from multiprocessing.synchronize import Event as ProcessEventType
@@ -9,23 +10,25 @@ from fastapi import Request
 from sqlalchemy.orm import Session
 
 import core.crud.event as event_crud
+from core.confs import config
 from core.crud import project as project_crud, plugin as plugin_crud
 from core.enums.definition import ColumnDefinition
 from core.enums.status import ProjectStatus, PluginStatus
 from core.functions.common.etc import process_daemon
+from core.functions.event.job import remove_prefixes_of_project
 from core.functions.message.sender import send_streaming_stop_to_all_plugins
 from core.functions.plugin.util import get_active_plugins
 from core.models import project as project_model
 from core.schemas import definition as definition_schema
 from core.starters import memory
-from core.starters.database import engine
+from core.starters.database import AsyncSessionLocal, engine
 from simulator import run_simulation
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
 
-async def event_generator(request: Request, db: Session, project_id: int):
+async def event_generator(request: Request, project_id: int):
     try:
         yield {
             "event": "notification",
@@ -33,6 +36,8 @@ async def event_generator(request: Request, db: Session, project_id: int):
             "data": "CONNECTED"
         }
         i = 1
+        wakeup = subscribe(project_id)
+        await seed_prescribed_events(project_id)
         while True:
             if await request.is_disconnected():
                 break
@@ -44,17 +49,35 @@ async def event_generator(request: Request, db: Session, project_id: int):
                 }
                 logger.warning(f"Streaming of project {project_id} is finished, reading connection is closed")
                 break
-            data = get_data(db, project_id)
-            if data:
-                yield {
-                    "event": "message",
-                    "id": i,
-                    "data": json.dumps(data)
-                }
-                i += 1
-                event_ids = [event["id"] for event in data]
-                mark_as_sent(db, event_ids)
-            await asyncio.sleep(1)
+            wakeup.clear()
+            event_ids = take_prescribed_events(project_id)
+            if not event_ids:
+                # Wait for the next prescribed event, the timeout only bounds the checks above
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=1)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            delivered = False
+            try:
+                data = await get_data(event_ids)
+                if data:
+                    yield {
+                        "event": "message",
+                        "id": i,
+                        "data": json.dumps(data)
+                    }
+                    i += 1
+                delivered = data is not None
+                if delivered:
+                    await mark_as_sent(event_ids)
+            finally:
+                # The cursor only moves past the events once they are delivered
+                if not delivered:
+                    memory.streaming_backlogs[project_id].extendleft(reversed(event_ids))
+            if not delivered:
+                # The events could not be read, they are read again a second later
+                await asyncio.sleep(1)
     except asyncio.CancelledError:
         logger.warning(f"Steam result reading connection of project {project_id} is closed")
     except Exception as e:
@@ -64,16 +87,75 @@ async def event_generator(request: Request, db: Session, project_id: int):
             "data": f"Error in the SSE stream: {e}"
         }
     finally:
+        memory.streaming_subscribers.pop(project_id, None)
         memory.streaming_projects[project_id]["read_time"] = datetime.now()
         memory.streaming_projects[project_id]["reading"] = False
 
 
-def get_data(db: Session, project_id: int) -> list[dict]:
-    # Get data of the SSE stream
+def subscribe(project_id: int) -> asyncio.Event:
+    # Subscribe the reader of the project to the prescribed events, the event is set when one is published
+    wakeup = asyncio.Event()
+    memory.streaming_subscribers[project_id] = (asyncio.get_running_loop(), wakeup)
+    return wakeup
+
+
+async def seed_prescribed_events(project_id: int) -> None:
+    # Put the prescribed events which were never delivered, e.g. the ones published before a restart, in front of
+    # the backlog of the reader. The events already in the backlog are not added again
+    try:
+        async with AsyncSessionLocal() as db:
+            event_ids = await event_crud.get_unsent_prescribed_event_ids_async(db, project_id,
+                                                                               config.STREAMING_BACKLOG_SIZE)
+    except Exception as e:
+        logger.error(f"Error getting the undelivered events of project {project_id}: {e}", exc_info=True)
+        return
+
+    backlog = memory.streaming_backlogs.setdefault(project_id, deque(maxlen=config.STREAMING_BACKLOG_SIZE))
+    queued_event_ids = set(backlog)
+    backlog.extendleft(reversed([event_id for event_id in event_ids if event_id not in queued_event_ids]))
+
+
+async def mark_as_sent(event_ids: list[int]) -> None:
+    # Mark the delivered events as sent, so they are not delivered again after a restart. If it fails, they may be
+    # delivered twice, but never lost
+    try:
+        async with AsyncSessionLocal() as db:
+            await event_crud.mark_as_sent_by_event_ids_async(db, event_ids)
+    except Exception as e:
+        logger.error(f"Error marking the delivered events as sent: {e}", exc_info=True)
+
+
+def publish_prescribed_event(project_id: int, event_id: int) -> None:
+    # Publish the prescribed event to the reader of the project, it may be called from any thread
+    backlog = memory.streaming_backlogs.setdefault(project_id, deque(maxlen=config.STREAMING_BACKLOG_SIZE))
+    if len(backlog) == backlog.maxlen:
+        logger.warning(f"Backlog of project {project_id} is full, the oldest undelivered event is dropped")
+    backlog.append(event_id)
+    subscriber = memory.streaming_subscribers.get(project_id)
+    if subscriber is not None:
+        loop, wakeup = subscriber
+        loop.call_soon_threadsafe(wakeup.set)
+
+
+def take_prescribed_events(project_id: int) -> list[int]:
+    # Take the ids of the published events which are not delivered yet
     result = []
+    backlog = memory.streaming_backlogs.get(project_id)
+
+    while backlog:
+        result.append(backlog.popleft())
+
+    return result
+
+
+async def get_data(event_ids: list[int]) -> list[dict] | None:
+    # Get data of the SSE stream, each batch uses a short session, so the connection goes back to the pool
+    # while the reader waits. Return None if the events could not be read
+    result = None
 
     try:
-        db_events = event_crud.get_events_prescribed_but_not_sent_by_project_id(db, project_id)
+        async with AsyncSessionLocal() as db:
+            db_events = await event_crud.get_events_by_ids_async(db, event_ids)
         result = [
             {
                 "id": event.id,
@@ -86,7 +168,7 @@ def get_data(db: Session, project_id: int) -> list[dict]:
             for event in db_events
         ]
     except Exception as e:
-        logger.error(f"Error getting data of the SSE stream: {e}")
+        logger.error(f"Error getting data of the SSE stream: {e}", exc_info=True)
 
     return result
 
@@ -110,18 +192,6 @@ def get_finished_event(project_id: int, streaming_type: str) -> ProcessEventType
     return result
 
 
-def mark_as_sent(db: Session, event_ids: list[int]) -> bool:
-    # Mark an event as sent
-    result = False
-
-    try:
-        event_crud.mark_as_sent_by_event_ids(db, event_ids)
-    except Exception as e:
-        logger.error(f"Error marking an event as sent: {e}")
-
-    return result
-
-
 def enable_streaming(db: Session, project_id: int) -> None:
     # Enable the streaming
     db_project = project_crud.get_project_by_id(db, project_id)
@@ -129,6 +199,9 @@ def enable_streaming(db: Session, project_id: int) -> None:
             or not all([plugin.status == PluginStatus.STREAMING for plugin in db_project.plugins
                         if plugin.status != PluginStatus.ERROR and not plugin.disabled])):
         return
+    # The prescriptions of these plugins are expected for each event
+    memory.streaming_plugins[db_project.id] = {plugin.key for plugin in db_project.plugins
+                                               if plugin.status == PluginStatus.STREAMING}
     if db_project.status == ProjectStatus.SIMULATING:
         proceed_simulation(
             simulation_df_name=db_project.event_log.simulation_df_name,
@@ -139,6 +212,20 @@ def enable_streaming(db: Session, project_id: int) -> None:
         get_finished_event(db_project.id, "streaming")
 
 
+def get_streaming_plugins(db: Session, project_id: int) -> set[str] | None:
+    # Get the keys of the plugins whose prescriptions are expected for each event, None if the project is not
+    # streaming. They are loaded from the database once if the core restarted while the project was streaming
+    plugin_keys = memory.streaming_plugins.get(project_id)
+    if plugin_keys is not None:
+        return plugin_keys
+    db_project = project_crud.get_project_by_id(db, project_id)
+    if not db_project or db_project.status not in {ProjectStatus.STREAMING, ProjectStatus.SIMULATING}:
+        return None
+    logger.warning(f"Plugins of streaming project {project_id} are not in memory, loading them from the database")
+    return memory.streaming_plugins.setdefault(project_id, {plugin.key for plugin in db_project.plugins
+                                                            if plugin.status == PluginStatus.STREAMING})
+
+
 def disable_streaming(db: Session, db_project: project_model.Project, redefined: bool = False) -> bool:
     # Disable the streaming
     new_project_status = ProjectStatus.WAITING if redefined else ProjectStatus.TRAINED
@@ -150,6 +237,8 @@ def disable_streaming(db: Session, db_project: project_model.Project, redefined:
             plugin_crud.update_status(db, plugin, PluginStatus.TRAINED)
     if memory.streaming_projects.get(db_project.id):
         memory.streaming_projects[db_project.id]["finished"].set()
+    memory.streaming_plugins.pop(db_project.id, None)
+    remove_prefixes_of_project(db_project.id)
     send_streaming_stop_to_all_plugins([plugin.key for plugin in db_project.plugins
                                         if plugin.status == PluginStatus.STREAMING],
                                        db_project.id)
@@ -9,6 +9,7 @@ import core.crud.event_log as event_log_crud
 import core.crud.plugin as plugin_crud
 import core.crud.project as project_crud
 from core.confs import path
+from core.functions.common.cache import LRUCache
 from core.starters import memory
 from core.functions.project.streaming import disable_streaming
 from core.starters.database import SessionLocal
@@ -115,3 +116,18 @@ def stop_unread_simulations() -> bool:
         logger.warning(f"Stop unread simulations error: {e}", exc_info=True)
 
     return result
+
+
+def log_cache_stats(cache: LRUCache) -> bool:
+    # Log the counters of the cache
+    result = False
+
+    try:
+        stats = cache.get_stats()
+        logger.warning(f"Stats of {cache.name}: {stats['entries']} entries, {stats['size']}/{stats['max_size']} bytes, "
+                       f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+        result = True
+    except Exception as e:
+        logger.warning(f"Log cache stats error: {e}", exc_info=True)
+
+    return result
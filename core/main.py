@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from time import sleep
 
@@ -11,13 +12,14 @@ from sqlalchemy.exc import OperationalError
 from tzlocal import get_localzone
 
 from core import security
-from core.starters.database import Base, engine, SessionLocal
-from core.starters.rabbitmq import parameters
-from core.functions.common.etc import delay, thread
-from core.functions.common.timer import processed_messages_clean, log_rotation
-from core.functions.message.handler import callback, start_consuming, stop_consuming, consuming_stopped
+from core.starters.database import SessionLocal, async_engine, migrate_database
+from core.confs import config
+from core.starters.rabbitmq import url
+from core.functions.common.etc import delay
+from core.functions.common.timer import log_dedup_stats, processed_messages_clean, log_rotation
+from core.functions.message.handler import start_consuming, stop_consuming
 from core.functions.message.sender import send_online_inquires
-from core.functions.tool.timer import clean_local_storage, pop_unused_data, stop_unread_simulations
+from core.functions.tool.timer import clean_local_storage, log_cache_stats, pop_unused_data, stop_unread_simulations
 from core.routers import event_log, plugin, project
 from core.starters import memory
 
@@ -27,10 +29,10 @@ for _ in logging.root.manager.loggerDict:
     if _.startswith("pika"):
         logging.getLogger(_).setLevel(logging.CRITICAL)
 
-# Create all tables
+# Upgrade the database to the latest revision
 while True:
     try:
-        Base.metadata.create_all(bind=engine)
+        migrate_database()
         break
     except OperationalError:
         logger.warning("Database is not ready. Trying again in 5 seconds...")
@@ -80,17 +82,21 @@ def read_root():
     }
 
 
-@app.on_event("shutdown")
-def shutdown_event():
-    # Close the database session
-    close_all_sessions()
+@app.on_event("startup")
+async def startup_event():
+    # Start consuming messages in the event loop, the app does not wait for RabbitMQ
+    memory.consumer_task = asyncio.create_task(start_consuming(url, "core", config.CONSUMER_PREFETCH_COUNT))
+
 
-    # Close the rabbitmq connection
-    stop_consuming.set()
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Close the rabbitmq connection and wait for the running handlers
+    memory.consumer_task and memory.consumer_task.cancel()
+    await stop_consuming()
 
-    # Wait for the rabbitmq connection to close
-    while not consuming_stopped.is_set():
-        sleep(0.5)
+    # Close the database sessions and the async connections
+    close_all_sessions()
+    await async_engine.dispose()
 
 
 # Clean local storage
@@ -105,7 +111,7 @@ scheduler.add_job(send_online_inquires, "interval", minutes=5)
 scheduler.add_job(pop_unused_data, "interval", [memory.ongoing_results], minutes=5)
 scheduler.add_job(pop_unused_data, "interval", [memory.log_tests], minutes=5)
 scheduler.add_job(processed_messages_clean, "interval", [memory.processed_messages], minutes=5)
+scheduler.add_job(log_cache_stats, "interval", [memory.dataframes], minutes=30)
+scheduler.add_job(log_cache_stats, "interval", [memory.prefixes], minutes=30)
+scheduler.add_job(log_dedup_stats, "interval", [memory.processed_messages], minutes=30)
 scheduler.start()
-
-# Start a thread to consume messages
-thread(start_consuming, (parameters, "core", callback, 1))
@@ -0,0 +1,39 @@
+import logging
+
+from alembic import context
+
+import core.models  # noqa: F401
+from core.starters.database import Base, SQLALCHEMY_DATABASE_URL, engine
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    # Render the migrations as SQL without connecting to the database
+    context.configure(url=SQLALCHEMY_DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Run the migrations by the connection given by the caller, or by a new one of the engine
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,124 @@
+"""Initial schema, as created by create_all before the migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2023-03-20 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# Revision identifiers, used by Alembic
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def get_timestamp_columns() -> list[sa.Column]:
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True)
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "definition",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *get_timestamp_columns(),
+        sa.Column("columns_definition", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("case_attributes", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("fast_mode", sa.Boolean(), nullable=True),
+        sa.Column("start_transition", sa.String(), nullable=True),
+        sa.Column("complete_transition", sa.String(), nullable=True),
+        sa.Column("abort_transition", sa.String(), nullable=True),
+        sa.Column("outcome_definition", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("outcome_definition_negative", sa.Boolean(), nullable=True),
+        sa.Column("treatment_definition", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_definition_id", "definition", ["id"])
+    op.create_table(
+        "event_log",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *get_timestamp_columns(),
+        sa.Column("file_name", sa.String(), nullable=False),
+        sa.Column("saved_name", sa.String(), nullable=False),
+        sa.Column("df_name", sa.String(), nullable=True),
+        sa.Column("training_df_name", sa.String(), nullable=True),
+        sa.Column("simulation_df_name", sa.String(), nullable=True),
+        sa.Column("definition_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["definition_id"], ["definition.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("saved_name"),
+        sa.UniqueConstraint("df_name"),
+        sa.UniqueConstraint("training_df_name"),
+        sa.UniqueConstraint("simulation_df_name")
+    )
+    op.create_index("ix_event_log_id", "event_log", ["id"])
+    op.create_table(
+        "project",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *get_timestamp_columns(),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("event_log_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["event_log_id"], ["event_log.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_project_id", "project", ["id"])
+    op.create_table(
+        "plugin",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *get_timestamp_columns(),
+        sa.Column("project_id", sa.Integer(), nullable=True),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("prescription_type", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("parameters", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("additional_info", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("disabled", sa.Boolean(), nullable=True),
+        sa.Column("model_name", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_plugin_id", "plugin", ["id"])
+    op.create_table(
+        "case",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *get_timestamp_columns(),
+        sa.Column("project_id", sa.Integer(), nullable=True),
+        sa.Column("case_id", sa.String(), nullable=False),
+        sa.Column("completed", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_case_id", "case", ["id"])
+    op.create_table(
+        "event",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *get_timestamp_columns(),
+        sa.Column("project_id", sa.Integer(), nullable=True),
+        sa.Column("attributes", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("prescriptions", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("prescribed", sa.Boolean(), nullable=False),
+        sa.Column("sent", sa.Boolean(), nullable=False),
+        sa.Column("case_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["case_id"], ["case.id"]),
+        sa.ForeignKeyConstraint(["project_id"], ["project.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_event_id", "event", ["id"])
+
+
+def downgrade() -> None:
+    for table in ["event", "case", "plugin", "project", "event_log", "definition"]:
+        op.drop_index(f"ix_{table}_id", table_name=table)
+        op.drop_table(table)
@@ -0,0 +1,38 @@
+"""Indexes of the event and case lookups, and unique case ids in a project
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2023-03-20 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Merge the duplicated cases created by concurrent first events, their events are moved to the oldest case
+    op.execute(sa.text(
+        'UPDATE event SET case_id = duplicated.kept_id '
+        'FROM (SELECT id, MIN(id) OVER (PARTITION BY project_id, case_id) AS kept_id FROM "case") AS duplicated '
+        'WHERE event.case_id = duplicated.id AND duplicated.id <> duplicated.kept_id'
+    ))
+    op.execute(sa.text(
+        'DELETE FROM "case" WHERE id IN ('
+        'SELECT id FROM (SELECT id, MIN(id) OVER (PARTITION BY project_id, case_id) AS kept_id FROM "case") AS c '
+        'WHERE id <> kept_id)'
+    ))
+    op.create_unique_constraint("uq_case_project_id_case_id", "case", ["project_id", "case_id"])
+    op.create_index("ix_event_case_id_project_id", "event", ["case_id", "project_id"])
+    op.create_index("ix_event_project_id", "event", ["project_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_project_id", table_name="event")
+    op.drop_index("ix_event_case_id_project_id", table_name="event")
+    op.drop_constraint("uq_case_project_id_case_id", "case", type_="unique")
@@ -0,0 +1,27 @@
+"""Index of the prescribed events not delivered to the reader yet
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2023-03-27 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The in-process hub never set sent, so the events prescribed before the upgrade are taken as delivered,
+    # otherwise the next reader of each project would get all of them again
+    op.execute(sa.text("UPDATE event SET sent = TRUE WHERE prescribed AND NOT sent"))
+    op.create_index("ix_event_project_id_unsent", "event", ["project_id", "id"],
+                    postgresql_where=sa.text("prescribed AND NOT sent"))
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_project_id_unsent", table_name="event")
@@ -1,6 +1,6 @@
 import logging
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 class Case(Base):
     __tablename__ = "case"
+    __table_args__ = (
+        UniqueConstraint("project_id", "case_id", name="uq_case_project_id_case_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,9 +1,9 @@
 import logging
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 from core.starters.database import Base
 
@@ -13,6 +13,11 @@ logger = logging.getLogger(__name__)
 
 class Event(Base):
     __tablename__ = "event"
+    __table_args__ = (
+        Index("ix_event_case_id_project_id", "case_id", "project_id"),
+        Index("ix_event_project_id", "project_id"),
+        Index("ix_event_project_id_unsent", "project_id", "id", postgresql_where=text("prescribed AND NOT sent"))
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
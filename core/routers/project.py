@@ -2,15 +2,18 @@ import logging
 
 from fastapi import APIRouter, BackgroundTasks, Depends, Form, Request, UploadFile
 from fastapi_pagination import Page
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 import core.schemas.request.project as project_request
 import core.schemas.response.event as event_response
 import core.schemas.response.project as project_response
 import core.schemas.project as project_schema
-from core.functions.common.request import get_real_ip, get_db
+from core.functions.common.request import get_async_db, get_real_ip, get_db
+from core.functions.event.validation import validate_events_body
 from core.security.token import validate_token
-from core.services.event import process_new_event
+from core.services.event import process_new_event, process_new_events
 from core.services.project import (process_project_creation, process_projects_reading, process_project_reading,
                                    process_project_update, process_project_definition_update, process_project_deletion,
                                    process_ongoing_dataset_uploading, process_ongoing_dataset_result,
@@ -41,10 +44,10 @@ def read_projects(request: Request, db: Session = Depends(get_db),
 
 
 @router.get("/{project_id}", response_model=project_response.ProjectResponse)
-async def read_project(request: Request, project_id: int, db: Session = Depends(get_db),
+async def read_project(request: Request, project_id: int, db: AsyncSession = Depends(get_async_db),
                        _: bool = Depends(validate_token)):
     logger.warning(f"Read project {project_id} - from IP {get_real_ip(request)}")
-    return process_project_reading(project_id, db)
+    return await process_project_reading(project_id, db)
 
 
 @router.put("/{project_id}", response_model=project_response.ProjectResponse)
@@ -108,11 +111,19 @@ async def receive_event(request: Request, project_id: int, db: Session = Depends
                         _: bool = Depends(validate_token)):
     logger.warning(f"Receive event for project {project_id} - from IP {get_real_ip(request)}")
     request_body = await request.json()
-    return process_new_event(request_body, project_id, db)
+    return await run_in_threadpool(process_new_event, request_body, project_id, db)
+
+
+@router.post("/{project_id}/stream/events", response_model=event_response.PostEventsResponse)
+async def receive_events(request: Request, project_id: int, db: Session = Depends(get_db),
+                         _: bool = Depends(validate_token)):
+    logger.warning(f"Receive events for project {project_id} - from IP {get_real_ip(request)}")
+    events = validate_events_body(await request.body(), request.headers.get("content-type", ""))
+    return await run_in_threadpool(process_new_events, events, project_id, db)
 
 
 @router.get("/{project_id}/stream/result")
-async def streaming_result(request: Request, project_id: int, db: Session = Depends(get_db),
+async def streaming_result(request: Request, project_id: int, db: AsyncSession = Depends(get_async_db),
                            _: bool = Depends(validate_token)):
     logger.warning(f"Read streaming result of project {project_id} - from IP {get_real_ip(request)}")
     return await process_stream_result(request, project_id, db)
@@ -11,3 +11,8 @@ logger = logging.getLogger(__name__)
 class PostEventResponse(BaseModel):
     message: str
     event: Event
+
+
+class PostEventsResponse(BaseModel):
+    message: str
+    event_ids: list[int]
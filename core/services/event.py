@@ -2,22 +2,21 @@ import logging
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
-from typing import Any
+from typing import Any, Callable
 
 import core.crud.case as case_crud
 import core.crud.event as event_crud
 import core.crud.project as project_crud
-import core.schemas.case as case_schema
 import core.schemas.definition as definition_schema
 import core.schemas.event as event_schema
 from core.enums.definition import ColumnDefinition
 from core.enums.error import ErrorType
 from core.enums.status import PluginStatus
 from core.functions.definition.util import get_defined_column_name
-from core.functions.event.job import prepare_prefix_and_send
+from core.functions.event.job import prepare_prefix_and_send, remove_prefix
 from core.functions.event.validation import validate_columns
 from core.functions.plugin.util import enhance_additional_infos, get_active_plugins
-from core.functions.project.streaming import check_simulation
+from core.functions.project.streaming import check_simulation, publish_prescribed_event
 from core.starters import memory
 
 # Enable logging
@@ -47,7 +46,9 @@ def process_new_event(request_body: Any, project_id: int, db: Session) -> dict:
     case_id = str(request_body[get_defined_column_name(columns_definition, ColumnDefinition.CASE_ID)])
     db_case = case_crud.get_case_by_project_id_and_case_id(db, project_id, case_id)
     if not db_case:
-        db_case = case_crud.create_case(db, case_schema.CaseCreate(project_id=project_id, case_id=case_id))
+        # The first events of a case may arrive concurrently, so the case is created by an upsert
+        case_crud.upsert_cases(db, project_id, [case_id])
+        db_case = case_crud.get_case_by_project_id_and_case_id(db, project_id, case_id)
 
     # Create the event
     db_event = event_crud.create_event(
@@ -57,11 +58,11 @@ def process_new_event(request_body: Any, project_id: int, db: Session) -> dict:
     )
 
     # Check if there is a complete indicator
-    complete_indicator = get_defined_column_name(columns_definition, ColumnDefinition.COMPLETE_INDICATOR)
-    complete_indicator = complete_indicator or ColumnDefinition.COMPLETE_INDICATOR
-    if complete_indicator in request_body and request_body[complete_indicator] in ["1", "true", "True", "TRUE", True]:
+    if is_last_event(request_body, columns_definition):
         case_crud.mark_as_completed(db, db_case)
+        remove_prefix(project_id, db_case.id)
         db_event = event_crud.mark_as_prescribed(db, db_event)
+        publish_prescribed_event(project_id, db_event.id)
         check_simulation(db, db_project)
         return {
             "message": "Event received successfully, this is the last event of the case",
@@ -81,12 +82,109 @@ def process_new_event(request_body: Any, project_id: int, db: Session) -> dict:
         model_names={plugin.key: plugin.model_name for plugin in db_project.plugins
                      if plugin.status == PluginStatus.STREAMING},
         event_id=db_event.id,
+        case_id=db_case.id,
         columns_definition=columns_definition,
         case_attributes=case_attributes,
-        data=[db_event.attributes for db_event in db_case.events],
+        event=db_event.attributes,
+        load_events=lambda: get_case_events_loader(db, project_id)(db_case.id, db_event.id),
         additional_infos=additional_infos
     )
     return {
         "message": "Event received successfully",
         "event": db_event
     }
+
+
+def process_new_events(events: list[dict], project_id: int, db: Session) -> dict:
+    # Get project from the database
+    db_project = project_crud.get_project_by_id(db, project_id)
+    if not db_project:
+        raise HTTPException(status_code=400, detail=ErrorType.PROJECT_NOT_FOUND)
+
+    # Check if the project is streaming
+    streaming_project = memory.streaming_projects.get(db_project.id)
+    if not streaming_project or streaming_project["finished"].is_set():
+        raise HTTPException(status_code=400, detail=ErrorType.PROJECT_NOT_STREAMING)
+
+    # Get columns definition from the database
+    db_definition = db_project.event_log.definition
+    columns_definition = db_definition.columns_definition
+    case_attributes = db_definition.case_attributes
+
+    # Check if all events have all the columns previously defined
+    for i, event in enumerate(events):
+        try:
+            validate_columns(event, columns_definition, case_attributes)
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Event {i}: {e.detail}")
+
+    # Create the missing cases and the events in one transaction
+    case_column = get_defined_column_name(columns_definition, ColumnDefinition.CASE_ID)
+    case_ids = [str(event[case_column]) for event in events]
+    last_events = [is_last_event(event, columns_definition) for event in events]
+    db_case_ids = case_crud.upsert_cases(db, project_id, list(dict.fromkeys(case_ids)))
+    events = [event_schema.EventCreate(project_id=project_id, attributes=event, prescribed=last_event)
+              for event, last_event in zip(events, last_events)]
+    event_ids = event_crud.create_events(db, events, [db_case_ids[case_id] for case_id in case_ids])
+    completed_case_ids = {db_case_ids[case_id] for case_id, last_event in zip(case_ids, last_events) if last_event}
+    if completed_case_ids:
+        case_crud.mark_as_completed_by_ids(db, list(completed_case_ids))
+    db.commit()
+
+    # Get additional infos
+    additional_infos = enhance_additional_infos(
+        additional_infos={plugin.key: plugin.additional_info for plugin in db_project.plugins},
+        active_plugins=get_active_plugins(),
+        definition=definition_schema.Definition.from_orm(db_definition)
+    )
+    model_names = {plugin.key: plugin.model_name for plugin in db_project.plugins
+                   if plugin.status == PluginStatus.STREAMING}
+
+    # Send the events to the plugins in arrival order, the last events of the cases are not prescribed
+    load_events = get_case_events_loader(db, project_id)
+    for event, event_id, case_id, last_event in zip(events, event_ids, case_ids, last_events):
+        db_case_id = db_case_ids[case_id]
+        if last_event:
+            remove_prefix(project_id, db_case_id)
+            publish_prescribed_event(project_id, event_id)
+            continue
+        prepare_prefix_and_send(
+            project_id=project_id,
+            model_names=model_names,
+            event_id=event_id,
+            case_id=db_case_id,
+            columns_definition=columns_definition,
+            case_attributes=case_attributes,
+            event=event.attributes,
+            load_events=lambda: load_events(db_case_id, event_id),
+            additional_infos=additional_infos
+        )
+    if completed_case_ids:
+        check_simulation(db, db_project)
+
+    return {
+        "message": "Events received successfully",
+        "event_ids": event_ids
+    }
+
+
+def is_last_event(event: dict, columns_definition: dict[str, ColumnDefinition]) -> bool:
+    # Check if the event has a complete indicator
+    complete_indicator = get_defined_column_name(columns_definition, ColumnDefinition.COMPLETE_INDICATOR)
+    complete_indicator = complete_indicator or ColumnDefinition.COMPLETE_INDICATOR
+    return complete_indicator in event and event[complete_indicator] in ["1", "true", "True", "TRUE", True]
+
+
+def get_case_events_loader(db: Session, project_id: int) -> Callable[[int, int], list[tuple[int, dict]]]:
+    # Get the loader of the ids and attributes of the events of a case which arrived until an event, later events
+    # may already be committed by concurrent requests. The events of a case are queried once even if the prefixes
+    # of several events of the batch are not cached
+    case_events: dict[int, list[tuple[int, dict]]] = {}
+
+    def load_events(case_id: int, event_id: int) -> list[tuple[int, dict]]:
+        if case_id not in case_events:
+            db_events = event_crud.get_events_by_case_id_and_project_id(db, case_id, project_id)
+            case_events[case_id] = sorted((db_event.id, db_event.attributes) for db_event in db_events)
+        return [(id_, attributes) for id_, attributes in case_events[case_id] if id_ <= event_id]
+
+    return load_events
@@ -5,6 +5,7 @@ from fastapi import BackgroundTasks, HTTPException, Request, UploadFile
 from fastapi.responses import FileResponse
 from fastapi_pagination.ext.sqlalchemy_future import paginate
 from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sse_starlette.sse import EventSourceResponse
 
@@ -26,6 +27,7 @@ from core.functions.common.file import delete_file, get_extension
 from core.functions.plugin.util import enhance_additional_infos, get_active_plugins
 from core.functions.event_log.dataset import (get_ongoing_dataset_path, get_original_dataset_path,
                                               get_processed_dataset_path, get_simulation_dataset_path)
+from core.functions.event.job import get_renamed_columns
 from core.functions.event_log.job import start_pre_processing
 from core.functions.message.sender import send_streaming_prepare_to_all_plugins
 from core.functions.project.prescribe import (delete_result_from_memory, get_ongoing_dataset_result_key,
@@ -119,9 +121,9 @@ def process_projects_reading(db: Session):
     return paginate(db, select(project_model.Project).order_by(desc(project_model.Project.created_at)))  # type: ignore
 
 
-def process_project_reading(project_id: int, db: Session):
+async def process_project_reading(project_id: int, db: AsyncSession):
     # Get the data from the database, and validate it
-    db_project = project_crud.get_project_by_id(db, project_id)
+    db_project = await project_crud.get_project_by_id_async(db, project_id)
     if not db_project:
         raise HTTPException(status_code=400, detail=ErrorType.PROJECT_NOT_FOUND)
 
@@ -291,7 +293,9 @@ def process_stream_starting(project_id: int, streaming_type: str, db: Session) -
         active_plugins=get_active_plugins(),
         definition=definition_schema.Definition.from_orm(db_project.event_log.definition)
     )
-    send_streaming_prepare_to_all_plugins(plugins, db_project.id, model_names, additional_infos)
+    definition = db_project.event_log.definition
+    columns = get_renamed_columns(definition.columns_definition, definition.case_attributes)
+    send_streaming_prepare_to_all_plugins(plugins, db_project.id, model_names, additional_infos, columns)
     return {
         "message": "Project streaming started successfully",
         "project_id": project_id
@@ -323,6 +327,7 @@ def process_stream_clearing(project_id: int, db: Session) -> dict:
     # Remove all the cases and events belonging to the project
     event_crud.delete_all_events_by_project_id(db, db_project.id)
     case_crud.delete_all_cases_by_project_id(db, db_project.id)
+    memory.streaming_backlogs.pop(db_project.id, None)
 
     return {
         "message": "Project stream data is cleared successfully",
@@ -330,9 +335,9 @@ def process_stream_clearing(project_id: int, db: Session) -> dict:
     }
 
 
-async def process_stream_result(request: Request, project_id: int, db: Session) -> EventSourceResponse:
+async def process_stream_result(request: Request, project_id: int, db: AsyncSession) -> EventSourceResponse:
     # Get the data from the database, and validate it
-    db_project = project_crud.get_project_by_id(db, project_id)
+    db_project = await project_crud.get_project_by_id_async(db, project_id)
     validate_project_status(db_project)
 
     # Check if the project is streaming
@@ -355,7 +360,7 @@ async def process_stream_result(request: Request, project_id: int, db: Session)
         streaming_project["reading"] = True
 
     return EventSourceResponse(
-        content=event_generator(request, db, project_id),
+        content=event_generator(request, project_id),
         headers={"Content-Type": "text/event-stream"},
         ping=15
     )
@@ -1,11 +1,14 @@
 import logging
 from urllib.parse import quote
 
-from sqlalchemy import create_engine
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from core.confs import config
+from core.confs import config, path
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -13,16 +16,36 @@ logger = logging.getLogger(__name__)
 SQLALCHEMY_DATABASE_URL = (f"postgresql+psycopg://{config.POSTGRES_USER}:{quote(config.POSTGRES_PASSWORD)}"
                            f"@{config.POSTGRES_HOST}:{config.POSTGRES_PORT}/{config.POSTGRES_DB}")
 
-engine = create_engine(
-    url=SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    connect_args={
+ENGINE_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_size": config.POSTGRES_POOL_SIZE,
+    "max_overflow": config.POSTGRES_MAX_OVERFLOW,
+    "connect_args": {
         "keepalives": 1,
         "keepalives_idle": 30,
         "keepalives_interval": 10,
         "keepalives_count": 5,
     }
-)
+}
+
+engine = create_engine(url=SQLALCHEMY_DATABASE_URL, **ENGINE_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine uses the async connections of psycopg, it serves the routes which must not block the event loop
+async_engine = create_async_engine(url=SQLALCHEMY_DATABASE_URL, **ENGINE_OPTIONS)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
+
 Base = declarative_base()
+
+
+def migrate_database() -> None:
+    # Upgrade the database to the latest revision, databases created by create_all before the migrations
+    # existed are stamped with the initial revision first
+    alembic_config = Config(path.ALEMBIC_CONFIG_PATH)
+    with engine.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        inspector = inspect(connection)
+        if not inspector.has_table("alembic_version") and inspector.has_table("event"):
+            logger.warning("Database has no revision, stamping it with the initial revision")
+            command.stamp(alembic_config, "0001")
+        command.upgrade(alembic_config, "head")
@@ -1,18 +1,36 @@
 import logging
+from asyncio import AbstractEventLoop, Event, Lock, Task
+from collections import deque
+from concurrent.futures import Future
 from datetime import datetime
 from multiprocessing.synchronize import Event as ProcessEventType
-from typing import Any, BinaryIO
+from threading import Lock as ThreadLock
+from typing import Any, BinaryIO, Hashable
+from weakref import WeakValueDictionary
 
-from pandas import DataFrame
+from aio_pika.abc import AbstractRobustConnection
+
+from core.confs import config
+from core.functions.common.cache import DedupStore, LRUCache, get_dataframe_size
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
 # Data in memory
 available_plugins: dict[str, dict[str, datetime | str]] = {}
-dataframes: dict[int, DataFrame] = {}
+consumer_connection: AbstractRobustConnection | None = None
+consumer_task: Task | None = None
+dataframes = LRUCache(max_size=config.DATAFRAME_CACHE_SIZE, size_of=get_dataframe_size, name="dataframe cache")
 log_tests: dict[int, dict[str, datetime | BinaryIO | str]] = {}
+message_locks: WeakValueDictionary[Hashable, Lock] = WeakValueDictionary()
 ongoing_results: dict[str, Any] = {}
-pending_dfs: dict[str, dict[datetime | str | bool]] = {}
-processed_messages: dict[str, datetime] = {}
+prefix_locks = [ThreadLock() for _ in range(config.PREFIX_LOCK_STRIPES)]
+prefixes = LRUCache(max_size=config.PREFIX_CACHE_SIZE, size_of=lambda prefix: len(prefix[0]), name="prefix cache")
+processed_messages = DedupStore(ttl=config.PROCESSED_MESSAGES_TTL, max_size=config.PROCESSED_MESSAGES_SIZE,
+                                name="processed messages")
+rpc_requests: dict[str, Future] = {}
+streaming_backlogs: dict[int, deque[int]] = {}
+streaming_columns: dict[tuple[str, int], str] = {}
+streaming_plugins: dict[int, set[str]] = {}
 streaming_projects: dict[int, dict[str, str | bool | datetime | ProcessEventType | None]] = {}
+streaming_subscribers: dict[int, tuple[AbstractEventLoop, Event]] = {}
@@ -9,5 +9,5 @@ from core.confs import config
 logger = logging.getLogger(__name__)
 
 # RabbitMQ connection settings
-parameters = URLParameters(f"amqp://{config.RABBITMQ_USER}:{quote(config.RABBITMQ_PASS)}"
-                           f"@{config.RABBITMQ_HOST}:{config.RABBITMQ_PORT}/%2F")
+url = f"amqp://{config.RABBITMQ_USER}:{quote(config.RABBITMQ_PASS)}@{config.RABBITMQ_HOST}:{config.RABBITMQ_PORT}/%2F"
+parameters = URLParameters(url)
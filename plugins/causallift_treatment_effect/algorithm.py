@@ -3,21 +3,15 @@ import os
 import warnings
 from datetime import datetime
 from multiprocessing import cpu_count
-from threading import Thread
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-import pandas as pd
 from causallift import CausalLift
-from kedro.extras.datasets.pickle.pickle_dataset import PickleDataSet as PickleLocalDataSet
 from pandas import DataFrame
 from pandas.core.common import SettingWithCopyWarning
 from sklearn.exceptions import ConvergenceWarning, UndefinedMetricWarning
 
-from core.confs import path
 from core.enums.dataset import OutcomeType
 from core.enums.definition import ColumnDefinition
-from core.functions.common.etc import random_str
-from core.functions.common.file import delete_file
 from plugins.common.algorithm import Algorithm
 from plugins.common.dataset import get_encoded_dfs_by_activity
 
@@ -53,48 +47,50 @@ class CausalLiftAlgorithm(Algorithm):
         return ""
 
     def train(self) -> str:
-        # Train the model
-        self.set_data_value("training_dfs", self.__training_dfs)
+        # Train the propensity model and the uplift models for each length
+        models = {}
+        for length, training_df in self.__training_dfs.items():
+            models[length] = self.get_fitted_models(training_df)
+        self.set_data_value("models", models)
         return ""
 
     def predict(self, prefix: List[dict]) -> dict:
         # Predict the result by using the given prefix
-        length = len(prefix)
-        training_df = self.get_data()["training_dfs"].get(length)
-        if training_df is None:
-            return self.get_null_output("The model is not trained for the given prefix length")
+        return self.predict_batch([prefix])[0]
 
-        # Get the test df
-        raw_test_df = pd.DataFrame(prefix)
-        test_df = list(get_encoded_dfs_by_activity(
-            original_df=raw_test_df,
-            encoding_type=self.get_parameter_value("encoding"),
-            outcome_type=OutcomeType.LABELLED,
-            include_treatment=False,
-            for_test=True,
-            existing_data=self.get_data()
-        )[0].values())[0]
+    def predict_batch(self, prefixes: List[List[dict]]) -> List[dict]:
+        # Predict the results of the prefixes, the uplift models are called once for each length
+        results = {}
+
+        # Get the test df for each length
+        test_dfs = self.get_prefix_test_dfs_by_length(prefixes, OutcomeType.LABELLED)
 
         # Get the CATE using two models approach
-        result_df = self.get_result(training_df, test_df)
-        proba_if_treated = round(result_df["Proba_if_Treated"].values[0].item(), 4)
-        proba_if_untreated = round(result_df["Proba_if_Untreated"].values[0].item(), 4)
-        cate = round(result_df["CATE"].values[0].item(), 4)
-        output = {
-            "proba_if_treated": proba_if_treated,
-            "proba_if_untreated": proba_if_untreated,
-            "cate": cate,
-            "treatment": self.get_additional_info_value("treatment_definition")
-        }
-        return {
-            "date": datetime.now().isoformat(),
-            "type": self.get_basic_info()["prescription_type"],
-            "output": output,
-            "plugin": {
-                "name": self.get_basic_info()["name"],
-                "model": f"{self.get_parameter_value('encoding')}-length-{length}",
-            }
-        }
+        for length, (indexes, test_df) in test_dfs.items():
+            models = self.get_models(length)
+            if models is None:
+                for i in indexes:
+                    results[i] = self.get_null_output("The model is not trained for the given prefix length")
+                continue
+            result_df = self.get_result(models, test_df)
+            for i, (_, row) in zip(indexes, result_df.iterrows()):
+                output = {
+                    "proba_if_treated": round(row["Proba_if_Treated"].item(), 4),
+                    "proba_if_untreated": round(row["Proba_if_Untreated"].item(), 4),
+                    "cate": round(row["CATE"].item(), 4),
+                    "treatment": self.get_additional_info_value("treatment_definition")
+                }
+                results[i] = {
+                    "date": datetime.now().isoformat(),
+                    "type": self.get_basic_info()["prescription_type"],
+                    "output": output,
+                    "plugin": {
+                        "name": self.get_basic_info()["name"],
+                        "model": f"{self.get_parameter_value('encoding')}-length-{length}",
+                    }
+                }
+
+        return [results[i] for i in range(len(prefixes))]
 
     def predict_df(self, df: DataFrame) -> dict:
         # Predict the result by using the given dataframe
@@ -112,25 +108,11 @@ class CausalLiftAlgorithm(Algorithm):
         )
 
         # Get the result for each length
-        threads = []
-        count_of_length = len(test_dfs)
-        if count_of_length <= 50:
-            for length, test_df in test_dfs.items():
-                training_df = self.get_data()["training_dfs"].get(length)
-                if training_df is None:
-                    continue
-                t = Thread(target=self.get_result_thread, args=(self, result_dfs, length, training_df, test_df))
-                t.start()
-                threads.append(t)
-            for t in threads:
-                t.join()
-        else:
-            for length, test_df in test_dfs.items():
-                training_df = self.get_data()["training_dfs"].get(length)
-                if training_df is None:
-                    continue
-                result_df = self.get_result(training_df, test_df)
-                result_dfs[length] = result_df
+        for length, test_df in test_dfs.items():
+            models = self.get_models(length)
+            if models is None:
+                continue
+            result_dfs[length] = self.get_result(models, test_df)
 
         # Merge the result
         if len(result_dfs) <= 0:
@@ -162,92 +144,109 @@ class CausalLiftAlgorithm(Algorithm):
                 }
         return result
 
+    def has_model(self, length: int) -> bool:
+        # Check if the models of the length are fitted or can be fitted from the saved training data
+        return self.get_models(length) is not None
+
+    def get_models(self, length: int) -> Optional[Dict[str, Any]]:
+        # Get the fitted models of the length. Model files saved with only the training data are fitted here the
+        # first time, and the models replace the training data in the model file, so they are never fitted again
+        models = self.get_data().get("models", {}).get(length)
+        if models is not None:
+            return models
+        training_df = self.get_data().get("training_dfs", {}).get(length)
+        if training_df is None:
+            return None
+        models = self.get_fitted_models(training_df)
+        self.get_data().setdefault("models", {})[length] = models
+        del self.get_data()["training_dfs"][length]
+        self.update_model()
+        return models
+
     @staticmethod
-    def get_result(training_df: DataFrame, test_df: DataFrame) -> DataFrame:
+    def get_fitted_models(training_df: DataFrame) -> Dict[str, Any]:
+        # Fit the propensity model and the uplift models of treated and untreated cases, CausalLift needs a test
+        # dataframe and scores it, so only one row is given as only the fitted models are kept
         cols_features = [x for x in training_df.columns
                          if x not in {ColumnDefinition.OUTCOME, ColumnDefinition.TREATMENT, ColumnDefinition.CASE_ID}]
-        temp_dir = f"{path.TEMP_PATH}/{random_str(16)}"
-        try:
-            n_jobs = cpu_count() if cpu_count() <= 8 else 8
-            cl = CausalLift(
-                train_df=training_df,
-                test_df=test_df,
-                enable_ipw=True,
-                logging_config=None,
-                cols_features=cols_features,
-                col_treatment=ColumnDefinition.TREATMENT,
-                col_outcome=ColumnDefinition.OUTCOME, verbose=0,
-                dataset_catalog=dict(
-                    propensity_model=PickleLocalDataSet(
-                        filepath=f"{temp_dir}/propensity_model.pickle",
-                        version=None
-                    ),
-                    uplift_models_dict=PickleLocalDataSet(
-                        filepath=f"{temp_dir}/uplift_models_dict.pickle",
-                        version=None
-                    )
+        n_jobs = cpu_count() if cpu_count() <= 8 else 8
+        cl = CausalLift(
+            train_df=training_df,
+            test_df=training_df.iloc[:1],
+            enable_ipw=True,
+            logging_config=None,
+            cols_features=cols_features,
+            col_treatment=ColumnDefinition.TREATMENT,
+            col_outcome=ColumnDefinition.OUTCOME, verbose=0,
+            runner=None,
+            uplift_model_params=dict(  # type: ignore
+                search_cv="sklearn.model_selection.GridSearchCV",
+                estimator="xgboost.XGBClassifier",
+                scoring=None,
+                cv=3,
+                return_train_score=False,
+                n_jobs=n_jobs,
+                param_grid=dict(
+                    random_state=[0],
+                    max_depth=[3],
+                    learning_rate=[0.1],
+                    n_estimators=[100],
+                    verbose=[0],
+                    objective=["binary:logistic"],
+                    booster=["gbtree"],
+                    n_jobs=[-1],
+                    nthread=[None],
+                    gamma=[0],
+                    min_child_weight=[1],
+                    max_delta_step=[0],
+                    subsample=[1],
+                    colsample_bytree=[1],
+                    colsample_bylevel=[1],
+                    reg_alpha=[0],
+                    reg_lambda=[1],
+                    scale_pos_weight=[1],
+                    base_score=[0.5],
+                    missing=[None],
                 ),
-                uplift_model_params=dict(  # type: ignore
-                    search_cv="sklearn.model_selection.GridSearchCV",
-                    estimator="xgboost.XGBClassifier",
-                    scoring=None,
-                    cv=3,
-                    return_train_score=False,
-                    n_jobs=n_jobs,
-                    param_grid=dict(
-                        random_state=[0],
-                        max_depth=[3],
-                        learning_rate=[0.1],
-                        n_estimators=[100],
-                        verbose=[0],
-                        objective=["binary:logistic"],
-                        booster=["gbtree"],
-                        n_jobs=[-1],
-                        nthread=[None],
-                        gamma=[0],
-                        min_child_weight=[1],
-                        max_delta_step=[0],
-                        subsample=[1],
-                        colsample_bytree=[1],
-                        colsample_bylevel=[1],
-                        reg_alpha=[0],
-                        reg_lambda=[1],
-                        scale_pos_weight=[1],
-                        base_score=[0.5],
-                        missing=[None],
-                    ),
+            ),
+            propensity_model_params=dict(  # type: ignore
+                search_cv="sklearn.model_selection.GridSearchCV",
+                estimator="sklearn.linear_model.LogisticRegression",
+                scoring=None,
+                cv=3,
+                return_train_score=False,
+                n_jobs=n_jobs,
+                param_grid=dict(
+                    random_state=[0],
+                    C=[0.1, 1, 10],
+                    class_weight=[None],
+                    dual=[False],
+                    fit_intercept=[True],
+                    intercept_scaling=[1],
+                    max_iter=[100],
+                    multi_class=["ovr"],
+                    n_jobs=[1],
+                    penalty=["l1", "l2"],
+                    solver=["liblinear"],
+                    tol=[0.0001],
+                    warm_start=[False],
                 ),
-                propensity_model_params=dict(  # type: ignore
-                    search_cv="sklearn.model_selection.GridSearchCV",
-                    estimator="sklearn.linear_model.LogisticRegression",
-                    scoring=None,
-                    cv=3,
-                    return_train_score=False,
-                    n_jobs=n_jobs,
-                    param_grid=dict(
-                        random_state=[0],
-                        C=[0.1, 1, 10],
-                        class_weight=[None],
-                        dual=[False],
-                        fit_intercept=[True],
-                        intercept_scaling=[1],
-                        max_iter=[100],
-                        multi_class=["ovr"],
-                        n_jobs=[1],
-                        penalty=["l1", "l2"],
-                        solver=["liblinear"],
-                        tol=[0.0001],
-                        warm_start=[False],
-                    ),
-                )
             )
-            _, result_df = cl.estimate_cate_by_2_models()
-        finally:
-            delete_file(temp_dir)
-        return result_df
+        )
+        cl.estimate_cate_by_2_models()
+        return {
+            "cols_features": cols_features,
+            "propensity": cl.propensity_model,
+            "treated": cl.uplift_models_dict["treated"]["model"],
+            "untreated": cl.uplift_models_dict["untreated"]["model"]
+        }
 
     @staticmethod
-    def get_result_thread(self, result_dfs: Dict[int, DataFrame], length: int,
-                          training_df: DataFrame, test_df: DataFrame):
-        # Get the CATE using two models approach
-        result_dfs[length] = self.get_result(training_df, test_df)
+    def get_result(models: Dict[str, Any], test_df: DataFrame) -> DataFrame:
+        # Get the CATE of the test cases by the fitted uplift models
+        x = test_df[models["cols_features"]]
+        result_df = test_df.copy()
+        result_df["Proba_if_Treated"] = models["treated"].predict_proba(x)[:, 1]
+        result_df["Proba_if_Untreated"] = models["untreated"].predict_proba(x)[:, 1]
+        result_df["CATE"] = result_df["Proba_if_Treated"] - result_df["Proba_if_Untreated"]
+        return result_df
@@ -1,6 +1,6 @@
 import logging
 
-from plugins.common.starter import plugin_scheduler, plugin_run
+from plugins.common.starter import plugin_pool, plugin_scheduler, plugin_run
 from plugins.causallift_treatment_effect.algorithm import CausalLiftAlgorithm
 from plugins.causallift_treatment_effect.config import basic_info
 
@@ -11,5 +11,6 @@ for _ in logging.root.manager.loggerDict:
         logging.getLogger(_).setLevel(logging.CRITICAL)
 
 if __name__ == "__main__":
+    plugin_pool()
     plugin_scheduler(basic_info)
     plugin_run(CausalLiftAlgorithm, basic_info)
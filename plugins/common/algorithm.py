@@ -1,14 +1,18 @@
 import logging
 import pickle
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from os import replace
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from pandas import DataFrame, Series
+from pandas import DataFrame, Series, concat
 from sklearn.metrics import precision_score, recall_score, f1_score
 
 from core.confs import path
+from core.enums.dataset import OutcomeType
 from core.enums.definition import ColumnDefinition
-from core.functions.common.file import get_new_path
+from core.functions.common.file import delete_file, get_new_path
+from plugins.common.dataset import get_encoded_dfs_by_activity
+from plugins.common.encoder import IncrementalEncoder
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -23,6 +27,7 @@ class Algorithm:
         self.__parameters: Dict[str, Any] = algo_data.get("parameters")
         self.__additional_info: Dict[str, Any] = algo_data.get("additional_info")
         self.__model_name: str = algo_data.get("model_name")
+        self.__encoder: Optional[IncrementalEncoder] = None
         self.__data = {
             "project_id": self.__project_id,
             "plugin_id": self.__plugin_id,
@@ -77,6 +82,22 @@ class Algorithm:
             logger.warning(f"Saving model failed: {e}", exc_info=True)
         return result
 
+    def update_model(self) -> bool:
+        # Rewrite the model file the instance was loaded from, e.g. after models are fitted for an old model file.
+        # The file is replaced at once, so the plugin never reads a partly written model
+        if not self.__model_name:
+            return False
+        temp_path = get_new_path(f"{path.PLUGIN_MODEL_PATH}/", suffix=".tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                pickle.dump(self.__data, f)
+            replace(temp_path, f"{path.PLUGIN_MODEL_PATH}/{self.__model_name}")
+        except Exception as e:
+            logger.warning(f"Updating model failed: {e}", exc_info=True)
+            delete_file(temp_path)
+            return False
+        return True
+
     def load_model(self) -> bool:
         # Load the model
         if self.__data.get("models"):
@@ -91,6 +112,39 @@ class Algorithm:
             return False
         return True
 
+    def get_prefix_test_df(self, prefix: List[dict], outcome_type: OutcomeType) -> DataFrame:
+        # Get the encoded test dataframe of the streaming prefix, the running state of the case is used if possible
+        if self.__encoder is None:
+            self.__encoder = IncrementalEncoder(self.get_parameter_value("encoding"), self.get_data())
+        test_df = self.__encoder.get_test_df(prefix)
+        if test_df is not None:
+            return test_df
+        return list(get_encoded_dfs_by_activity(
+            original_df=DataFrame(prefix),
+            encoding_type=self.get_parameter_value("encoding"),
+            outcome_type=outcome_type,
+            include_treatment=False,
+            for_test=True,
+            existing_data=self.get_data()
+        )[0].values())[0]
+
+    def get_prefix_test_dfs_by_length(self, prefixes: List[List[dict]],
+                                      outcome_type: OutcomeType) -> Dict[int, Tuple[List[int], Optional[DataFrame]]]:
+        # Get the encoded test dataframe of each prefix length, with the indexes of its prefixes in the batch,
+        # the prefixes of the lengths without a model are not encoded, their dataframe is None
+        indexes_by_length: Dict[int, List[int]] = {}
+        for i, prefix in enumerate(prefixes):
+            indexes_by_length.setdefault(len(prefix), []).append(i)
+        return {
+            length: (indexes, concat([self.get_prefix_test_df(prefixes[i], outcome_type) for i in indexes],
+                                     ignore_index=True) if self.has_model(length) else None)
+            for length, indexes in indexes_by_length.items()
+        }
+
+    def has_model(self, length: int) -> bool:
+        # Check if a model is trained for the prefix length
+        return length in (self.get_data().get("models") or {})
+
     def preprocess(self) -> str:
         # Pre-process the data
         pass
@@ -103,6 +157,10 @@ class Algorithm:
         # Predict the result by using the given prefix
         pass
 
+    def predict_batch(self, prefixes: List[List[dict]]) -> List[dict]:
+        # Predict the results of several prefixes, plugins override it to call the model once for each length
+        return [self.predict(prefix) for prefix in prefixes]
+
     def predict_df(self, df: DataFrame) -> dict:
         # Predict the result using a DataFrame
         pass
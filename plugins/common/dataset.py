@@ -4,24 +4,24 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from pandas import DataFrame, read_pickle, read_csv
+from pandas import DataFrame
+from scipy.sparse import csr_matrix
 from sklearn.preprocessing import LabelBinarizer
 
-from core.enums.dataset import EncodingType, OutcomeType
+from core.confs import config
+from core.enums.dataset import EncodingType, ExecutionPlan, OutcomeType
 from core.enums.definition import ColumnDefinition
 from core.functions.common.etc import get_processes_number
+from core.functions.common.file import get_dataframe_by_name
+from plugins.common import memory
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
 
 def read_df_from_path(directory: str, df_name: str) -> DataFrame:
-    try:
-        return read_pickle(f"{directory}/{df_name}.pkl")  # nosec B301
-    except ValueError:
-        # If the plugin's Python version is 3.6, then the pickle protocol is not compatible,
-        # so we need to read the CSV file
-        return read_csv(f"{directory}/{df_name}.csv")
+    # Read the dataframe shared by core, older pickle and csv files are still supported
+    return get_dataframe_by_name(directory, df_name)
 
 
 def get_encoded_dfs_by_activity(original_df: DataFrame, encoding_type: EncodingType, outcome_type: OutcomeType,
@@ -33,23 +33,42 @@ def get_encoded_dfs_by_activity(original_df: DataFrame, encoding_type: EncodingT
     df, data = get_df_and_data_with_mapping(df, data, existing_data, encoding_type, outcome_type)
     df, data = get_df_and_data_with_case_groups(df, data, existing_data, encoding_type, include_treatment)
 
+    execution_plan = get_execution_plan(len(data["case_ids"]), len(data["lengths"]))
+    logger.debug(f"Encode {len(data['case_ids'])} cases for {len(data['lengths'])} lengths: {execution_plan.value}")
+    data["execution_plan"] = execution_plan
+
+    if execution_plan == ExecutionPlan.INLINE:
+        dataframes = get_encoded_dataframes_by_activity_for_lengths(data["lengths"], encoding_type, outcome_type,
+                                                                    data, for_test)
+        return dataframes, data
+
     processes_number = get_processes_number()
     lengths_split = np.array_split(data["lengths"], processes_number * 4)
-    with Pool(processes=processes_number) as pool:
-        results = pool.starmap(
-            func=get_encoded_dataframes_by_activity_for_lengths,
-            iterable=[(lengths, encoding_type, outcome_type, data, for_test) for lengths in lengths_split]
-        )
+    iterable = [(lengths, encoding_type, outcome_type, data, for_test) for lengths in lengths_split]
+    if memory.pool is not None:
+        results = memory.pool.starmap(func=get_encoded_dataframes_by_activity_for_lengths, iterable=iterable)
+    else:
+        with Pool(processes=processes_number) as pool:
+            results = pool.starmap(func=get_encoded_dataframes_by_activity_for_lengths, iterable=iterable)
 
     dataframes = {length: r for result in results for length, r in result.items()}
     return dataframes, data
 
 
+def get_execution_plan(cases_count: int, lengths_count: int) -> ExecutionPlan:
+    # Get the execution plan by the estimated work, small inputs do not pay for sending the data to the pool
+    if cases_count * lengths_count <= config.ENCODING_INLINE_MAX_WORK or get_processes_number() <= 1:
+        return ExecutionPlan.INLINE
+    return ExecutionPlan.POOL
+
+
 def get_df_and_data_with_mapping(df: DataFrame, data: dict, existing_data: dict,
                                  encoding_type: EncodingType, outcome_type: OutcomeType) -> Tuple[DataFrame, dict]:
     if existing_data is not None and "mapping" in existing_data:
+        # The mapping of the last activity outcome is only used for the labels of boolean and frequency encoding
         mapping = existing_data["mapping"]
-        df = get_ordinal_encoded_df_by_given_mapping(df, ColumnDefinition.ACTIVITY, mapping)
+        if encoding_type == EncodingType.SIMPLE_INDEX:
+            df = get_ordinal_encoded_df_by_given_mapping(df, ColumnDefinition.ACTIVITY, mapping)
         data["mapping"] = mapping
     elif encoding_type == EncodingType.SIMPLE_INDEX:
         df, mapping = get_ordinal_encoded_df_and_mapping(df, ColumnDefinition.ACTIVITY)
@@ -238,3 +257,115 @@ def get_training_df_from_data_list(training_data: List[List[Union[np.array, int]
     else:
         label_columns = [ColumnDefinition.OUTCOME, ColumnDefinition.TREATMENT, ColumnDefinition.CASE_ID]
     return pd.concat([activities_df, training_df[label_columns]], axis=1)
+
+
+def get_encoded_matrices_by_activity(original_df: DataFrame, encoding_type: EncodingType, outcome_type: OutcomeType,
+                                     for_test: bool, existing_data: Optional[Dict[str, Any]]
+                                     ) -> Tuple[Dict[int, Dict[str, Any]], Dict[str, Any]]:
+    # Get encoded feature matrices for all prefix lengths in one pass over the events, boolean and frequency
+    # encodings are sparse matrices of cumulative one-hot counts, simple index encoding is a padded code matrix
+    data = {}
+    df, data = get_df_and_data_with_mapping(original_df, data, existing_data, encoding_type, outcome_type)
+    events = get_events_ordered_by_case(df)
+    data["case_ids"] = events["case_ids"].tolist()
+    data["lengths"] = sorted(set(events["case_lengths"][events["case_lengths"] >= 3].tolist()))
+
+    if encoding_type in {EncodingType.BOOLEAN, EncodingType.FREQUENCY_BASED}:
+        if existing_data is not None and "lb" in existing_data:
+            lb = existing_data["lb"]
+        else:
+            lb = LabelBinarizer()
+            lb = lb.fit(np.unique(events["activities"]))
+        data["lb"] = lb
+        columns = lb.classes_.tolist()
+        feature_codes = get_class_codes(events["activities"], lb.classes_)
+    else:
+        columns = []
+        feature_codes = events["activities"]
+
+    outcomes = get_outcomes_of_cases(df, events, outcome_type, data.get("mapping"), encoding_type)
+    matrices = {}
+    for length in data["lengths"]:
+        if for_test:
+            case_mask = events["case_lengths"] == length
+        else:
+            case_mask = events["case_lengths"] > length
+            if case_mask.sum() < 300:
+                continue
+        matrix = get_encoded_matrix_for_length(length, case_mask, feature_codes, events, encoding_type, len(columns))
+        if not for_test:
+            if outcomes is None:
+                continue
+            y = outcomes(length)[case_mask]
+            labelled = ~pd.isna(y)
+            matrix = {key: value[labelled] for key, value in matrix.items()}
+            matrix["y"] = y[labelled].astype(int) if y.dtype.kind == "f" else y[labelled]
+        matrix["columns"] = columns if columns else [f"EVENT_{i}" for i in range(1, length + 1)]
+        matrices[length] = matrix
+    return matrices, data
+
+
+def get_events_ordered_by_case(df: DataFrame) -> Dict[str, np.ndarray]:
+    # Get the events ordered by case, the cases are sorted like numpy unique, the events keep their order in a case
+    case_codes, case_ids = pd.factorize(df[ColumnDefinition.CASE_ID], sort=True)
+    order = np.argsort(case_codes, kind="mergesort")
+    case_codes = case_codes[order]
+    case_lengths = np.bincount(case_codes, minlength=len(case_ids))
+    case_starts = np.concatenate(([0], np.cumsum(case_lengths)[:-1]))
+    return {
+        "order": order,
+        "case_ids": np.asarray(case_ids),
+        "case_codes": case_codes,
+        "case_lengths": case_lengths,
+        "case_starts": case_starts,
+        "positions": np.arange(len(case_codes)) - case_starts[case_codes],
+        "activities": df[ColumnDefinition.ACTIVITY].to_numpy()[order]
+    }
+
+
+def get_class_codes(activities: np.ndarray, classes: np.ndarray) -> np.ndarray:
+    # Get the column index of each activity in the binarized classes, unknown activities get -1
+    codes = np.searchsorted(classes, activities)
+    codes[codes >= len(classes)] = 0
+    return np.where(classes[codes] == activities, codes, -1)
+
+
+def get_outcomes_of_cases(df: DataFrame, events: Dict[str, np.ndarray], outcome_type: OutcomeType,
+                          mapping: Optional[Dict[Any, int]], encoding_type: EncodingType) -> Optional[Any]:
+    # Get a function giving the outcome label of every case for a prefix length
+    if outcome_type == OutcomeType.LABELLED and ColumnDefinition.OUTCOME in df.columns:
+        labels = df[ColumnDefinition.OUTCOME].to_numpy()[events["order"]][events["case_starts"]]
+        return lambda length: labels
+    elif outcome_type == OutcomeType.LAST_ACTIVITY:
+        def get_next_activities(length: int) -> np.ndarray:
+            # The next activity of a case shorter than the length is never selected, its index is only clipped
+            indexes = np.minimum(events["case_starts"] + length, len(events["activities"]) - 1)
+            next_activities = events["activities"][indexes]
+            if encoding_type == EncodingType.SIMPLE_INDEX:
+                return next_activities
+            return pd.Series(next_activities).map(mapping).to_numpy()
+        return get_next_activities
+    return None
+
+
+def get_encoded_matrix_for_length(length: int, case_mask: np.ndarray, feature_codes: np.ndarray,
+                                  events: Dict[str, np.ndarray], encoding_type: EncodingType,
+                                  classes_count: int) -> Dict[str, Any]:
+    # Get the feature matrix of the first events of the selected cases
+    rows = np.cumsum(case_mask) - 1
+    event_mask = case_mask[events["case_codes"]] & (events["positions"] < length)
+    event_rows = rows[events["case_codes"][event_mask]]
+    event_codes = feature_codes[event_mask]
+
+    if encoding_type == EncodingType.SIMPLE_INDEX:
+        x = np.zeros((case_mask.sum(), length), dtype=np.asarray(feature_codes).dtype)
+        x[event_rows, events["positions"][event_mask]] = event_codes
+    else:
+        known = event_codes >= 0
+        x = csr_matrix((np.ones(known.sum(), dtype=int), (event_rows[known], event_codes[known])),
+                       shape=(case_mask.sum(), classes_count))
+        x.sum_duplicates()
+        if encoding_type == EncodingType.BOOLEAN:
+            x.data[:] = 1
+
+    return {"x": x, "case_ids": events["case_ids"][case_mask]}
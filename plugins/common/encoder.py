@@ -0,0 +1,107 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from core.confs import config
+from core.enums.dataset import EncodingType
+from core.enums.definition import ColumnDefinition
+from core.functions.common.cache import LRUCache
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+
+class IncrementalEncoder:
+    # Encoder keeping the running state of each streaming case, so the prefix is extended by one event in O(1)
+    def __init__(self, encoding_type: EncodingType, data: Dict[str, Any]):
+        self.encoding_type = encoding_type
+        self.mapping: Optional[Dict[str, int]] = data.get("mapping")
+        lb = data.get("lb")
+        self.classes: Optional[List[str]] = lb.classes_.tolist() if lb is not None else None
+        self.class_indexes = {c: i for i, c in enumerate(self.classes)} if self.classes is not None else {}
+        self.states = LRUCache(max_size=config.ENCODER_STATES_SIZE, size_of=lambda _: 1, name="encoder states")
+
+    def is_supported(self) -> bool:
+        # Check if the encoding can be updated incrementally
+        if self.encoding_type in {EncodingType.BOOLEAN, EncodingType.FREQUENCY_BASED}:
+            # Label binarizers of less than three classes only output one column
+            return self.classes is not None and len(self.classes) > 2
+        elif self.encoding_type == EncodingType.SIMPLE_INDEX:
+            return self.mapping is not None
+        return False
+
+    def get_test_df(self, prefix: List[dict]) -> Optional[DataFrame]:
+        # Get the test dataframe of the prefix, None if the prefix can not be encoded incrementally
+        if not self.is_supported() or not prefix:
+            return None
+
+        case_id = prefix[-1][ColumnDefinition.CASE_ID]
+        state = self.states.get(case_id)
+
+        # Events arriving out of order are inserted in the middle of the prefix, so the state is built again
+        if state is None or not self.is_previous_prefix(state, prefix):
+            state = self.get_new_state()
+            for event in prefix:
+                self.update_state(state, event[ColumnDefinition.ACTIVITY])
+        else:
+            self.update_state(state, prefix[-1][ColumnDefinition.ACTIVITY])
+
+        state["last_event"] = prefix[-1]
+        self.states.put(case_id, state)
+
+        if state["unknown"]:
+            return None
+
+        return self.get_df_from_state(state, case_id)
+
+    @staticmethod
+    def is_previous_prefix(state: Dict[str, Any], prefix: List[dict]) -> bool:
+        # Check if the state is the one of the prefix without its last event. The kept prefixes of the cases are
+        # extended by the appended events, so the event before the last one is the same object the state encoded
+        # last, which is checked in O(1). Prefixes sent whole are new objects, so their activities are compared
+        if len(state["activities"]) != len(prefix) - 1:
+            return False
+        if prefix[-2] is state["last_event"]:
+            return True
+        return state["activities"] == [event[ColumnDefinition.ACTIVITY] for event in prefix[:-1]]
+
+    def get_new_state(self) -> Dict[str, Any]:
+        # Get the state of a case without any event
+        return {
+            "activities": [],
+            "last_event": None,
+            "counts": np.zeros(len(self.classes), dtype=int) if self.classes is not None else None,
+            "indexes": [],
+            "unknown": False
+        }
+
+    def update_state(self, state: Dict[str, Any], activity: str) -> None:
+        # Update the state by a new activity
+        state["activities"].append(activity)
+        if self.encoding_type in {EncodingType.BOOLEAN, EncodingType.FREQUENCY_BASED}:
+            # Unknown activities are binarized to zeros
+            index = self.class_indexes.get(activity)
+            if index is not None:
+                state["counts"][index] += 1
+        elif activity in self.mapping:
+            state["indexes"].append(self.mapping[activity])
+        else:
+            # Unknown activities are dropped by the dataframe encoding, which changes the length of the prefix
+            state["unknown"] = True
+
+    def get_df_from_state(self, state: Dict[str, Any], case_id: Any) -> DataFrame:
+        # Get the one row dataframe with the same columns as the dataframe encoding
+        if self.encoding_type == EncodingType.BOOLEAN:
+            values = np.where(state["counts"] > 0, 1, 0)
+            columns = self.classes
+        elif self.encoding_type == EncodingType.FREQUENCY_BASED:
+            values = state["counts"].copy()
+            columns = self.classes
+        else:
+            values = np.array(state["indexes"])
+            columns = [f"EVENT_{i}" for i in range(1, len(values) + 1)]
+        df = DataFrame(data=values.reshape(1, -1), columns=columns)
+        df[ColumnDefinition.CASE_ID] = case_id
+        return df
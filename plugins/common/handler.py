@@ -1,12 +1,11 @@
 import logging
-from datetime import datetime
-from typing import Any, Dict, Type
+from typing import Any, Dict, List, Optional, Type
 
 from pika import BasicProperties
 from pika.adapters.blocking_connection import BlockingChannel
 from pika.spec import Basic
 
-from core.confs import path
+from core.confs import config, path
 from core.enums.message import MessageType
 from core.functions.message.util import get_data_from_body
 
@@ -18,7 +17,7 @@ from plugins.common.initializer import (preprocess_and_train, activate_instance_
                                         get_instance_from_model_file, deactivate_instance)
 from plugins.common.sender import (send_online_report, send_data_report, send_error_report,
                                    send_dataset_prescription_result, send_streaming_ready,
-                                   send_streaming_prescription_result)
+                                   send_streaming_prescription_result, send_streaming_gap)
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -31,16 +30,20 @@ def callback(
         algo: Type[Algorithm],
         basic_info: Dict[str, Any]
 ) -> None:
-    message_type, data = get_data_from_body(body)
+    message_type, data = get_data_from_body(body, properties)
     print(message_type, properties.message_id, data)
     print("-" * 24)
 
+    deferred = False
+
     try:
         message_id = properties.message_id
-        if memory.processed_messages.get(message_id):
+        if not memory.processed_messages.add(message_id):
+            return
+        if message_type == MessageType.STREAMING_PRESCRIPTION_REQUEST:
+            deferred = add_streaming_prescription_request(ch, method.delivery_tag, data, algo, basic_info)
             return
-        else:
-            memory.processed_messages[message_id] = datetime.now()
+        flush_streaming_prescription_requests(ch, algo, basic_info)
         if message_type == MessageType.ONLINE_INQUIRY:
             handle_online_inquiry(basic_info)
         elif message_type == MessageType.TRAINING_DATA:
@@ -49,14 +52,12 @@ def callback(
             handle_dataset_prescription_request(ch, data, algo, basic_info)
         elif message_type == MessageType.STREAMING_PREPARE:
             handle_streaming_prepare(ch, data, algo, basic_info)
-        elif message_type == MessageType.STREAMING_PRESCRIPTION_REQUEST:
-            handle_streaming_prescription_request(ch, data, algo, basic_info)
         elif message_type == MessageType.STREAMING_STOP:
-            deactivate_instance(data["project_id"])
+            handle_streaming_stop(data["project_id"])
     except Exception as e:
         logger.warning(f"Callback error: {e}", exc_info=True)
     finally:
-        ch.basic_ack(delivery_tag=method.delivery_tag)
+        deferred or ch.basic_ack(delivery_tag=method.delivery_tag)
 
 
 def handle_online_inquiry(basic_info: dict) -> None:
@@ -138,6 +139,8 @@ def handle_streaming_prepare(ch: BlockingChannel, data: dict, algo: Type[Algorit
     project_id = data["project_id"]
     model_name = data["model_name"]
     additional_info = data["additional_info"]
+    if data.get("columns"):
+        memory.streaming_columns[project_id] = data["columns"]
     plugin_id = activate_instance_from_model_file(
         algo=algo,
         algo_data={
@@ -153,23 +156,123 @@ def handle_streaming_prepare(ch: BlockingChannel, data: dict, algo: Type[Algorit
     send_streaming_ready(ch, project_id, plugin_id)
 
 
-def handle_streaming_prescription_request(ch: BlockingChannel, data: dict, algo: Type[Algorithm],
-                                          basic_info: Dict[str, Any]) -> None:
+def handle_streaming_stop(project_id: int) -> None:
+    # Forget the streaming state of the project
+    memory.streaming_columns.pop(project_id, None)
+    for key in memory.streaming_prefixes.keys():
+        if key[0] == project_id:
+            memory.streaming_prefixes.pop(key)
+    deactivate_instance(project_id)
+
+
+def add_streaming_prescription_request(ch: BlockingChannel, delivery_tag: int, data: dict, algo: Type[Algorithm],
+                                       basic_info: Dict[str, Any]) -> bool:
+    # Add the request to the batch of its project and model, the batch is handled once it is full or the window ends,
+    # a request appending to a prefix the plugin does not have is reported as a gap instead, so core sends the prefix
+    prefix = get_prefix_from_request(data)
+    if prefix is None:
+        logger.warning(f"Gap before event {data['event_id']} of case {data['case_id']}, asking for the prefix")
+        send_streaming_gap(ch, data["project_id"], data["event_id"], data["case_id"], data["sequence"])
+        return False
+    data["data"] = prefix
+    key = (data["project_id"], data["model_name"])
+    requests = memory.streaming_requests.setdefault(key, [])
+    requests.append({"delivery_tag": delivery_tag, "data": data})
+    if len(requests) >= config.STREAMING_BATCH_SIZE:
+        handle_streaming_prescription_requests(ch, memory.streaming_requests.pop(key), algo, basic_info)
+    elif memory.streaming_window is None:
+        memory.streaming_window = ch.connection.call_later(
+            config.STREAMING_BATCH_WINDOW,
+            lambda: end_streaming_window(ch, algo, basic_info)
+        )
+    return True
+
+
+def get_prefix_from_request(data: dict) -> Optional[List[dict]]:
+    # Get the prefix of the request, which has either the whole prefix or only the event appended to the prefix
+    # of the case kept since the previous request. None if the kept prefix is missing or of another length
     project_id = data["project_id"]
-    model_name = data["model_name"]
-    event_id = data["event_id"]
-    prefix = data["data"]
-    additional_info = data["additional_info"]
-    instance = get_instance_from_model_file(algo, {
-        "project_id": project_id,
-        "model_name": model_name,
-        "basic_info": basic_info,
-        "additional_info": additional_info
-    })
+    if data.get("columns"):
+        memory.streaming_columns[project_id] = data["columns"]
+
+    if "data" in data:
+        prefix = data["data"]
+    elif "rows" in data:
+        prefix = get_elements_from_rows(project_id, data["rows"])
+    else:
+        kept_prefix = memory.streaming_prefixes.get((project_id, data["case_id"]))
+        if kept_prefix is None or len(kept_prefix) != data["sequence"] - 1:
+            return None
+        events = [data["event"]] if "event" in data else get_elements_from_rows(project_id, [data["row"]])
+        prefix = None if events is None else kept_prefix + events
+
+    # Requests of old cores have no case id, so their prefixes are not kept
+    if prefix is not None and "case_id" in data:
+        memory.streaming_prefixes.put((project_id, data["case_id"]), prefix)
+    return prefix
+
+
+def get_elements_from_rows(project_id: int, rows: List[list]) -> Optional[List[dict]]:
+    # Get the elements named by the column dictionary of the project, None if the plugin has lost the dictionary
+    columns = memory.streaming_columns.get(project_id)
+    if columns is None:
+        return None
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def end_streaming_window(ch: BlockingChannel, algo: Type[Algorithm], basic_info: Dict[str, Any]) -> None:
+    # Handle the pending batches when the window ends
+    memory.streaming_window = None
+    flush_streaming_prescription_requests(ch, algo, basic_info)
+
+
+def flush_streaming_prescription_requests(ch: BlockingChannel, algo: Type[Algorithm],
+                                          basic_info: Dict[str, Any]) -> None:
+    # Handle all pending batches in arrival order, so other messages are never handled before earlier requests
+    if memory.streaming_window is not None:
+        ch.connection.remove_timeout(memory.streaming_window)
+        memory.streaming_window = None
+    while memory.streaming_requests:
+        key = next(iter(memory.streaming_requests))
+        handle_streaming_prescription_requests(ch, memory.streaming_requests.pop(key), algo, basic_info)
+
+
+def handle_streaming_prescription_requests(ch: BlockingChannel, requests: List[Dict[str, Any]],
+                                           algo: Type[Algorithm], basic_info: Dict[str, Any]) -> None:
+    # Predict the prefixes of a batch together, then send the result of each event
+    try:
+        data = requests[0]["data"]
+        project_id = data["project_id"]
+        instance = get_instance_from_model_file(algo, {
+            "project_id": project_id,
+            "model_name": data["model_name"],
+            "basic_info": basic_info,
+            "additional_info": data["additional_info"]
+        })
+        prefixes = [request["data"]["data"] for request in requests]
+        results = get_streaming_prescription_results(instance, prefixes)
+        for request, result in zip(requests, results):
+            send_streaming_prescription_result(ch, project_id, request["data"]["event_id"], result)
+    except Exception as e:
+        logger.warning(f"Handle streaming prescription requests failed: {e}", exc_info=True)
+    finally:
+        for request in requests:
+            ch.basic_ack(delivery_tag=request["delivery_tag"])
+
+
+def get_streaming_prescription_results(instance: Algorithm, prefixes: List[List[dict]]) -> List[dict]:
+    # Predict the prefixes together, they are predicted one by one if the batch fails
     try:
-        result = instance.predict(prefix)
+        return instance.predict_batch(prefixes)
     except Exception as e:
-        logger.warning(f"Predicting prefix failed: {e}", exc_info=True)
-        result = instance.get_null_output(f"Predicting prefix failed： {e}")
+        logger.warning(f"Predicting prefixes failed: {e}", exc_info=True)
 
-    send_streaming_prescription_result(ch, project_id, event_id, result)
+    results = []
+    for prefix in prefixes:
+        try:
+            result = instance.predict(prefix)
+        except Exception as e:
+            logger.warning(f"Predicting prefix failed: {e}", exc_info=True)
+            result = instance.get_null_output(f"Predicting prefix failed： {e}")
+        results.append(result)
+    return results
@@ -1,10 +1,19 @@
 import logging
-from datetime import datetime
-from typing import Any, Dict
+from multiprocessing.pool import Pool
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.confs import config
+from core.functions.common.cache import DedupStore, LRUCache
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
 # Data stored in memory
 instances: Dict[int, Any] = {}
-processed_messages: Dict[str, datetime] = {}
+processed_messages = DedupStore(ttl=config.PROCESSED_MESSAGES_TTL, max_size=config.PROCESSED_MESSAGES_SIZE,
+                                name="processed messages")
+pool: Optional[Pool] = None
+streaming_columns: Dict[int, List[str]] = {}
+streaming_prefixes = LRUCache(max_size=config.PREFIX_CACHE_SIZE, size_of=len, name="streaming prefixes")
+streaming_requests: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+streaming_window: Optional[Any] = None
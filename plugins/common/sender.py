@@ -96,3 +96,18 @@ def send_streaming_prescription_result(ch: BlockingChannel, project_id: int, eve
         message_type=MessageType.STREAMING_PRESCRIPTION_RESULT,
         data={"project_id": project_id, "plugin_key": config.APP_ID, "event_id": event_id, "data": result}
     )
+
+
+def send_streaming_gap(ch: BlockingChannel, project_id: int, event_id: int, case_id: int, sequence: int) -> bool:
+    return send_message_by_channel(
+        channel=ch,
+        receiver_id="core",
+        message_type=MessageType.STREAMING_GAP,
+        data={
+            "project_id": project_id,
+            "plugin_key": config.APP_ID,
+            "event_id": event_id,
+            "case_id": case_id,
+            "sequence": sequence
+        }
+    )
@@ -1,4 +1,5 @@
 import logging
+from multiprocessing import Pool
 from time import sleep
 from typing import Any, Dict, Type
 
@@ -9,9 +10,9 @@ from tzlocal import get_localzone
 
 from core.confs import config
 from core.enums.message import MessageType
-from core.functions.common.timer import log_rotation, processed_messages_clean
-from core.functions.common.etc import get_message_id
-from core.functions.message.util import get_connection, get_body
+from core.functions.common.timer import log_dedup_stats, log_rotation, processed_messages_clean
+from core.functions.common.etc import get_message_id, get_processes_number
+from core.functions.message.util import get_connection, get_message
 from core.starters.rabbitmq import parameters
 
 from plugins.common import memory
@@ -31,10 +32,16 @@ def plugin_scheduler(basic_info: dict) -> None:
     scheduler = BackgroundScheduler(job_defaults={"misfire_grace_time": 300}, timezone=str(get_localzone()))
     scheduler.add_job(log_rotation, "cron", hour=23, minute=59)
     scheduler.add_job(processed_messages_clean, "interval", [memory.processed_messages], minutes=5)
+    scheduler.add_job(log_dedup_stats, "interval", [memory.processed_messages], minutes=30)
     scheduler.add_job(send_online_report, "interval", [basic_info], minutes=14)
     scheduler.start()
 
 
+def plugin_pool() -> None:
+    # Start the worker pool once, so the encoding of large inputs does not pay for the pool startup
+    memory.pool = Pool(get_processes_number())
+
+
 def plugin_run(algo: Type[Algorithm], basic_info: Dict[str, Any], prefetch_count: int = 0) -> None:
     # Start the rabbitmq connection
     connection = None
@@ -55,11 +62,12 @@ def plugin_run(algo: Type[Algorithm], basic_info: Dict[str, Any], prefetch_count
                 basic_info=basic_info
             )
         )
+        body, codec_properties = get_message("core", MessageType.ONLINE_REPORT, basic_info)
         channel.basic_publish(
             exchange="",
             routing_key="core",
-            body=get_body(MessageType.ONLINE_REPORT, basic_info),
-            properties=BasicProperties(message_id=get_message_id())
+            body=body,
+            properties=BasicProperties(message_id=get_message_id(), **codec_properties)
         )
         try:
             channel.start_consuming()
@@ -72,3 +80,6 @@ def plugin_run(algo: Type[Algorithm], basic_info: Dict[str, Any], prefetch_count
     finally:
         if connection and connection.is_open:
             connection.close()
+        if memory.pool is not None:
+            memory.pool.terminate()
+            memory.pool = None
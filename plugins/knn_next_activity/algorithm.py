@@ -1,7 +1,6 @@
 import logging
 from typing import Any, Dict, List
 
-import pandas as pd
 from pandas import DataFrame
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier
@@ -9,7 +8,7 @@ from sklearn.neighbors import KNeighborsClassifier
 from core.enums.dataset import OutcomeType
 from core.enums.definition import ColumnDefinition
 from plugins.common.algorithm import Algorithm
-from plugins.common.dataset import get_encoded_dfs_by_activity
+from plugins.common.dataset import get_encoded_matrices_by_activity
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -18,15 +17,14 @@ logger = logging.getLogger(__name__)
 class KNNAlgorithm(Algorithm):
     def __init__(self, algo_data: Dict[str, Any]):
         super().__init__(algo_data)
-        self.__training_dfs: Dict[int, DataFrame] = {}
+        self.__training_matrices: Dict[int, Dict[str, Any]] = {}
 
     def preprocess(self) -> str:
         # Pre-process the data
-        self.__training_dfs, data = get_encoded_dfs_by_activity(
+        self.__training_matrices, data = get_encoded_matrices_by_activity(
             original_df=self.get_df(),
             encoding_type=self.get_parameter_value("encoding"),
             outcome_type=OutcomeType.LAST_ACTIVITY,
-            include_treatment=False,
             for_test=False,
             existing_data={}
         )
@@ -39,10 +37,9 @@ class KNNAlgorithm(Algorithm):
         # Train the model
         models = {}
         scores = {}
-        for length in self.__training_dfs:
-            df = self.__training_dfs[length]
-            x = df.drop([ColumnDefinition.OUTCOME, ColumnDefinition.CASE_ID], axis=1)
-            y = df[ColumnDefinition.OUTCOME]
+        for length in self.__training_matrices:
+            x = self.__training_matrices[length]["x"]
+            y = self.__training_matrices[length]["y"]
             x_train, x_val, y_train, y_val = train_test_split(x, y, test_size=0.2)
             knn = KNeighborsClassifier(n_neighbors=self.get_parameter_value("n_neighbors"))
             knn.fit(x_train, y_train)
@@ -54,52 +51,53 @@ class KNNAlgorithm(Algorithm):
 
     def predict(self, prefix: List[dict]) -> dict:
         # Predict the result by using the given prefix
-        length = len(prefix)
-        model = self.get_data()["models"].get(length)
-        if model is None:
-            return self.get_null_output("The model is not trained for the given prefix length")
-
-        # Get the test df
-        raw_test_df = pd.DataFrame(prefix)
-        test_df = list(get_encoded_dfs_by_activity(
-            original_df=raw_test_df,
-            encoding_type=self.get_parameter_value("encoding"),
-            outcome_type=OutcomeType.LAST_ACTIVITY,
-            include_treatment=False,
-            for_test=True,
-            existing_data=self.get_data()
-        )[0].values())[0]
+        return self.predict_batch([prefix])[0]
 
-        # Predict the next activity
-        prediction = model.predict(test_df.drop([ColumnDefinition.CASE_ID], axis=1))[0]
+    def predict_batch(self, prefixes: List[List[dict]]) -> List[dict]:
+        # Predict the results of the prefixes, the model is called once for each length
+        results = {}
         reversed_mapping = {v: k for k, v in self.get_data()["mapping"].items()}
-        output = reversed_mapping.get(prediction, "Unknown")
-        return self.get_prescription_output(output, length, f"{self.get_parameter_value('encoding')}-length-{length}")
+
+        # Get the test df for each length
+        test_dfs = self.get_prefix_test_dfs_by_length(prefixes, OutcomeType.LAST_ACTIVITY)
+
+        # Predict the next activities
+        for length, (indexes, test_df) in test_dfs.items():
+            model = self.get_data()["models"].get(length)
+            if model is None:
+                for i in indexes:
+                    results[i] = self.get_null_output("The model is not trained for the given prefix length")
+                continue
+            predictions = model.predict(test_df.drop([ColumnDefinition.CASE_ID], axis=1).to_numpy())
+            model_code = f"{self.get_parameter_value('encoding')}-length-{length}"
+            for i, prediction in zip(indexes, predictions):
+                output = reversed_mapping.get(prediction, "Unknown")
+                results[i] = self.get_prescription_output(output, length, model_code)
+
+        return [results[i] for i in range(len(prefixes))]
 
     def predict_df(self, df: DataFrame) -> dict:
         # Predict the result by using the given dataframe
         result = {}
         reversed_mapping = {v: k for k, v in self.get_data()["mapping"].items()}
 
-        # Get the test df for each length
-        test_dfs, _ = get_encoded_dfs_by_activity(
+        # Get the test matrix for each length
+        test_matrices, _ = get_encoded_matrices_by_activity(
             original_df=df,
             encoding_type=self.get_parameter_value("encoding"),
             outcome_type=OutcomeType.LAST_ACTIVITY,
-            include_treatment=False,
             for_test=True,
             existing_data=self.get_data()
         )
 
         # Get the result for each length
-        for length, test_df in test_dfs.items():
+        for length, test_matrix in test_matrices.items():
             model = self.get_data()["models"].get(length)
             if model is None:
                 continue
-            predictions = model.predict(test_df.drop([ColumnDefinition.CASE_ID], axis=1))
+            predictions = model.predict(test_matrix["x"])
             outputs = [reversed_mapping.get(prediction, "Unknown") for prediction in predictions]
-            for i in range(len(test_df)):
-                case_id = test_df.iloc[i][ColumnDefinition.CASE_ID]
+            for i, case_id in enumerate(test_matrix["case_ids"]):
                 output = outputs[i]
                 result[case_id] = self.get_prescription_output(
                     output=output,
@@ -1,6 +1,6 @@
 import logging
 
-from plugins.common.starter import plugin_scheduler, plugin_run
+from plugins.common.starter import plugin_pool, plugin_scheduler, plugin_run
 from plugins.knn_next_activity.algorithm import KNNAlgorithm
 from plugins.knn_next_activity.config import basic_info
 
@@ -8,5 +8,6 @@ from plugins.knn_next_activity.config import basic_info
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
+    plugin_pool()
     plugin_scheduler(basic_info)
     plugin_run(KNNAlgorithm, basic_info)
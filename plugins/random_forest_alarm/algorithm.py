@@ -1,7 +1,6 @@
 import logging
 from typing import Any, Dict, List, Tuple
 
-import pandas as pd
 from pandas import DataFrame
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
@@ -9,7 +8,7 @@ from sklearn.model_selection import train_test_split
 from core.enums.dataset import OutcomeType
 from core.enums.definition import ColumnDefinition
 from plugins.common.algorithm import Algorithm
-from plugins.common.dataset import get_encoded_dfs_by_activity
+from plugins.common.dataset import get_encoded_matrices_by_activity
 
 # Enable logging
 logger = logging.getLogger(__name__)
@@ -26,15 +25,14 @@ def get_negative_proba(predictions: List[Tuple[int, float]]) -> float:
 class RandomAlgorithm(Algorithm):
     def __init__(self, algo_data: Dict[str, Any]):
         super().__init__(algo_data)
-        self.__training_dfs: Dict[int, DataFrame] = {}
+        self.__training_matrices: Dict[int, Dict[str, Any]] = {}
 
     def preprocess(self) -> str:
         # Pre-process the data
-        self.__training_dfs, data = get_encoded_dfs_by_activity(
+        self.__training_matrices, data = get_encoded_matrices_by_activity(
             original_df=self.get_df(),
             encoding_type=self.get_parameter_value("encoding"),
             outcome_type=OutcomeType.LABELLED,
-            include_treatment=False,
             for_test=False,
             existing_data={}
         )
@@ -47,10 +45,9 @@ class RandomAlgorithm(Algorithm):
         # Train the model
         models = {}
         scores = {}
-        for length in self.__training_dfs:
-            df = self.__training_dfs[length]
-            x = df.drop([ColumnDefinition.OUTCOME, ColumnDefinition.CASE_ID], axis=1)
-            y = df[ColumnDefinition.OUTCOME]
+        for length in self.__training_matrices:
+            x = self.__training_matrices[length]["x"]
+            y = self.__training_matrices[length]["y"]
             x_train, x_val, y_train, y_val = train_test_split(x, y, test_size=0.2)
             rf = RandomForestClassifier()
             rf.fit(x_train, y_train)
@@ -62,53 +59,52 @@ class RandomAlgorithm(Algorithm):
 
     def predict(self, prefix: List[dict]) -> dict:
         # Predict the result
-        length = len(prefix)
-        model = self.get_data()["models"].get(length)
-        if model is None:
-            return self.get_null_output("The model is not trained for the given prefix length")
-
-        # Get the test df
-        raw_test_df = pd.DataFrame(prefix)
-        test_df = list(get_encoded_dfs_by_activity(
-            original_df=raw_test_df,
-            encoding_type=self.get_parameter_value("encoding"),
-            outcome_type=OutcomeType.LABELLED,
-            include_treatment=False,
-            for_test=True,
-            existing_data=self.get_data()
-        )[0].values())[0]
+        return self.predict_batch([prefix])[0]
+
+    def predict_batch(self, prefixes: List[List[dict]]) -> List[dict]:
+        # Predict the results of the prefixes, the model is called once for each length
+        results = {}
+
+        # Get the test df for each length
+        test_dfs = self.get_prefix_test_dfs_by_length(prefixes, OutcomeType.LABELLED)
 
         # Predict the probability of negative outcomes
-        predictions = list(
-            zip(model.classes_, model.predict_proba(test_df.drop([ColumnDefinition.CASE_ID], axis=1)).tolist()[0])
-        )
-        output = round(get_negative_proba(predictions), 4)
-        return self.get_prescription_output(output, length, f"{self.get_parameter_value('encoding')}-length-{length}")
+        for length, (indexes, test_df) in test_dfs.items():
+            model = self.get_data()["models"].get(length)
+            if model is None:
+                for i in indexes:
+                    results[i] = self.get_null_output("The model is not trained for the given prefix length")
+                continue
+            x = test_df.drop([ColumnDefinition.CASE_ID], axis=1).to_numpy()
+            model_code = f"{self.get_parameter_value('encoding')}-length-{length}"
+            for i, prediction in zip(indexes, model.predict_proba(x).tolist()):
+                output = round(get_negative_proba(list(zip(model.classes_, prediction))), 4)
+                results[i] = self.get_prescription_output(output, length, model_code)
+
+        return [results[i] for i in range(len(prefixes))]
 
     def predict_df(self, df: DataFrame) -> dict:
         # Predict the result by using the given dataframe
         result = {}
 
-        # Get the test df for each length
-        test_dfs, _ = get_encoded_dfs_by_activity(
+        # Get the test matrix for each length
+        test_matrices, _ = get_encoded_matrices_by_activity(
             original_df=df,
             encoding_type=self.get_parameter_value("encoding"),
             outcome_type=OutcomeType.LABELLED,
-            include_treatment=False,
             for_test=True,
             existing_data=self.get_data()
         )
 
         # Get the result for each length
-        for length, test_df in test_dfs.items():
+        for length, test_matrix in test_matrices.items():
             model = self.get_data()["models"].get(length)
             if model is None:
                 continue
-            predictions = model.predict_proba(test_df.drop([ColumnDefinition.CASE_ID], axis=1))
+            predictions = model.predict_proba(test_matrix["x"])
             outputs = [round(get_negative_proba(list(zip(model.classes_, prediction.tolist()))), 4)
                        for prediction in predictions]
-            for i in range(len(test_df)):
-                case_id = test_df.iloc[i][ColumnDefinition.CASE_ID]
+            for i, case_id in enumerate(test_matrix["case_ids"]):
                 result[case_id] = self.get_prescription_output(
                     output=outputs[i],
                     model_key=length,
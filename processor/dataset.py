@@ -10,6 +10,7 @@ from core.functions.common.dataset import (get_timestamped_dataframe, get_transi
                                            get_renamed_dataframe)
 from core.functions.common.etc import get_processes_number
 from core.functions.definition.util import get_defined_column_name
+from processor import memory
 from processor.condition import check_or_conditions
 
 
@@ -94,51 +95,44 @@ def get_timestamped_dataframe_by_transition(df: DataFrame, definition: definitio
     complete_transition = definition.complete_transition
     abort_transition = definition.abort_transition
 
-    df = df.sort_values([case_id_column, timestamp_column])
+    df = df.sort_values([case_id_column, timestamp_column], kind="mergesort")
+    transitions = df[transition_column].str.upper()
+    df = df[(transitions == start_transition.upper()) | transitions.isin([complete_transition, abort_transition])]
     df = df.reset_index(drop=True)
+    is_start = (df[transition_column].str.upper() == start_transition.upper()).to_numpy()
+    is_end = ~is_start
+
+    # Please note that not all activities must have start transition
+    # Please note that the same kind of activity can occur multiple times in the same case
+    # Inside each (case, activity) group, an end event consumes the start event right before it,
+    # a start event followed by another start event is overwritten, and a trailing start event stays pending
+    grouped_positions = pd.Series(np.arange(len(df))).groupby([df[case_id_column], df[activity_column]],
+                                                              sort=False, dropna=False)
+    previous_positions = grouped_positions.shift(1).to_numpy()
+    next_positions = grouped_positions.shift(-1).to_numpy()
+    has_previous = ~np.isnan(previous_positions)
+    previous_is_start = np.zeros(len(df), dtype=bool)
+    previous_is_start[has_previous] = is_start[previous_positions[has_previous].astype(int)]
+    paired_ends = is_end & previous_is_start
+    single_ends = is_end & ~previous_is_start
+    pending_starts = is_start & np.isnan(next_positions)
+
+    # Paired events keep the attributes of the start event, others keep their own attributes
+    source_positions = np.concatenate([previous_positions[paired_ends].astype(int),
+                                       np.flatnonzero(single_ends),
+                                       np.flatnonzero(pending_starts)])
+    end_positions = np.concatenate([np.flatnonzero(paired_ends),
+                                    np.flatnonzero(single_ends),
+                                    np.flatnonzero(pending_starts)])
+    result_df = df.iloc[source_positions].reset_index(drop=True)
+    result_df[ColumnDefinition.START_TIMESTAMP] = result_df[timestamp_column]
+    result_df[ColumnDefinition.END_TIMESTAMP] = df[timestamp_column].iloc[end_positions].reset_index(drop=True)
+
+    result_df = result_df.drop(columns=[transition_column, timestamp_column])
+    result_df = result_df.sort_values([case_id_column, ColumnDefinition.START_TIMESTAMP,
+                                       ColumnDefinition.END_TIMESTAMP], kind="mergesort")
 
-    event_df_list = []
-
-    for case_id in df[case_id_column].unique():
-        case_df = df[df[case_id_column] == case_id]
-        events = {}
-        pending_events = {}
-        for i, row in case_df.iterrows():
-            activity = row[activity_column]
-            # Please note that not all activities must have start transition
-            # Please note that the same kind of activity can occur multiple times in the same case
-            if row[transition_column].upper() == start_transition.upper():
-                # If activity has start transition, add to pending events
-                pending_events[activity] = row
-                pending_events[activity][ColumnDefinition.START_TIMESTAMP] = row[timestamp_column]
-                pending_events[activity][ColumnDefinition.END_TIMESTAMP] = row[timestamp_column]
-            elif row[transition_column].upper() in [complete_transition, abort_transition]:
-                if activity in pending_events:
-                    # If activity has start and end transition, get start time from pending events, then add to events
-                    events[i] = pending_events.pop(activity)
-                    events[i][ColumnDefinition.END_TIMESTAMP] = row[timestamp_column]
-                else:
-                    # If activity only has end transition, add to events directly
-                    events[i] = row
-                    events[i][ColumnDefinition.START_TIMESTAMP] = row[timestamp_column]
-                    events[i][ColumnDefinition.END_TIMESTAMP] = row[timestamp_column]
-
-        # Events to list
-        events_list = list(events.values())
-        pending_events_list = list(pending_events.values())
-        events_list.extend(pending_events_list)
-
-        # Turn events to dataframe
-        events_df = pd.DataFrame(events_list)
-        events_df = events_df.sort_values([ColumnDefinition.START_TIMESTAMP, ColumnDefinition.END_TIMESTAMP])
-        events_df = events_df.reset_index(drop=True)
-        event_df_list.append(events_df)
-
-    df = pd.concat(event_df_list, ignore_index=True)
-    df = df.drop(columns=[transition_column, timestamp_column])
-    df = df.sort_values([case_id_column, ColumnDefinition.START_TIMESTAMP, ColumnDefinition.END_TIMESTAMP])
-
-    return df
+    return result_df
 
 
 def get_numbered_dataframe(df: DataFrame, columns_definition: dict[str, ColumnDefinition]) -> DataFrame:
@@ -264,15 +258,30 @@ def label_for_treatment(data: str | int | float | bool) -> bool | None:
 
 def process_df_parallel(target: callable, df: DataFrame, definition: definition_schema.Definition,
                         args: tuple) -> DataFrame:
-    # Process dataframe parallel
+    # Process dataframe parallel, every worker of the pool gets a shard of whole cases
     case_id_column = get_defined_column_name(definition.columns_definition, ColumnDefinition.CASE_ID)
-    processes_number = get_processes_number()
-    unique_cases = df[case_id_column].unique()
-    case_splits = np.array_split(unique_cases, processes_number)
-    df_splits = [df[df[case_id_column].isin(case_split)] for case_split in case_splits if len(case_split) > 0]
+    df_splits = get_case_partitioned_splits(df, case_id_column, get_processes_number())
 
-    with Pool(processes_number) as pool:
-        results = pool.starmap(target, [(df_split,) + args for df_split in df_splits])
+    if len(df_splits) <= 1:
+        return target(df, *args)
+
+    iterable = [(df_split,) + args for df_split in df_splits]
+    if memory.pool is not None:
+        results = memory.pool.starmap(target, iterable, chunksize=1)
+    else:
+        with Pool(get_processes_number()) as pool:
+            results = pool.starmap(target, iterable, chunksize=1)
 
     result_df = pd.concat(results)
     return result_df
+
+
+def get_case_partitioned_splits(df: DataFrame, case_id_column: str, splits_number: int) -> list[DataFrame]:
+    # Split dataframe into shards of whole cases with similar number of events, using one groupby pass
+    if len(df) == 0:
+        return []
+    case_codes, _ = pd.factorize(df[case_id_column], use_na_sentinel=False)
+    case_sizes = np.bincount(case_codes)
+    events_before_case = np.cumsum(case_sizes) - case_sizes
+    case_splits = np.minimum(events_before_case * splits_number // len(df), splits_number - 1)
+    return [df_split for _, df_split in df.groupby(case_splits[case_codes], sort=True)]
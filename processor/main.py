@@ -1,4 +1,5 @@
 import logging
+from multiprocessing import Pool
 from time import sleep
 
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -6,7 +7,8 @@ from pika.exceptions import ConnectionClosedByBroker
 from tzlocal import get_localzone
 
 from core.confs import config
-from core.functions.common.timer import log_rotation, processed_messages_clean
+from core.functions.common.etc import get_processes_number
+from core.functions.common.timer import log_dedup_stats, log_rotation, processed_messages_clean
 from core.functions.message.util import get_connection
 from core.starters.rabbitmq import parameters
 from processor import memory
@@ -24,9 +26,15 @@ def processor_scheduler() -> None:
     scheduler = BackgroundScheduler(job_defaults={"misfire_grace_time": 300}, timezone=str(get_localzone()))
     scheduler.add_job(log_rotation, "cron", hour=23, minute=59)
     scheduler.add_job(processed_messages_clean, "interval", [memory.processed_messages], minutes=5)
+    scheduler.add_job(log_dedup_stats, "interval", [memory.processed_messages], minutes=30)
     scheduler.start()
 
 
+def processor_pool() -> None:
+    # Start the worker pool once, so the processing requests do not pay for the pool startup
+    memory.pool = Pool(get_processes_number())
+
+
 def processor_run() -> None:
     # Start the rabbitmq connection
     connection = None
@@ -47,8 +55,12 @@ def processor_run() -> None:
     finally:
         if connection and connection.is_open:
             connection.close()
+        if memory.pool is not None:
+            memory.pool.terminate()
+            memory.pool = None
 
 
 if __name__ == "__main__":
+    processor_pool()
     processor_scheduler()
     processor_run()
@@ -1,9 +1,15 @@
 import logging
 from datetime import datetime
+from multiprocessing.pool import Pool
+
+from core.confs import config
+from core.functions.common.cache import DedupStore
 
 # Enable logging
 logger = logging.getLogger(__name__)
 
 # Data stored in memory
-processed_messages: dict[str, datetime] = {}
+processed_messages = DedupStore(ttl=config.PROCESSED_MESSAGES_TTL, max_size=config.PROCESSED_MESSAGES_SIZE,
+                                name="processed messages")
 pending_dfs: dict[str, dict[str, datetime | str | float]] = {}
+pool: Pool | None = None
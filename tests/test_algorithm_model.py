@@ -0,0 +1,44 @@
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from core.confs import path
+from plugins.common.algorithm import Algorithm
+
+
+@pytest.fixture
+def model_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # The model files are written to a temporary directory
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(path.PLUGIN_MODEL_PATH)
+    return tmp_path / path.PLUGIN_MODEL_PATH
+
+
+def get_algorithm(model_name: str | None) -> Algorithm:
+    return Algorithm({"project_id": 1, "plugin_id": 2, "parameters": {}, "model_name": model_name,
+                      "additional_info": {}})
+
+
+def test_update_model_rewrites_loaded_file(model_path: Path) -> None:
+    # The model file the instance was loaded from gets the current data, no temporary file is left
+    with open(model_path / "model.pkl", "wb") as f:
+        pickle.dump({"project_id": 1, "plugin_id": 2, "parameters": {}, "training_dfs": {2: "df"}}, f)
+    algorithm = get_algorithm("model.pkl")
+    assert algorithm.load_model()
+
+    algorithm.set_data_value("models", {2: "fitted"})
+    del algorithm.get_data()["training_dfs"][2]
+    assert algorithm.update_model()
+
+    with open(model_path / "model.pkl", "rb") as f:
+        assert pickle.load(f) == {"project_id": 1, "plugin_id": 2, "parameters": {}, "training_dfs": {},
+                                  "models": {2: "fitted"}}
+    assert os.listdir(model_path) == ["model.pkl"]
+
+
+def test_update_model_without_model_file(model_path: Path) -> None:
+    # An instance which was not loaded from a model file has nothing to update
+    assert not get_algorithm(None).update_model()
+    assert os.listdir(model_path) == []
@@ -0,0 +1,107 @@
+import pytest
+
+import core.functions.common.cache as cache
+from core.functions.common.cache import DedupStore, LRUCache
+
+
+class Clock:
+    # Clock replacing the monotonic time of the cache module
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache, "monotonic", clock)
+    return clock
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    # The entry read last is kept, the other old entry is evicted once the budget is exceeded
+    lru_cache = LRUCache(max_size=3, size_of=len)
+    lru_cache.put("a", "x")
+    lru_cache.put("b", "x")
+    lru_cache.put("c", "x")
+    assert lru_cache.get("a") == "x"
+
+    lru_cache.put("d", "x")
+
+    assert lru_cache.keys() == ["c", "a", "d"]
+    assert lru_cache.get("b") is None
+    assert lru_cache.get_stats() == {"entries": 3, "size": 3, "max_size": 3, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_lru_cache_counts_sizes() -> None:
+    # The size follows replaced, popped and evicted entries
+    lru_cache = LRUCache(max_size=10, size_of=len)
+    lru_cache.put("a", "xxxx")
+    lru_cache.put("b", "xxx")
+    assert lru_cache.size == 7
+
+    lru_cache.put("a", "xx")
+    assert lru_cache.size == 5
+
+    assert lru_cache.pop("b") == "xxx"
+    assert lru_cache.pop("b", "missing") == "missing"
+    assert lru_cache.size == 2
+
+    lru_cache.put("c", "xxxxxxxxx")
+    assert lru_cache.keys() == ["c"] and lru_cache.size == 9
+
+
+def test_lru_cache_skips_value_over_budget() -> None:
+    # A value larger than the budget is not cached, and the previous value of the key is removed
+    lru_cache = LRUCache(max_size=3, size_of=len)
+    lru_cache.put("a", "x")
+    lru_cache.put("b", "x")
+
+    assert not lru_cache.put("a", "xxxx")
+
+    assert "a" not in lru_cache and lru_cache.keys() == ["b"] and lru_cache.size == 1
+
+
+def test_dedup_store_counts_duplicates(clock: Clock) -> None:
+    # An id is only added once while it is stored
+    store = DedupStore(ttl=10, max_size=10)
+
+    assert store.add("a")
+    assert not store.add("a")
+    assert not store.add("a")
+    assert store.add("b")
+
+    assert store.get_stats()["duplicates"] == 2
+    assert len(store) == 2
+
+
+def test_dedup_store_expires_from_head(clock: Clock) -> None:
+    # The ids older than the ttl are removed from the head, the newer ones are kept
+    store = DedupStore(ttl=10, max_size=10)
+    store.add("a")
+    clock.now += 5
+    store.add("b")
+    clock.now += 6
+
+    assert store.expire() == 1
+    assert "a" not in store and "b" in store
+
+    clock.now += 5
+    assert store.add("a")
+    assert "b" not in store
+    assert store.get_stats()["expirations"] == 2
+
+
+def test_dedup_store_evicts_oldest_at_capacity(clock: Clock) -> None:
+    # The oldest ids are evicted once the capacity is reached, so they are accepted again
+    store = DedupStore(ttl=10, max_size=2)
+    store.add("a")
+    store.add("b")
+    store.add("c")
+
+    assert len(store) == 2 and "a" not in store
+    assert store.get_stats()["evictions"] == 1
+    assert store.add("a")
+    assert "b" not in store
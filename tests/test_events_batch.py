@@ -0,0 +1,89 @@
+from threading import Event as ThreadEvent
+from typing import Any
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+import core.crud.case as case_crud
+import core.functions.event.job as event_job
+import core.services.event as event_service
+from core.enums.definition import ColumnDefinition
+from core.models.case import Case
+from core.models.event import Event
+from core.starters import memory
+
+
+@pytest.fixture
+def streaming(project: Any, monkeypatch: pytest.MonkeyPatch) -> dict[str, list]:
+    # The project is streaming, the prefixes sent to the plugins and the published events are recorded
+    recorded = {"sent": [], "published": []}
+    memory.streaming_projects[project.id] = {"finished": ThreadEvent(), "type": "streaming"}
+    monkeypatch.setattr(event_job, "send_streaming_prescription_request_to_all_plugins",
+                        lambda **kwargs: recorded["sent"].append({**kwargs, "prefix": list(kwargs["prefix"])}))
+    monkeypatch.setattr(event_service, "publish_prescribed_event",
+                        lambda project_id, event_id: recorded["published"].append(event_id))
+
+    yield recorded
+
+    event_job.remove_prefixes_of_project(project.id)
+    memory.streaming_projects.pop(project.id, None)
+
+
+def get_event(case_id: str, activity: str, minute: int, last: bool = False) -> dict:
+    # Get an event of the definition of the project
+    event = {"case": case_id, "activity": activity, "time": f"2023-01-01 00:{minute:02d}:00"}
+    if last:
+        event[ColumnDefinition.COMPLETE_INDICATOR] = True
+    return event
+
+
+def test_ids_follow_request_order(db: Session, project: Any, streaming: dict[str, list]) -> None:
+    # The returned ids follow the order of the events, and each event is stored with its case
+    events = [get_event("1", "a", 1), get_event("2", "a", 2), get_event("1", "b", 3), get_event("2", "b", 4)]
+
+    event_ids = event_service.process_new_events(events, project.id, db)["event_ids"]
+
+    assert event_ids == sorted(event_ids)
+    db_events = {db_event.id: db_event for db_event in db.query(Event).filter_by(project_id=project.id)}
+    assert [db_events[event_id].attributes for event_id in event_ids] == events
+    assert [db_events[event_id].case.case_id for event_id in event_ids] == ["1", "2", "1", "2"]
+    assert [request["event_id"] for request in streaming["sent"]] == event_ids
+    assert [len(request["prefix"]) for request in streaming["sent"]] == [1, 1, 2, 2]
+
+
+def test_existing_case_is_reused(db: Session, project: Any, streaming: dict[str, list]) -> None:
+    # The case which already exists keeps its id, only the missing case is created
+    existing_id = case_crud.upsert_cases(db, project.id, ["1"])["1"]
+    db.commit()
+
+    event_service.process_new_events([get_event("1", "a", 1), get_event("3", "a", 2)], project.id, db)
+
+    db_cases = {db_case.case_id: db_case.id for db_case in db.query(Case).filter_by(project_id=project.id)}
+    assert db_cases.keys() == {"1", "3"} and db_cases["1"] == existing_id
+
+
+def test_completed_cases_are_published(db: Session, project: Any, streaming: dict[str, list]) -> None:
+    # The last event of a case completes the case and is published instead of being sent to the plugins
+    events = [get_event("1", "a", 1), get_event("2", "a", 2), get_event("1", "b", 3, last=True)]
+
+    event_ids = event_service.process_new_events(events, project.id, db)["event_ids"]
+
+    assert streaming["published"] == [event_ids[2]]
+    assert [request["event_id"] for request in streaming["sent"]] == event_ids[:2]
+    db.expire_all()
+    assert db.get(Event, event_ids[2]).prescribed and not db.get(Event, event_ids[0]).prescribed
+    completed = {db_case.case_id: db_case.completed for db_case in db.query(Case).filter_by(project_id=project.id)}
+    assert completed == {"1": True, "2": False}
+
+
+def test_invalid_event_is_reported_by_index(db: Session, project: Any, streaming: dict[str, list]) -> None:
+    # The error names the index of the invalid event, and none of the events is stored
+    events = [get_event("1", "a", 1), {"case": "1", "activity": "b"}]
+
+    with pytest.raises(HTTPException) as e:
+        event_service.process_new_events(events, project.id, db)
+
+    assert e.value.status_code == 400 and e.value.detail == "Event 1: Missing pre-defined column time"
+    assert db.query(Event).filter_by(project_id=project.id).count() == 0
+    assert not streaming["sent"]
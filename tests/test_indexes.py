@@ -0,0 +1,79 @@
+import logging
+import os
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+# Enable logging
+logger = logging.getLogger(__name__)
+
+# The tests run against the database of TEST_DATABASE_URL, which is configured by conftest.py
+if not os.environ.get("TEST_DATABASE_URL"):
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+import core.models.case as case_model  # noqa: E402
+import core.models.event as event_model  # noqa: E402
+from core.starters.database import engine, migrate_database  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def connection() -> Connection:
+    # Upgrade the database to the latest revision, and fill a project with 100 cases of 10 events, so the plans
+    # follow the selectivity of a real event log instead of ties between the indexes of an almost empty table.
+    # Sequential scans are disabled, and everything is rolled back after the tests
+    migrate_database()
+    with engine.connect() as connection:
+        project_id = connection.scalar(text("INSERT INTO project (name) VALUES ('test') RETURNING id"))
+        connection.execute(text(
+            'INSERT INTO "case" (project_id, case_id, completed) '
+            "SELECT :project_id, i::text, false FROM generate_series(1, 100) AS i"
+        ), {"project_id": project_id})
+        connection.execute(text(
+            "INSERT INTO event (project_id, case_id, attributes, prescriptions, prescribed, sent) "
+            'SELECT :project_id, c.id, \'{}\', \'{}\', false, false FROM "case" AS c, generate_series(1, 10) '
+            "WHERE c.project_id = :project_id"
+        ), {"project_id": project_id})
+        connection.execute(text('ANALYZE event, "case"'))
+        connection.execute(text("SET enable_seqscan = off"))
+        connection.execute(text("SET enable_bitmapscan = off"))
+        connection.info["project_id"] = project_id
+        yield connection
+        connection.rollback()
+
+
+def get_plan(connection: Connection, statement: Select) -> str:
+    # Get the query plan of the statement
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    return "\n".join(row[0] for row in connection.execute(text(f"EXPLAIN {compiled}")))
+
+
+def test_events_of_case_use_index(connection: Connection) -> None:
+    # The query of get_events_by_case_id_and_project_id
+    project_id = connection.info["project_id"]
+    plan = get_plan(connection, select(event_model.Event).filter_by(case_id=1, project_id=project_id))
+    assert "Index Scan using ix_event_case_id_project_id" in plan, plan
+
+
+def test_events_of_project_use_index(connection: Connection) -> None:
+    # The query of the events of a project, e.g. delete_all_events_by_project_id
+    project_id = connection.info["project_id"]
+    plan = get_plan(connection, select(event_model.Event).filter_by(project_id=project_id))
+    assert "Index Scan using ix_event_project_id on" in plan, plan
+
+
+def test_case_lookup_uses_unique_index(connection: Connection) -> None:
+    # The query of get_case_by_project_id_and_case_id
+    project_id = connection.info["project_id"]
+    plan = get_plan(connection, select(case_model.Case).filter_by(project_id=project_id, case_id="1"))
+    assert "Index Scan using uq_case_project_id_case_id" in plan, plan
+
+
+def test_unsent_events_use_partial_index(connection: Connection) -> None:
+    # The query of get_unsent_prescribed_event_ids_async
+    project_id = connection.info["project_id"]
+    plan = get_plan(connection, select(event_model.Event.id)
+                    .filter_by(project_id=project_id, prescribed=True, sent=False)
+                    .order_by(event_model.Event.id))
+    assert "using ix_event_project_id_unsent" in plan, plan
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+from pika import BasicProperties
+
+from core.enums.message import MessageType
+from core.functions.message import util
+
+pytest.importorskip("msgpack")
+pytest.importorskip("zstandard")
+
+# Data with the values the services send: integer keys, which JSON turns into strings, nested rows and datetimes
+DATA = {
+    "project_id": 1,
+    "counts": {1: 2, "a": None},
+    "rows": [["1", "a", 1.5, True]],
+    "created_at": datetime(2023, 1, 1, 12, 30)
+}
+EXPECTED_DATA = {
+    "project_id": 1,
+    "counts": {"1": 2, "a": None},
+    "rows": [["1", "a", 1.5, True]],
+    "created_at": "2023-01-01T12:30:00"
+}
+
+
+@pytest.fixture(autouse=True)
+def peers(monkeypatch: pytest.MonkeyPatch) -> dict:
+    # The announced codecs of the peers are global, so each test starts without them
+    peers = {}
+    monkeypatch.setattr(util, "peers", peers)
+    monkeypatch.setattr(util, "codecs", ["msgpack", "zstd"])
+    return peers
+
+
+def round_trip(receiver_id: str, data: dict) -> tuple[str, dict, dict]:
+    # Encode the message for the receiver and decode it as the receiver would
+    body, properties = util.get_message(receiver_id, MessageType.STREAMING_PRESCRIPTION_REQUEST, dict(data))
+    message_type, decoded = util.get_data_from_body(body, BasicProperties(**properties))
+    return message_type, decoded, properties
+
+
+def test_json_round_trip() -> None:
+    # Peers which never announced their codecs get JSON
+    message_type, data, properties = round_trip("plugin", DATA)
+
+    assert properties["content_type"] == util.JSON_CONTENT_TYPE and properties["content_encoding"] is None
+    assert message_type == MessageType.STREAMING_PRESCRIPTION_REQUEST
+    assert data == EXPECTED_DATA
+
+
+def test_msgpack_round_trip(peers: dict) -> None:
+    # Small messages are not compressed, integer keys are decoded as the strings JSON would give
+    peers["plugin"] = {"codecs": {"msgpack", "zstd"}, "session": "s"}
+    message_type, data, properties = round_trip("plugin", DATA)
+
+    assert properties["content_type"] == util.MSGPACK_CONTENT_TYPE and properties["content_encoding"] is None
+    assert message_type == MessageType.STREAMING_PRESCRIPTION_REQUEST
+    assert data == EXPECTED_DATA
+
+
+def test_msgpack_zstd_round_trip(peers: dict) -> None:
+    # Messages over the threshold are compressed
+    peers["plugin"] = {"codecs": {"msgpack", "zstd"}, "session": "s"}
+    rows = [["1", "activity", i] for i in range(1000)]
+    message_type, data, properties = round_trip("plugin", {"rows": rows})
+
+    assert properties["content_type"] == util.MSGPACK_CONTENT_TYPE
+    assert properties["content_encoding"] == util.ZSTD_CONTENT_ENCODING
+    assert data == {"rows": rows}
+
+
+def test_receiver_remembers_sender_codecs(peers: dict) -> None:
+    # The codecs and the session in the headers are remembered for the replies
+    round_trip("plugin", DATA)
+
+    assert peers[util.config.APP_ID] == {"codecs": {"msgpack", "zstd"}, "session": util.session_id}
+
+
+def test_message_without_properties_is_json() -> None:
+    # Old peers send JSON without properties or headers
+    body = util.get_body(MessageType.STREAMING_PRESCRIPTION_REQUEST, dict(DATA))
+
+    assert util.get_data_from_body(body) == (MessageType.STREAMING_PRESCRIPTION_REQUEST, EXPECTED_DATA)
+    assert util.get_data_from_body(body, BasicProperties()) == (MessageType.STREAMING_PRESCRIPTION_REQUEST,
+                                                                  EXPECTED_DATA)
@@ -0,0 +1,60 @@
+from core.enums.definition import ColumnDefinition
+from core.functions.event.job import get_prefix, remove_prefix
+
+COLUMNS_DEFINITION = {
+    "case": ColumnDefinition.CASE_ID,
+    "activity": ColumnDefinition.ACTIVITY,
+    "time": ColumnDefinition.TIMESTAMP
+}
+
+
+def get_event(activity: str, minute: int) -> dict:
+    # Get the attributes of an event of the case
+    return {"case": "1", "activity": activity, "time": f"2023-01-01 00:{minute:02d}:00"}
+
+
+def get_activities(prefix: list[dict]) -> list[str]:
+    # Get the activities of a renamed prefix
+    return [element[ColumnDefinition.ACTIVITY] for element in prefix]
+
+
+def test_later_committed_event_is_not_inserted_twice() -> None:
+    # Event 2 is already committed when the prefix of event 1 is loaded, it is added once when it is handled
+    events = [(1, get_event("a", 1)), (2, get_event("b", 2))]
+    load_events = lambda event_id: lambda: [(id_, event) for id_, event in events if id_ <= event_id]  # noqa: E731
+
+    try:
+        prefix, appended = get_prefix(1, 1, 1, COLUMNS_DEFINITION, [], events[0][1], load_events(1))
+        assert get_activities(prefix) == ["a"] and not appended
+
+        prefix, appended = get_prefix(1, 2, 1, COLUMNS_DEFINITION, [], events[1][1], load_events(2))
+        assert get_activities(prefix) == ["a", "b"] and appended
+    finally:
+        remove_prefix(1, 1)
+
+
+def test_event_loaded_with_later_event_is_skipped() -> None:
+    # Event 2 is handled first and loads event 1 with it, event 1 then gets the prefix until itself
+    events = [(1, get_event("a", 1)), (2, get_event("b", 2))]
+
+    try:
+        prefix, appended = get_prefix(1, 2, 2, COLUMNS_DEFINITION, [], events[1][1], lambda: events)
+        assert get_activities(prefix) == ["a", "b"] and not appended
+
+        prefix, appended = get_prefix(1, 1, 2, COLUMNS_DEFINITION, [], events[0][1], lambda: [])
+        assert get_activities(prefix) == ["a"] and not appended
+
+        prefix, appended = get_prefix(1, 3, 2, COLUMNS_DEFINITION, [], get_event("c", 3), lambda: [])
+        assert get_activities(prefix) == ["a", "b", "c"] and appended
+    finally:
+        remove_prefix(1, 2)
+
+
+def test_event_is_inserted_by_timestamp() -> None:
+    # An event with an earlier timestamp is inserted before the cached events and is not appended
+    try:
+        get_prefix(1, 1, 3, COLUMNS_DEFINITION, [], get_event("b", 2), lambda: [(1, get_event("b", 2))])
+        prefix, appended = get_prefix(1, 2, 3, COLUMNS_DEFINITION, [], get_event("a", 1), lambda: [])
+        assert get_activities(prefix) == ["a", "b"] and not appended
+    finally:
+        remove_prefix(1, 3)
@@ -0,0 +1,95 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, Event as ThreadEvent
+from typing import Any
+
+import pytest
+from sqlalchemy.orm import Session
+
+import core.crud.event as event_crud
+import core.functions.message.handler as handler
+from core.models.event import Event
+from core.starters import memory
+
+
+@pytest.fixture
+def published(project: Any, monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    # The project is streaming with the plugins of the database, the published events are recorded
+    published = []
+    memory.streaming_projects[project.id] = {"finished": ThreadEvent(), "type": "streaming"}
+    monkeypatch.setattr(handler, "publish_prescribed_event", lambda project_id, event_id: published.append(event_id))
+
+    yield published
+
+    memory.streaming_projects.pop(project.id, None)
+    memory.streaming_plugins.pop(project.id, None)
+
+
+@pytest.fixture
+def event_id(db: Session, project: Any) -> int:
+    db_event = Event(project_id=project.id, attributes={})
+    db.add(db_event)
+    db.commit()
+    return db_event.id
+
+
+def send_result(project: Any, event_id: int, plugin_key: str, output: Any) -> None:
+    # Handle the streaming prescription result of a plugin
+    handler.handle_streaming_prescription_result({
+        "project_id": project.id,
+        "plugin_key": plugin_key,
+        "event_id": event_id,
+        "data": {"output": output}
+    })
+
+
+def get_event(db: Session, event_id: int) -> Event:
+    db.expire_all()
+    return db.get(Event, event_id)
+
+
+def test_event_is_prescribed_by_all_plugins(db: Session, project: Any, event_id: int, published: list[int]) -> None:
+    # The event is prescribed and published once the results of both plugins are merged
+    send_result(project, event_id, "plugin_a", 1)
+    assert not get_event(db, event_id).prescribed and published == []
+
+    send_result(project, event_id, "plugin_b", 2)
+    db_event = get_event(db, event_id)
+    assert db_event.prescribed and published == [event_id]
+    assert db_event.prescriptions == {"plugin_a": {"output": 1}, "plugin_b": {"output": 2}}
+    assert memory.streaming_plugins[project.id] == {"plugin_a", "plugin_b"}
+
+
+def test_repeated_result_does_not_prescribe(db: Session, project: Any, event_id: int, published: list[int]) -> None:
+    # A plugin sending its result twice does not stand in for the other plugin, and results after the event is
+    # prescribed update the prescription without publishing the event again
+    send_result(project, event_id, "plugin_a", 1)
+    send_result(project, event_id, "plugin_a", 2)
+    assert not get_event(db, event_id).prescribed and published == []
+
+    send_result(project, event_id, "plugin_b", 3)
+    send_result(project, event_id, "plugin_a", 4)
+
+    assert published == [event_id]
+    assert get_event(db, event_id).prescriptions == {"plugin_a": {"output": 4}, "plugin_b": {"output": 3}}
+
+
+def test_concurrent_results_publish_once(db: Session, project: Any, event_id: int, published: list[int]) -> None:
+    # Results handled at the same time by several threads publish the event exactly once
+    plugin_keys = ["plugin_a", "plugin_b"] * 4
+    barrier = Barrier(len(plugin_keys))
+
+    def send(plugin_key: str) -> None:
+        barrier.wait()
+        send_result(project, event_id, plugin_key, plugin_key)
+
+    with ThreadPoolExecutor(len(plugin_keys)) as executor:
+        list(executor.map(send, plugin_keys))
+
+    assert published == [event_id]
+    assert get_event(db, event_id).prescribed
+
+
+def test_missing_event_is_not_prescribed(db: Session, event_id: int) -> None:
+    # The transition is None for an event which does not exist
+    assert event_crud.add_prescription(db, event_id + 1000, "plugin_a", {}, ["plugin_a"]) is None
+    assert event_crud.add_prescription(db, event_id, "plugin_a", {}, ["plugin_a"]) is True
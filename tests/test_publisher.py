@@ -0,0 +1,145 @@
+import os
+
+import pytest
+from pika import BasicProperties
+from pika.exceptions import ChannelClosed
+
+from core.functions.message import util
+from core.functions.message.util import Publisher
+
+
+class FakeChannel:
+    # Channel recording the declared queues and the published messages, it breaks after the given publishes
+    def __init__(self, fail_after: int | None = None):
+        self.is_open = True
+        self.fail_after = fail_after
+        self.declared: list[str] = []
+        self.published: list[tuple[str, bytes]] = []
+
+    def confirm_delivery(self) -> None:
+        pass
+
+    def queue_declare(self, queue: str) -> None:
+        self.declared.append(queue)
+
+    def basic_publish(self, exchange: str, routing_key: str, body: bytes, properties: BasicProperties) -> None:
+        if self.fail_after is not None and len(self.published) >= self.fail_after:
+            self.is_open = False
+            raise ChannelClosed(404, "closed")
+        self.published.append((routing_key, body))
+
+
+class FakeConnection:
+    # BlockingConnection with a single channel
+    def __init__(self, channel: FakeChannel):
+        self.is_open = True
+        self._channel = channel
+
+    def channel(self) -> FakeChannel:
+        return self._channel
+
+    def process_data_events(self, time_limit: float) -> None:
+        pass
+
+    def close(self) -> None:
+        self.is_open = False
+
+
+@pytest.fixture
+def channels(monkeypatch: pytest.MonkeyPatch) -> list[FakeChannel]:
+    # The channels of the new connections, in opening order, the first one breaks after one publish
+    channels = []
+
+    def get_connection(url_parameters: object) -> FakeConnection:
+        channels.append(FakeChannel(fail_after=1 if not channels else None))
+        return FakeConnection(channels[-1])
+
+    monkeypatch.setattr(util, "get_connection", get_connection)
+    return channels
+
+
+def publish(publisher: Publisher, routing_key: str = "plugin") -> None:
+    publisher.publish(routing_key, b"body", BasicProperties())
+
+
+def test_idle_channels_are_reused_lifo(channels: list[FakeChannel]) -> None:
+    # The channel returned last is the next one used, so the other idle channels stay idle. Closed idle channels
+    # are skipped and their connections are closed
+    publisher = Publisher(None, pool_size=3, confirms=False)
+    first, second, closed = [publisher.get_new_channel() for _ in range(3)]
+    closed[1].is_open = False
+    for connection_and_channel in (first, second, closed):
+        publisher._idle.put(connection_and_channel)
+
+    assert publisher.get_channel() == second
+    assert not closed[0].is_open
+    assert publisher.get_channel() == first
+
+
+def test_channel_is_kept_between_messages(channels: list[FakeChannel]) -> None:
+    # Sequential messages use the same pooled channel, the queue is declared once
+    publisher = Publisher(None, pool_size=2, confirms=False)
+    channels.append(FakeChannel())
+    publisher._idle.put((FakeConnection(channels[0]), channels[0]))
+
+    publish(publisher)
+    publish(publisher)
+
+    assert len(channels) == 1
+    assert channels[0].published == [("plugin", b"body"), ("plugin", b"body")]
+    assert channels[0].declared == ["plugin"]
+
+
+def test_broken_channel_is_replaced_once(channels: list[FakeChannel]) -> None:
+    # The message is published by a new channel if the pooled one is broken, the broken connection is closed
+    publisher = Publisher(None, pool_size=1, confirms=False)
+    publish(publisher)
+    broken_connection = publisher._idle.queue[0][0]
+
+    publish(publisher)
+
+    assert len(channels) == 2
+    assert not broken_connection.is_open
+    assert channels[1].published == [("plugin", b"body")]
+    assert publisher._idle.qsize() == 1 and publisher._idle.queue[0][1] is channels[1]
+
+
+def test_second_failure_is_raised(channels: list[FakeChannel], monkeypatch: pytest.MonkeyPatch) -> None:
+    # A new channel which breaks as well is not replaced again, the error reaches the sender
+    publisher = Publisher(None, pool_size=1, confirms=False)
+    publish(publisher)
+    monkeypatch.setattr(util, "get_connection", lambda url_parameters: FakeConnection(FakeChannel(fail_after=0)))
+
+    with pytest.raises(ChannelClosed):
+        publish(publisher)
+
+    assert publisher._idle.empty()
+
+
+def test_declared_queues_are_cleared_on_reconnect(channels: list[FakeChannel]) -> None:
+    # The queues are declared again by the new connection, as the broker may have lost them
+    publisher = Publisher(None, pool_size=1, confirms=False)
+    publish(publisher)
+    assert publisher._declared_queues == {"plugin"}
+
+    publish(publisher)
+
+    assert channels[1].declared == ["plugin"]
+    assert publisher._declared_queues == {"plugin"}
+
+
+def test_forked_process_forgets_channels(channels: list[FakeChannel], monkeypatch: pytest.MonkeyPatch) -> None:
+    # The channels inherited from the parent process are not used by the child process
+    publisher = Publisher(None, pool_size=1, confirms=False)
+    publish(publisher)
+    pid = os.getpid()
+    monkeypatch.setattr(util.os, "getpid", lambda: pid + 1)
+
+    publisher.check_process()
+
+    assert publisher._idle.empty()
+    assert publisher._declared_queues == set()
+    assert publisher._pid == pid + 1
+
+    publish(publisher)
+    assert len(channels) == 2 and channels[1].declared == ["plugin"]
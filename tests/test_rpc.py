@@ -0,0 +1,68 @@
+from concurrent.futures import TimeoutError
+from threading import Timer
+
+import pytest
+
+from core.enums.message import MessageType
+from core.functions.message import rpc
+from core.starters import memory
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    # The sent requests are recorded instead of published
+    sent = []
+    monkeypatch.setattr(rpc, "send_message", lambda **kwargs: sent.append(kwargs) or True)
+    return sent
+
+
+def test_reply_resolves_request(sent: list[dict]) -> None:
+    # The reply sent to the reply queue with the correlation id resolves the waiting request
+    correlation_id, future = rpc.call("processor", MessageType.PROCESS_REQUEST, {"df_name": "df"})
+    assert sent[0]["correlation_id"] == correlation_id and sent[0]["reply_to"] == rpc.config.RPC_REPLY_QUEUE
+
+    Timer(0.05, rpc.resolve, (correlation_id, {"result": 1})).start()
+
+    assert rpc.wait_for_reply(correlation_id, future, timeout=5) == {"result": 1}
+    assert correlation_id not in memory.rpc_requests
+
+
+def test_timeout_cancels_request(sent: list[dict]) -> None:
+    # The request is cancelled and forgotten when the reply does not arrive in time
+    correlation_id, future = rpc.call("processor", MessageType.PROCESS_REQUEST, {})
+
+    with pytest.raises(TimeoutError):
+        rpc.wait_for_reply(correlation_id, future, timeout=0.01)
+
+    assert future.cancelled()
+    assert correlation_id not in memory.rpc_requests
+
+
+def test_late_reply_is_dropped(sent: list[dict]) -> None:
+    # The reply of a timed out request, or of an unknown one, is reported as not waited for
+    correlation_id, future = rpc.call("processor", MessageType.PROCESS_REQUEST, {})
+    with pytest.raises(TimeoutError):
+        rpc.wait_for_reply(correlation_id, future, timeout=0.01)
+
+    assert not rpc.resolve(correlation_id, {"result": 1})
+    assert not rpc.resolve("unknown", {"result": 1})
+
+
+def test_cancelled_request_drops_reply(sent: list[dict]) -> None:
+    # A request cancelled before its reply arrives is not resolved
+    correlation_id, future = rpc.call("processor", MessageType.PROCESS_REQUEST, {})
+    memory.rpc_requests[correlation_id].cancel()
+
+    assert not rpc.resolve(correlation_id, {"result": 1})
+    assert future.cancelled()
+
+
+def test_failed_send_fails_future(monkeypatch: pytest.MonkeyPatch) -> None:
+    # The future fails at once if the request can not be sent, so nobody waits for a reply
+    monkeypatch.setattr(rpc, "send_message", lambda **kwargs: False)
+    correlation_id, future = rpc.call("processor", MessageType.PROCESS_REQUEST, {})
+
+    assert isinstance(future.exception(timeout=0), ConnectionError)
+    assert correlation_id not in memory.rpc_requests
+    with pytest.raises(ConnectionError):
+        rpc.wait_for_reply(correlation_id, future, timeout=0.01)
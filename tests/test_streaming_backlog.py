@@ -0,0 +1,58 @@
+import asyncio
+from collections import deque
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from core.functions.project import streaming
+from core.models.event import Event
+from core.starters import memory
+from core.starters.database import async_engine
+
+
+def run(coroutine: Any) -> Any:
+    # Run the coroutine in a new event loop, the pooled connections of the loop are closed afterwards
+    async def run_and_dispose() -> Any:
+        try:
+            return await coroutine
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(run_and_dispose())
+
+
+def create_events(db: Session, project: Any, states: list[tuple[bool, bool]]) -> list[int]:
+    # Create events of the project with the given prescribed and sent states
+    db_events = [Event(project_id=project.id, attributes={}, prescribed=prescribed, sent=sent)
+                 for prescribed, sent in states]
+    db.add_all(db_events)
+    db.commit()
+    return [db_event.id for db_event in db_events]
+
+
+def test_undelivered_events_are_seeded(db: Session, project: Any) -> None:
+    # The prescribed events never sent are put before the backlog, the ones already in it are not added again
+    unsent, sent, not_prescribed, queued = create_events(db, project, [(True, False), (True, True), (False, False),
+                                                                         (True, False)])
+    memory.streaming_backlogs[project.id] = deque([queued])
+
+    try:
+        run(streaming.seed_prescribed_events(project.id))
+        assert list(memory.streaming_backlogs[project.id]) == [unsent, queued]
+    finally:
+        memory.streaming_backlogs.pop(project.id, None)
+
+
+def test_delivered_events_are_not_seeded_again(db: Session, project: Any) -> None:
+    # The events marked as sent after their delivery are not delivered again after a restart
+    delivered, undelivered = create_events(db, project, [(True, False), (True, False)])
+
+    try:
+        run(streaming.mark_as_sent([delivered]))
+        run(streaming.seed_prescribed_events(project.id))
+        assert list(memory.streaming_backlogs[project.id]) == [undelivered]
+    finally:
+        memory.streaming_backlogs.pop(project.id, None)
+
+    db.expire_all()
+    assert db.get(Event, delivered).sent and not db.get(Event, undelivered).sent
@@ -0,0 +1,82 @@
+import pytest
+
+import core.functions.message.sender as sender
+from core.functions.message import util
+from core.starters import memory as core_memory
+from plugins.common import memory as plugin_memory
+from plugins.common.handler import get_prefix_from_request
+
+COLUMNS = ["CASE_ID", "ACTIVITY"]
+PREFIX = [{"CASE_ID": "1", "ACTIVITY": "a"}, {"CASE_ID": "1", "ACTIVITY": "b"}]
+
+
+@pytest.fixture(autouse=True)
+def clean_memory() -> None:
+    # The column dictionaries and the kept prefixes are global, so each test starts without them
+    yield
+    core_memory.streaming_columns.clear()
+    plugin_memory.streaming_columns.clear()
+    for key in plugin_memory.streaming_prefixes.keys():
+        plugin_memory.streaming_prefixes.pop(key)
+
+
+@pytest.fixture
+def sent(monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    # The plugin "plugin" announced the session "s1", the sent messages are recorded instead of published
+    sent = []
+    monkeypatch.setitem(util.peers, "plugin", {"codecs": set(), "session": "s1"})
+    monkeypatch.setattr(sender, "send_message", lambda plugin_key, message_type, data: sent.append(data) or True)
+    return sent
+
+
+def send(prefix: list[dict], appended: bool) -> None:
+    # Send the prefix of an event of case 1 of project 1
+    sender.send_streaming_prescription_request("plugin", 1, "model", len(prefix), 1, prefix, appended, COLUMNS, {})
+
+
+def test_appended_request_rebuilds_prefix(sent: list[dict]) -> None:
+    # The first request has the rows and the column dictionary, the next one only the appended row
+    send(PREFIX[:1], False)
+    send(PREFIX, True)
+
+    assert sent[0]["rows"] == [["1", "a"]] and sent[0]["columns"] == COLUMNS
+    assert sent[1] == {"project_id": 1, "model_name": "model", "event_id": 2, "case_id": 1, "sequence": 2,
+                       "additional_info": {}, "row": ["1", "b"]}
+    assert get_prefix_from_request(sent[0]) == PREFIX[:1]
+    assert get_prefix_from_request(sent[1]) == PREFIX
+
+
+def test_length_mismatch_is_a_gap(sent: list[dict]) -> None:
+    # The plugin missed the second event, so the appended third one can not be added to its prefix
+    send(PREFIX[:1], False)
+    assert get_prefix_from_request(sent[0]) == PREFIX[:1]
+
+    send(PREFIX + [{"CASE_ID": "1", "ACTIVITY": "c"}], True)
+    assert get_prefix_from_request(sent[1]) is None
+
+
+def test_rows_without_column_dictionary_is_a_gap(sent: list[dict]) -> None:
+    # The plugin restarted without announcing a new session, so it gets rows without the dictionary it lost
+    send(PREFIX[:1], False)
+    send(PREFIX, False)
+
+    assert "columns" not in sent[1]
+    assert get_prefix_from_request(sent[1]) is None
+
+
+def test_dictionary_is_resent_after_session_change(sent: list[dict], monkeypatch: pytest.MonkeyPatch) -> None:
+    # The plugin restarted and announced a new session, so the column dictionary is sent again
+    send(PREFIX[:1], False)
+    plugin_memory.streaming_columns.clear()
+    monkeypatch.setitem(util.peers, "plugin", {"codecs": set(), "session": "s2"})
+
+    send(PREFIX, False)
+
+    assert sent[1]["columns"] == COLUMNS
+    assert get_prefix_from_request(sent[1]) == PREFIX
+    assert core_memory.streaming_columns[("plugin", 1)] == "s2"
+
+
+def test_peer_without_session_gets_named_prefix() -> None:
+    # Plugins which never announced a session get the whole named prefix
+    assert sender.get_prefix_data("old", 1, PREFIX, True, COLUMNS) == {"data": PREFIX}